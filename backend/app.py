@@ -1,78 +1,452 @@
 import os
+import sqlite3
+import functools
 import pandas as pd
 import numpy as np
-from flask import Flask, jsonify, send_from_directory
+from flask import Blueprint, Flask, current_app, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 
+from models.batch_analytics import BatchPortfolioAnalytics
+from models.portfolio import PortfolioAnalyzer
+from models.stress_testing import ScenarioEngine, holdings_from_portfolio
+from models.risk_metrics import DEFAULT_RISK_FREE_RATE, RiskCalculator, RiskMetricsEngine, estimate_log_return_moments
+from services.account_holdings import AccountHoldingsRepository
+from services.covariance_service import CovarianceService
+from services.gemini_service import GeminiService
+from services.market_data import MarketDataService
+from services.market_simulator import MarketSimulator
+from services.performance_rollups import DEFAULT_FREQUENCY, ROLLUP_FREQUENCIES, PerformanceRollups
+from services.quote_broadcaster import QuoteBroadcaster, sse_message
+from services.serialization import dumps, round_values
+from services.timeseries_store import TimeSeriesStore
+from services.wealth_data import HOLDING_COLUMNS, WealthDataStore, load_wealth_workbook
+
+DEFAULT_WEALTH_FILE = '../Planilha riqueza - MM.xlsx'
+DEFAULT_HOLDINGS_DB = '../banking-services/transactionservice/transactions.db'
+
 # --- Data Loading and Processing ---
 
+def get_wealth_store():
+    return current_app.extensions['wealth_store']
+
 def load_wealth_data():
     """
-    Reads and processes the wealth spreadsheet.
+    Returns the processed wealth spreadsheet from the process-wide snapshot.
     """
-    try:
-        file_path = '../Planilha riqueza - MM.xlsx'
-        df = pd.read_excel(file_path, sheet_name='Construção de Patrimônio', header=2)
-        df.rename(columns={df.columns[0]: 'Date'}, inplace=True)
-        df.dropna(subset=['Date'], inplace=True)
-        df['Date'] = pd.to_datetime(df['Date'])
-        df.set_index('Date', inplace=True)
-        numeric_cols = df.select_dtypes(include='number').columns
-        df[numeric_cols] = df[numeric_cols].fillna(0)
-        df = df.replace({np.nan: None})
-        return df
-    except Exception as e:
-        print(f"ERRO ao processar a planilha: {e}")
-        return None
+    snapshot = get_wealth_store().get()
+    return snapshot.frame if snapshot is not None else None
 
-# --- Flask App Initialization ---
+def rounded(value, ndigits=2):
+    """round() that passes through None (metrics without enough data)."""
+    return round(value, ndigits) if value is not None else None
+
+def percent(value):
+    return rounded(value * 100) if value is not None else None
 
-app = Flask(__name__, static_folder='../frontend/build', static_url_path='/')
-CORS(app, origins=["*"])
+def loss_percent(value):
+    """Negative return fraction -> positive loss percentage."""
+    return percent(-value) if value is not None else None
+
+def json_bytes_response(payload):
+    """Wraps pre-encoded JSON the same way jsonify() would."""
+    return current_app.response_class(payload + b"\n", mimetype=current_app.json.mimetype)
+
+def streaming_response(chunks, fmt='ndjson'):
+    """Sends the byte chunks of a generator as they are produced (chunked transfer)."""
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else current_app.json.mimetype
+    return current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+
+def event_stream_response(events):
+    """Server-Sent Events response; proxies are asked not to buffer it."""
+    return current_app.response_class(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 # --- API Endpoints ---
 
-@app.route('/api/performance', methods=['GET'])
+api = Blueprint('api', __name__)
+
+def build_performance_rollups(df):
+    return PerformanceRollups.from_frame(df, ['Riqueza'] + HOLDING_COLUMNS)
+
+@api.route('/api/performance', methods=['GET'])
 def get_performance_data():
-    df = load_wealth_data()
-    if df is None:
+    """
+    Returns the wealth (or one holding's) history rolled up to ?freq=
+    (daily, weekly, monthly, quarterly, yearly; default monthly).
+    Empty periods are null. Supports If-None-Match revalidation.
+    """
+    snapshot = get_wealth_store().get()
+    if snapshot is None:
         return jsonify({"error": "Failed to load data."}), 500
-    performance_df = df['Riqueza'].resample('M').last().reset_index()
-    performance_df['name'] = performance_df['Date'].dt.strftime('%Y-%m')
-    
-    # Replace any NaN that might have been introduced by resample
-    performance_df.replace({np.nan: None}, inplace=True)
-
-    chart_data = [
-        {'name': row['name'], 'value': (round(row['Riqueza'], 2) if row['Riqueza'] is not None else None)}
-        for _, row in performance_df.iterrows()
-    ]
-    return jsonify(chart_data)
+    freq = request.args.get('freq', DEFAULT_FREQUENCY)
+    series = request.args.get('series', 'Riqueza')
+    if freq not in ROLLUP_FREQUENCIES:
+        return jsonify({"error": f"Unsupported freq '{freq}'.", "supported": list(ROLLUP_FREQUENCIES)}), 400
 
-@app.route('/api/portfolio/metrics', methods=['GET'])
+    rollup = snapshot.derive('performance_rollups', build_performance_rollups).get(freq, series)
+    if rollup is None:
+        return jsonify({"error": f"Unknown series '{series}'."}), 400
+
+    response = json_bytes_response(rollup.payload)
+    response.set_etag(rollup.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@api.route('/api/portfolio/metrics', methods=['GET'])
 def get_portfolio_metrics():
     df = load_wealth_data()
     if df is None:
         return jsonify({"error": "Failed to load data."}), 500
     latest_data = df.iloc[-1]
     first_data = df.iloc[0]
-    holding_cols = ['BB', 'NUBANK', 'CEF']
-    holdings = [{'symbol': col, 'name': col, 'value': round(latest_data[col], 2)} for col in holding_cols if col in latest_data and latest_data[col] > 0]
+    holdings = [{'symbol': col, 'name': col, 'value': round(latest_data[col], 2)} for col in HOLDING_COLUMNS if col in latest_data and latest_data[col] > 0]
     initial_wealth = first_data['Riqueza']
     current_wealth = latest_data['Riqueza']
     return_percent = ((current_wealth - initial_wealth) / initial_wealth) * 100 if initial_wealth > 0 else 0
+
+    # Only rows appended since the previous request are processed.
+    engine = current_app.extensions['risk_engine']
+    benchmark_col = current_app.config['BENCHMARK_COLUMN']
+    benchmark = df[benchmark_col].to_numpy(dtype=np.float64, na_value=np.nan) if benchmark_col in df else None
+    engine.sync(df.index, df['Riqueza'].to_numpy(dtype=np.float64, na_value=np.nan), benchmark)
+    risk = engine.metrics()
+
     metrics = {
         "totalValue": round(current_wealth, 2),
         "returnPercent": round(return_percent, 2),
         "holdings": holdings,
-        "sharpeRatio": 0.87,
-        "beta": 1.15,
-        "var95": 2.3
+        "sharpeRatio": rounded(risk['sharpe_ratio']),
+        "beta": rounded(risk['beta']),
+        "var95": loss_percent(risk['var_95']),
+        "var99": loss_percent(risk['var_99']),
+        "cvar95": loss_percent(risk['cvar_95']),
+        "parametricVar95": loss_percent(risk['parametric_var_95']),
+        "volatility": percent(risk['volatility']),
+        "maxDrawdown": loss_percent(risk['max_drawdown'])
     }
     return jsonify(metrics)
 
-@app.route('/api/economic-indicators', methods=['GET'])
+def open_holding_columns(df):
+    """Holding columns with a positive value in the latest row; closed positions are left out."""
+    latest = df.iloc[-1]
+    return [col for col in HOLDING_COLUMNS if col in df and latest[col] > 0]
+
+def build_holding_moments(df):
+    cols = open_holding_columns(df)
+    if not cols:
+        raise ValueError("No open holdings.")
+    values = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    mean, covariance = estimate_log_return_moments(values)
+    return cols, mean, covariance
+
+@api.route('/api/portfolio/monte-carlo', methods=['GET'])
+def get_monte_carlo_risk():
+    """
+    Monte Carlo VaR/CVaR of the current holdings.
+    Query params: paths, horizon (periods), seed.
+    """
+    snapshot = get_wealth_store().get()
+    if snapshot is None:
+        return jsonify({"error": "Failed to load data."}), 500
+    paths = request.args.get('paths', 100_000, type=int)
+    horizon = request.args.get('horizon', 1, type=int)
+    seed = request.args.get('seed', type=int)
+    if not 2 <= paths <= current_app.config['MC_MAX_PATHS'] \
+            or not 1 <= horizon <= current_app.config['MC_MAX_HORIZON'] or (seed is not None and seed < 0):
+        return jsonify({"error": "Invalid paths, horizon or seed."}), 400
+
+    try:
+        cols, mean, covariance = snapshot.derive('holding_moments', build_holding_moments)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    latest = snapshot.frame[cols].iloc[-1].to_numpy(dtype=np.float64)
+    weights = latest / latest.sum()
+
+    try:
+        risk = RiskCalculator().simulate_portfolio_risk(
+            weights, mean, covariance, paths=paths, horizon=horizon, seed=seed,
+            workers=current_app.config['MC_WORKERS'], backend=current_app.config['MC_BACKEND'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "paths": risk['paths'],
+        "horizon": risk['horizon'],
+        "seed": risk['seed'],
+        "weights": {col: round(float(w), 4) for col, w in zip(cols, weights)},
+        "expectedReturn": percent(risk['expected_return']),
+        "volatility": percent(risk['volatility']),
+        "var95": loss_percent(risk['var_95']),
+        "var99": loss_percent(risk['var_99']),
+        "cvar95": loss_percent(risk['cvar_95']),
+        "cvar99": loss_percent(risk['cvar_99'])
+    })
+
+def build_holding_returns(df):
+    cols = open_holding_columns(df)
+    values = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.where(values[:-1] > 0, values[1:] / values[:-1] - 1, np.nan)
+    return cols, df.index[1:], returns
+
+@api.route('/api/portfolio/covariance', methods=['GET'])
+def get_holdings_covariance():
+    """
+    Covariance and correlation of the open holdings' returns.
+    ?kind=rolling (last COVARIANCE_WINDOW rows, default) or ewma.
+    """
+    snapshot = get_wealth_store().get()
+    if snapshot is None:
+        return jsonify({"error": "Failed to load data."}), 500
+    kind = request.args.get('kind', 'rolling')
+    if kind not in CovarianceService.KINDS:
+        return jsonify({"error": f"Unknown kind '{kind}'.", "supported": list(CovarianceService.KINDS)}), 400
+
+    service = current_app.extensions['covariance_service']
+    cols, index, returns = snapshot.derive('holding_returns', build_holding_returns)
+    if not cols:
+        return jsonify({"error": "No open holdings."}), 422
+    service.sync(cols, index, returns)
+    estimate = service.snapshot(cols, kind)
+    if estimate is None or estimate.observations < 2:
+        return jsonify({"error": "At least two return observations of the open holdings are needed."}), 422
+    return jsonify({
+        "symbols": list(estimate.symbols),
+        "kind": estimate.kind,
+        "observations": estimate.observations,
+        "version": estimate.version,
+        "covariance": np.round(estimate.covariance, 8).tolist(),
+        "correlation": np.round(estimate.correlation, 4).tolist()
+    })
+
+@api.route('/api/portfolio/stress-test', methods=['POST'])
+def run_stress_test():
+    """
+    P&L of the holdings under factor shock scenarios, all in one pass.
+    Body (all optional): holdings ({symbol: value} or a list of
+    {symbol, value}; defaults to the current wealth holdings), scenarios
+    ({name: {factor: shock}}) or shocks (rows of FACTORS) with names,
+    and per_holding.
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    engine = current_app.extensions['scenario_engine']
+    try:
+        holdings = holdings_from_portfolio(body)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid holdings: {e}"}), 400
+    if not holdings:
+        df = load_wealth_data()
+        if df is None:
+            return jsonify({"error": "Failed to load data."}), 500
+        latest = df.iloc[-1]
+        holdings = {col: float(latest[col]) for col in HOLDING_COLUMNS if col in latest and latest[col] > 0}
+
+    try:
+        if 'shocks' in body:
+            result = engine.run(holdings, np.asarray(body['shocks'], dtype=np.float64),
+                                body.get('names'), bool(body.get('per_holding')))
+        else:
+            result = engine.run_scenarios(holdings, body.get('scenarios'), bool(body.get('per_holding')))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+def batch_metric_records(batch, metrics, scenario_names):
+    """One metrics dict per account of a HoldingsBatch, in the /api/portfolio/metrics units."""
+    def column(values, scale=1.0, ndigits=2):
+        values = round_values(np.asarray(values, dtype=np.float64) * scale, ndigits)
+        cells = values.astype(object)
+        cells[~np.isfinite(values)] = None
+        return cells.tolist()
+
+    columns = zip(
+        batch.accounts,
+        column(metrics['total_value']),
+        metrics['positions'].tolist(),
+        column(metrics['expected_return'], 100),
+        column(metrics['volatility'], 100),
+        column(metrics['sharpe_ratio']),
+        column(metrics['var_95'], 100),
+        column(metrics['var_99'], 100),
+        column(metrics['max_weight'], 100),
+        column(metrics['concentration'], 1, 4),
+        [scenario_names[i] for i in metrics['worst_scenario']],
+        column(metrics['worst_scenario_pnl']),
+    )
+    keys = ("account", "totalValue", "positions", "expectedReturn", "volatility", "sharpeRatio",
+            "var95", "var99", "maxWeight", "concentration", "worstScenario", "worstScenarioPnl")
+    return [dict(zip(keys, row)) for row in columns]
+
+@api.route('/api/portfolio/batch-metrics', methods=['POST'])
+def get_batch_portfolio_metrics():
+    """
+    Metrics for many accounts, streamed as NDJSON (one account per line).
+    Body: accounts (list of account numbers) or all=true for the whole
+    book; optional prices ({symbol: price}) to mark positions to market
+    instead of valuing them at cost, and batch_size.
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    accounts = body.get('accounts')
+    if body.get('all'):
+        accounts = None
+    elif not isinstance(accounts, list) or not accounts:
+        return jsonify({"error": "Provide a list of accounts or all=true."}), 400
+    prices = body.get('prices') or None
+    # Validated up front: once the stream has started, errors can only truncate it
+    if prices is not None and not (isinstance(prices, dict) and all(
+            isinstance(price, (int, float)) and not isinstance(price, bool) and np.isfinite(price) and price >= 0
+            for price in prices.values())):
+        return jsonify({"error": "prices must map symbols to non-negative numbers."}), 400
+    batch_size = body.get('batch_size', 500)
+    if not isinstance(batch_size, int) or batch_size < 1:
+        return jsonify({"error": "Invalid batch_size."}), 400
+
+    repository = current_app.extensions['account_holdings']
+    analytics = current_app.extensions['batch_analytics']
+    scenario_names = list(analytics.scenarios)
+
+    # Opened before the response starts, so failures become an error status
+    # instead of a truncated stream
+    try:
+        batches = repository.iter_batches(accounts, batch_size, prices)
+    except sqlite3.Error as e:
+        current_app.logger.error(f"Holdings database unavailable: {e}")
+        return jsonify({"error": "Holdings database unavailable."}), 503
+
+    def generate():
+        for batch in batches:
+            lines = [dumps({"account": account, "error": "No holdings found."}) for account in batch.missing]
+            if batch.accounts:
+                metrics = analytics.compute(batch.symbols, batch.values)
+                lines.extend(dumps(record) for record in batch_metric_records(batch, metrics, scenario_names))
+            if lines:
+                yield b"\n".join(lines) + b"\n"
+
+    return streaming_response(generate())
+
+@api.route('/api/portfolio/optimize', methods=['GET'])
+def optimize_portfolio():
+    """
+    Efficient-frontier allocation for ?risk_tolerance= (1-10), ?horizon=
+    (short, medium, long) and ?goal= (preservation, income, growth).
+    """
+    analyzer = current_app.extensions['portfolio_analyzer']
+    result = analyzer.optimize(
+        request.args.get('risk_tolerance', 5, type=int),
+        request.args.get('horizon', 'long'),
+        request.args.get('goal', 'growth'))
+    return jsonify(result), 200 if result['status'] == 'optimized' else 422
+
+@api.route('/api/market/history/export', methods=['GET'])
+def export_market_history():
+    """
+    Streams OHLCV rows for several symbols without building the payload.
+    Query params: symbols (comma separated), period or start/end as for
+    /api/market/history/<symbol>, format (ndjson, json for one array).
+    """
+    symbols = [s for s in request.args.get('symbols', '').split(',') if s]
+    if not symbols:
+        return jsonify({"error": "Provide symbols."}), 400
+    fmt = request.args.get('format', 'ndjson')
+    service = current_app.extensions['market_data']
+    try:
+        chunks = service.stream_historical_data(
+            symbols, request.args.get('period', '1Y'), request.args.get('start'), request.args.get('end'), fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return streaming_response(chunks, fmt)
+
+@api.route('/api/market/history/<symbol>', methods=['GET'])
+def get_market_history(symbol):
+    """
+    Daily OHLCV for a symbol as columnar JSON.
+    Query params: period (1W, 1M, 3M, 6M, 1Y, 5Y), or start/end
+    (epoch seconds or ISO dates) for the rows with start <= time < end;
+    max_points and method (lttb, minmax) to downsample long ranges.
+    """
+    service = current_app.extensions['market_data']
+    max_points = request.args.get('max_points', type=int)
+    try:
+        payload = service.get_historical_json(
+            symbol, request.args.get('period', '1Y'), request.args.get('start'), request.args.get('end'),
+            max_points, request.args.get('method', 'lttb'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_bytes_response(payload)
+
+@api.route('/api/market/indicators', methods=['GET'])
+def get_market_indicators():
+    """
+    Economic indicators with a 'version'. With ?since=<version> the response
+    is {'version', 'since', 'patch'} where patch is a JSON Patch (RFC 6902)
+    of the changed fields; unknown versions get the full document.
+    """
+    service = current_app.extensions['market_data']
+    return jsonify(service.get_economic_indicators(request.args.get('since', type=int)))
+
+@api.route('/api/market/sectors', methods=['GET'])
+def get_market_sectors():
+    """Sector performance; versioned like /api/market/indicators."""
+    service = current_app.extensions['market_data']
+    return jsonify(service.get_sector_performance(request.args.get('since', type=int)))
+
+@api.route('/api/market/stream', methods=['GET'])
+def stream_market_quotes():
+    """
+    Pushes quotes as Server-Sent Events: a 'snapshot' event for the requested
+    symbols, then 'delta' events carrying only the quotes that changed.
+    Query params: symbols (comma separated, e.g. IBOV,USDBRL,gold).
+    """
+    symbols = [s for s in request.args.get('symbols', '').split(',') if s]
+    broadcaster = current_app.extensions['quote_broadcaster']
+    try:
+        subscription = broadcaster.subscribe(symbols)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return event_stream_response(subscription.events())
+
+@api.route('/api/chat/stream', methods=['POST'])
+def stream_chat():
+    """
+    Streams the advisor's answer as Server-Sent Events: 'chunk' events with
+    {"text": ...} as the model produces them, then 'done' (or 'error').
+    Body: {"query": "...", "context": {"portfolio": ..., "economic_data": ...}}
+    """
+    body = request.get_json(silent=True) or {}
+    query, context = body.get('query'), body.get('context', {})
+    if not isinstance(query, str) or not query.strip() or not isinstance(context, dict):
+        return jsonify({"error": "Provide a query and an optional context object."}), 400
+    service = current_app.extensions['gemini']
+
+    def generate():
+        try:
+            for chunk in service.stream_analysis(query, context):
+                yield sse_message('chunk', {'text': chunk})
+        except Exception:
+            yield sse_message('error', {'error': 'The answer could not be completed.'})
+            return
+        yield sse_message('done', {})
+
+    return event_stream_response(generate())
+
+@api.route('/api/data/status', methods=['GET'])
+def get_data_status():
+    """Returns the generation and load time of the wealth data snapshot."""
+    snapshot = get_wealth_store().get()
+    if snapshot is None:
+        return jsonify({"error": "Failed to load data."}), 500
+    return jsonify({
+        "generation": snapshot.generation,
+        "loadedAt": pd.Timestamp(snapshot.loaded_at, unit='s', tz='UTC').isoformat(),
+        "loadSeconds": round(snapshot.load_duration, 4),
+        "rows": len(snapshot.frame)
+    })
+
+@api.route('/api/economic-indicators', methods=['GET'])
 def get_economic_indicators():
     """Returns mock economic indicators."""
     indicators = {
@@ -83,7 +457,7 @@ def get_economic_indicators():
     }
     return jsonify(indicators)
 
-@app.route('/api/ai-insights', methods=['GET'])
+@api.route('/api/ai-insights', methods=['GET'])
 def get_ai_insights():
     """Returns mock AI insights."""
     insights = [
@@ -96,14 +470,58 @@ def get_ai_insights():
 
 # --- Static File Serving ---
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
+@api.route('/', defaults={'path': ''})
+@api.route('/<path:path>')
 def serve(path):
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
+    static_folder = current_app.static_folder
+    if path != "" and os.path.exists(os.path.join(static_folder, path)):
+        return send_from_directory(static_folder, path)
     else:
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_from_directory(static_folder, 'index.html')
+
+
+# --- Flask App Initialization ---
+
+def create_app(wealth_file=None):
+    app = Flask(__name__, static_folder='../frontend/build', static_url_path='/')
+    CORS(app, origins=["*"])
+    wealth_file = wealth_file or os.getenv('WEALTH_DATA_FILE', DEFAULT_WEALTH_FILE)
+    # Parsed frames are cached as Arrow sidecars so other workers and later
+    # starts can skip the workbook parse.
+    loader = functools.partial(load_wealth_workbook, cache_dir=os.getenv('WEALTH_CACHE_DIR'))
+    app.extensions['wealth_store'] = WealthDataStore(wealth_file, loader=loader)
+    # Optional column with a market index (e.g. IBOV) used for beta
+    app.config['BENCHMARK_COLUMN'] = os.getenv('WEALTH_BENCHMARK_COLUMN', 'IBOV')
+    app.extensions['risk_engine'] = RiskMetricsEngine(
+        risk_free_rate=float(os.getenv('RISK_FREE_RATE', DEFAULT_RISK_FREE_RATE)))
+    app.extensions['portfolio_analyzer'] = PortfolioAnalyzer()
+    app.extensions['scenario_engine'] = ScenarioEngine()
+    app.extensions['account_holdings'] = AccountHoldingsRepository(
+        os.getenv('HOLDINGS_DB_FILE', DEFAULT_HOLDINGS_DB))
+    app.extensions['batch_analytics'] = BatchPortfolioAnalytics(
+        risk_free_rate=float(os.getenv('RISK_FREE_RATE', DEFAULT_RISK_FREE_RATE)),
+        scenario_engine=app.extensions['scenario_engine'])
+    app.extensions['covariance_service'] = CovarianceService(
+        window=int(os.getenv('COVARIANCE_WINDOW', 252)))
+    # Historical OHLCV is memory-mapped from MARKET_HISTORY_DIR when set;
+    # MARKET_SIMULATION_SEED makes the simulated quotes reproducible
+    app.extensions['market_data'] = MarketDataService(
+        history_store=TimeSeriesStore(os.getenv('MARKET_HISTORY_DIR')),
+        simulator=MarketSimulator(seed=int(os.getenv('MARKET_SIMULATION_SEED', 0))))
+    app.extensions['gemini'] = GeminiService()
+    # One refresh loop per worker feeds every /api/market/stream client
+    app.extensions['quote_broadcaster'] = QuoteBroadcaster(
+        app.extensions['market_data'].get_quotes,
+        interval=float(os.getenv('QUOTE_PUSH_INTERVAL', 1.0)))
+    app.config['MC_WORKERS'] = int(os.getenv('MC_WORKERS', 1))
+    app.config['MC_MAX_PATHS'] = int(os.getenv('MC_MAX_PATHS', 1_000_000))
+    app.config['MC_MAX_HORIZON'] = int(os.getenv('MC_MAX_HORIZON', 2520))  # ten years of trading days
+    app.config['MC_BACKEND'] = os.getenv('MC_BACKEND', 'thread')
+    app.register_blueprint(api)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
-    if load_wealth_data() is not None:
+    if app.extensions['wealth_store'].get() is not None:
         app.run(host='0.0.0.0', port=5000, debug=False)
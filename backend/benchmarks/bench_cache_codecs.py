@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cache payload size and encode/decode time per codec.
+
+Compares stdlib JSON of the list-of-dicts form (what CacheService stored
+before codecs) with each binary codec on its natural payload.
+
+    cd backend && python benchmarks/bench_cache_codecs.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.cache_codecs import (MAGIC, ArrowArrayCodec, ArrowFrameCodec, JsonCodec, MsgpackCodec,
+                                   OrjsonCodec)
+
+
+def history_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2000-01-01', periods=rows, freq='min', name='date')
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.001, rows))
+    return pd.DataFrame({'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+                         'volume': rng.integers(0, 10_000, rows)}, index=index)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = history_frame(args.rows)
+    records = [{'date': d, **row} for d, row in zip(frame.index.strftime('%Y-%m-%dT%H:%M:%S'),
+                                                     frame.to_dict('records'))]
+    cases = [
+        ('json', JsonCodec(), records),
+        ('orjson', OrjsonCodec(), records),
+        ('msgpack', MsgpackCodec(), records),
+        ('arrow-frame', ArrowFrameCodec(), frame),
+        ('arrow-array', ArrowArrayCodec(), frame['close'].to_numpy()),
+    ]
+
+    print(f"{args.rows} rows")
+    print(f"{'codec':>12} {'bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    for name, codec, payload in cases:
+        if not codec.available():
+            print(f"{name:>12} {'not installed':>12}")
+            continue
+        encoded, encode_s = timed(lambda: MAGIC + codec.tag + codec.encode(payload), args.repeat)
+        _, decode_s = timed(lambda: codec.decode(memoryview(encoded)[2:]), args.repeat)
+        print(f"{name:>12} {len(encoded):>12,} {encode_s * 1000:>10.1f} {decode_s * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
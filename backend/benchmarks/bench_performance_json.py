@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/performance payload encoding, iterrows vs vectorized.
+
+Both paths serialize an N-point chart series (the shape a daily-resolution
+history produces) and are checked for byte-identical output first.
+
+    cd backend && python benchmarks/bench_performance_json.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.serialization import chart_series_json, date_labels
+
+
+def make_series(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('1990-01-01', periods=rows, freq='h', name='Date')
+    values = 100_000 * np.cumprod(1 + rng.normal(0.00001, 0.001, rows))
+    values[rng.random(rows) < 0.01] = np.nan
+    return pd.Series(values, index=index, name='Riqueza')
+
+
+def legacy_payload(app, series):
+    performance_df = series.reset_index()
+    performance_df['name'] = performance_df['Date'].dt.strftime('%Y-%m-%dT%H')
+    performance_df.replace({np.nan: None}, inplace=True)
+    chart_data = [
+        {'name': row['name'], 'value': (round(row['Riqueza'], 2) if row['Riqueza'] is not None else None)}
+        for _, row in performance_df.iterrows()
+    ]
+    with app.app_context():
+        return jsonify(chart_data).get_data()
+
+
+def vectorized_payload(series):
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return chart_series_json(date_labels(series.index, 'h'), values) + b"\n"
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    print(f"{'rows':>10} {'iterrows (s)':>14} {'vectorized (s)':>16} {'speedup':>9} {'bytes':>12}")
+    for rows in args.sizes:
+        series = make_series(rows)
+        # The legacy path is slow enough that one run is plenty at large sizes.
+        legacy_time, legacy = best_of(lambda: legacy_payload(app, series), 1 if rows >= 100_000 else args.repeat)
+        fast_time, fast = best_of(lambda: vectorized_payload(series), args.repeat)
+        if fast != legacy:
+            raise SystemExit(f"payload mismatch at {rows} rows")
+        print(f"{rows:>10} {legacy_time:>14.4f} {fast_time:>16.4f} {legacy_time / fast_time:>8.1f}x {len(fast):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU per broadcast and connections per worker for pushed quotes.
+
+Subscribes --subscribers clients, each to one of --watchlists symbol sets,
+then publishes rounds where --changed of the symbols move. Reports the
+broadcaster's CPU per publish, the CPU for every client to collect its
+delta (what each stream handler does when woken), memory per subscription,
+and compares the total with every client polling get_real_time_data().
+--threads of the clients also block in wait() on real threads, as they do
+behind the SSE endpoint, to include the cost of waking them; connections
+per worker is derived from the larger per-client cost.
+
+    cd backend && python benchmarks/bench_quote_broadcast.py --subscribers 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.market_data import MarketDataService
+from services.quote_broadcaster import QuoteBroadcaster
+from services.serialization import dumps
+
+
+def cpu(fn):
+    started = time.process_time()
+    result = fn()
+    return result, time.process_time() - started
+
+
+def moved(quotes, symbols, rng):
+    return {**quotes, **{s: {**quotes[s], 'price': quotes[s]['price'] * (1 + rng.gauss(0, 0.001))}
+                         for s in symbols}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=10_000)
+    parser.add_argument('--watchlists', type=int, default=200, help='distinct symbol sets')
+    parser.add_argument('--per-client', type=int, default=5, help='symbols per subscription')
+    parser.add_argument('--changed', type=float, default=0.3, help='fraction of symbols moving per round')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between broadcasts')
+    parser.add_argument('--cpu-budget', type=float, default=0.5, help='share of one core for streaming')
+    parser.add_argument('--memory-mb', type=float, default=512, help='memory budget per worker')
+    parser.add_argument('--threads', type=int, default=1000, help='clients blocking in wait() on threads')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    service = MarketDataService()
+    quotes = service.get_quotes()
+    universe = sorted(quotes)
+    per_client = min(args.per_client, len(universe))
+    watchlists = [rng.sample(universe, per_client) for _ in range(args.watchlists)]
+    broadcaster = QuoteBroadcaster(lambda: quotes, interval=3600)
+    broadcaster.refresh()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    subscriptions = [broadcaster.subscribe(watchlists[i % len(watchlists)]) for i in range(args.subscribers)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per_subscription = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / args.subscribers
+    for subscription in subscriptions:
+        subscription.poll()  # initial snapshots
+
+    publish_s = drain_s = 0.0
+    delivered = 0
+    for _ in range(args.rounds):
+        quotes = moved(quotes, rng.sample(universe, max(1, int(len(universe) * args.changed))), rng)
+        _, seconds = cpu(lambda: broadcaster.publish(quotes))
+        publish_s += seconds
+        messages, seconds = cpu(lambda: [s.poll() for s in subscriptions])
+        drain_s += seconds
+        delivered += sum(len(m) for m in messages)
+    publish_ms = publish_s / args.rounds * 1000
+    drain_ms = drain_s / args.rounds * 1000
+    per_client_us = (publish_s + drain_s) / args.rounds / args.subscribers * 1e6
+
+    polls = 200
+    _, poll_s = cpu(lambda: [dumps(service.get_real_time_data()) for _ in range(polls)])
+    poll_us = poll_s / polls * 1e6
+
+    print(f"{args.subscribers:,} subscribers, {broadcaster.topic_count} topics, "
+          f"{len(universe)} symbols, {args.changed:.0%} moving per round")
+    print(f"  publish (encode + notify)   {publish_ms:>9.2f} ms CPU per broadcast")
+    print(f"  clients collect deltas      {drain_ms:>9.2f} ms CPU per broadcast "
+          f"({delivered / args.rounds:,.0f} deltas)")
+    print(f"  per subscriber              {per_client_us:>9.2f} us CPU per broadcast")
+    print(f"  polling instead             {poll_us:>9.2f} us CPU per client per poll "
+          f"({poll_us * args.subscribers / 1000:,.1f} ms per round)")
+    print(f"  memory per subscription     {per_subscription:>9.0f} bytes")
+
+    # Woken threads: each blocked client is woken, collects its delta and
+    # loops back into wait(), as a stream handler thread does.
+    threaded_us = None
+    if args.threads:
+        waiting = subscriptions[:args.threads]
+        served = threading.Semaphore(0)
+        done = threading.Event()
+
+        def client(subscription):
+            while not done.is_set():
+                if subscription.wait(0.5):
+                    served.release()
+
+        threads = [threading.Thread(target=client, args=(s,), daemon=True) for s in waiting]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)  # let every client block in wait()
+        wall_s = cpu_s = 0.0
+        for _ in range(args.rounds):
+            quotes = moved(quotes, universe, rng)  # every client gets a delta
+            started, started_cpu = time.perf_counter(), time.process_time()
+            broadcaster.publish(quotes)
+            for _ in threads:
+                served.acquire()
+            wall_s += time.perf_counter() - started
+            cpu_s += time.process_time() - started_cpu
+        done.set()
+        threaded_us = cpu_s / args.rounds / args.threads * 1e6
+        print(f"{args.threads:,} clients blocked on threads: all served in "
+              f"{wall_s / args.rounds * 1000:.1f} ms, {threaded_us:.2f} us CPU per client per broadcast")
+
+    per_connection_us = max(per_client_us, threaded_us or 0)
+    by_cpu = int(args.cpu_budget * args.interval / (per_connection_us / 1e6))
+    by_memory = int(args.memory_mb * 2 ** 20 / per_subscription)
+    print(f"connections per worker at {args.interval:g}s broadcasts: {min(by_cpu, by_memory):,} "
+          f"(CPU {by_cpu:,} at {args.cpu_budget:.0%} of a core{' with thread wakeups' if threaded_us else ''}, "
+          f"memory {by_memory:,} in {args.memory_mb:g} MB excluding socket buffers)")
+
+    for subscription in subscriptions:
+        subscription.close()
+    broadcaster.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# backend/models/batch_analytics.py
+
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from models.portfolio import (DEFAULT_CORRELATIONS, DEFAULT_EXPECTED_RETURNS, DEFAULT_SYMBOLS,
+                              DEFAULT_VOLATILITIES)
+from models.risk_metrics import CONFIDENCE_LEVELS, DEFAULT_RISK_FREE_RATE
+from models.stress_testing import ScenarioEngine, DEFAULT_SCENARIOS
+
+# Assumptions for symbols outside the model portfolio: a broad domestic
+# equity with a uniform correlation to the other risky assets.
+FALLBACK_EXPECTED_RETURN = 0.15
+FALLBACK_VOLATILITY = 0.30
+FALLBACK_CORRELATION = 0.30
+TRADING_DAYS = 252
+
+
+def asset_assumptions(symbols: Sequence[str]):
+    """Annual expected returns and covariance for ``symbols``."""
+    known = {symbol: i for i, symbol in enumerate(DEFAULT_SYMBOLS)}
+    base_corr = np.asarray(DEFAULT_CORRELATIONS, dtype=np.float64)
+    idx = np.array([known.get(symbol, -1) for symbol in symbols], dtype=np.intp)
+    is_known = idx >= 0
+
+    mean = np.where(is_known, np.asarray(DEFAULT_EXPECTED_RETURNS)[idx], FALLBACK_EXPECTED_RETURN)
+    vols = np.where(is_known, np.asarray(DEFAULT_VOLATILITIES)[idx], FALLBACK_VOLATILITY)
+    correlation = np.where(np.outer(is_known, is_known), base_corr[np.ix_(idx, idx)], FALLBACK_CORRELATION)
+    riskless = vols < 0.01
+    correlation[riskless, :] = 0.0
+    correlation[:, riskless] = 0.0
+    np.fill_diagonal(correlation, 1.0)
+
+    # Mixing calibrated and fallback correlations need not stay PSD; clip
+    # the spectrum so every portfolio variance is non-negative.
+    eigvals, eigvecs = np.linalg.eigh(correlation)
+    if eigvals[0] < 0:
+        correlation = (eigvecs * np.maximum(eigvals, 0)) @ eigvecs.T
+        d = np.sqrt(np.diag(correlation))
+        correlation /= np.outer(d, d)
+    return mean, correlation * np.outer(vols, vols)
+
+
+class BatchPortfolioAnalytics:
+    """Risk and return metrics for many portfolios in one vectorized pass.
+
+    Holdings come as an (accounts x symbols) value block; every metric is a
+    reduction over the symbol axis, so a batch costs a few matrix products
+    regardless of how many accounts it holds.
+    """
+
+    def __init__(self, risk_free_rate: float = DEFAULT_RISK_FREE_RATE,
+                 scenario_engine: Optional[ScenarioEngine] = None):
+        self.risk_free_rate = risk_free_rate
+        self.scenario_engine = scenario_engine or ScenarioEngine()
+        self.scenarios = DEFAULT_SCENARIOS
+
+    def compute(self, symbols: Sequence[str], values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-account metric arrays; accounts without value get NaN ratios."""
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        mean, covariance = asset_assumptions(symbols)
+        total = values.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = values / total[:, None]
+        weights[~np.isfinite(weights)] = np.nan
+
+        expected_return = weights @ mean
+        volatility = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', weights, covariance, weights), 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = np.where(volatility > 0, (expected_return - self.risk_free_rate) / volatility, np.nan)
+
+        result = {
+            'total_value': total,
+            'positions': np.count_nonzero(values, axis=1),
+            'expected_return': expected_return,
+            'volatility': volatility,
+            'sharpe_ratio': sharpe,
+            'max_weight': weights.max(axis=1),
+            'concentration': (weights ** 2).sum(axis=1),
+        }
+        # One-day parametric VaR as a loss fraction.
+        daily_mean = expected_return / TRADING_DAYS
+        daily_vol = volatility / np.sqrt(TRADING_DAYS)
+        for level in CONFIDENCE_LEVELS:
+            z = NormalDist().inv_cdf(level)
+            result[f'var_{round(level * 100)}'] = z * daily_vol - daily_mean
+
+        # Scenario returns per holding are shared, so all accounts' P&L is one product.
+        shocks = self.scenario_engine.shock_matrix(self.scenarios)
+        holding_returns = np.maximum(shocks @ self.scenario_engine.exposure_matrix(symbols), -1.0)
+        stress_pnl = values @ holding_returns.T
+        result['worst_scenario'] = np.argmin(stress_pnl, axis=1)
+        result['worst_scenario_pnl'] = stress_pnl.min(axis=1)
+        return result
@@ -1,21 +1,213 @@
 # backend/models/portfolio.py
 
-from typing import Any, Dict
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.risk_metrics import DEFAULT_RISK_FREE_RATE
+
+# Annual capital market assumptions for the model portfolio.
+DEFAULT_SYMBOLS = ['PETR4', 'ITUB3', 'BIDI4', 'KNRI11', 'CASH']
+DEFAULT_EXPECTED_RETURNS = [0.18, 0.16, 0.20, 0.13, DEFAULT_RISK_FREE_RATE]
+DEFAULT_VOLATILITIES = [0.35, 0.25, 0.45, 0.15, 0.005]
+DEFAULT_CORRELATIONS = [
+    [1.00, 0.45, 0.40, 0.20, 0.0],
+    [0.45, 1.00, 0.55, 0.25, 0.0],
+    [0.40, 0.55, 1.00, 0.20, 0.0],
+    [0.20, 0.25, 0.20, 1.00, 0.0],
+    [0.00, 0.00, 0.00, 0.00, 1.0],
+]
+
+# Scales the requested risk tolerance down for shorter horizons.
+HORIZON_RISK_SCALE = {'short': 0.5, 'medium': 0.8, 'long': 1.0}
+# Minimum weights per goal, on top of the global bounds.
+GOAL_MINIMUM_WEIGHTS = {
+    'preservation': {'CASH': 0.30},
+    'income': {'KNRI11': 0.20, 'CASH': 0.10},
+    'growth': {},
+}
+MAX_WEIGHT = 0.40
+
+
+def project_to_bounded_simplex(v: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Euclidean projection onto {w : sum(w) = 1, lower <= w <= upper}.
+
+    The projection is clip(v - tau, lower, upper) for the shift tau that makes
+    the weights sum to one. That sum is piecewise linear and non-increasing in
+    tau with kinks at v - upper and v - lower, so tau is found exactly by
+    evaluating every kink at once and interpolating inside the bracketing
+    segment.
+    """
+    kinks = np.unique(np.concatenate((v - upper, v - lower)))
+    sums = np.clip(v[None, :] - kinks[:, None], lower, upper).sum(axis=1)
+    # sums is non-increasing along kinks; find the last kink with sum >= 1.
+    j = int(np.searchsorted(-sums, -1.0, side='right')) - 1
+    if j < 0:
+        tau = kinks[0]
+    elif j >= len(kinks) - 1:
+        tau = kinks[-1]
+    else:
+        s0, s1 = sums[j], sums[j + 1]
+        tau = kinks[j] if s0 == s1 else kinks[j] + (s0 - 1.0) * (kinks[j + 1] - kinks[j]) / (s0 - s1)
+    return np.clip(v - tau, lower, upper)
+
+
+def _solve_mean_variance(mean: np.ndarray, covariance: np.ndarray, risk_aversion: float,
+                         lower: np.ndarray, upper: np.ndarray, start: np.ndarray,
+                         max_iter: int = 2000, tol: float = 1e-10) -> np.ndarray:
+    """max mean'w - risk_aversion/2 * w'Cw under the weight bounds (accelerated projected gradient)."""
+    lipschitz = risk_aversion * np.linalg.eigvalsh(covariance)[-1]
+    step = 1.0 / max(lipschitz, 1e-12)
+    w = y = start
+    t = 1.0
+    for _ in range(max_iter):
+        grad = risk_aversion * covariance @ y - mean
+        w_next = project_to_bounded_simplex(y - step * grad, lower, upper)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        if np.abs(w_next - w).max() < tol:
+            return w_next
+        w, t = w_next, t_next
+    return w
+
+
+class EfficientFrontier:
+    """Long-only, weight-bounded mean-variance frontier.
+
+    Solved once for a grid of risk aversions and stored sorted by volatility,
+    so picking the best portfolio for a risk budget is a binary search.
+    """
+
+    def __init__(self, symbols: Sequence[str], expected_returns: Sequence[float], covariance: np.ndarray,
+                 lower: Optional[Sequence[float]] = None, upper: Optional[Sequence[float]] = None,
+                 points: int = 60):
+        self.symbols = list(symbols)
+        mean = np.asarray(expected_returns, dtype=np.float64)
+        covariance = np.asarray(covariance, dtype=np.float64)
+        n = len(self.symbols)
+        lower = np.zeros(n) if lower is None else np.asarray(lower, dtype=np.float64)
+        upper = np.ones(n) if upper is None else np.asarray(upper, dtype=np.float64)
+        if lower.sum() > 1 + 1e-9 or upper.sum() < 1 - 1e-9 or (lower > upper).any():
+            raise ValueError("Weight bounds are infeasible")
+
+        weights = []
+        w = project_to_bounded_simplex(np.full(n, 1.0 / n), lower, upper)
+        # From minimum variance (high aversion) towards maximum return.
+        for risk_aversion in np.logspace(4, -2, points):
+            w = _solve_mean_variance(mean, covariance, risk_aversion, lower, upper, w)
+            weights.append(w)
+        weights = np.array(weights)
+        returns = weights @ mean
+        vols = np.sqrt(np.einsum('ij,jk,ik->i', weights, covariance, weights))
+
+        # Keep the efficient part: volatility and return both strictly increasing.
+        order = np.argsort(vols, kind='stable')
+        keep = []
+        for i in order:
+            if not keep or (returns[i] > returns[keep[-1]] + 1e-12 and vols[i] > vols[keep[-1]] + 1e-12):
+                keep.append(i)
+        self.weights = weights[keep]
+        self.expected_returns = returns[keep]
+        self.volatilities = vols[keep]
+
+    def __len__(self) -> int:
+        return len(self.volatilities)
+
+    def portfolio_for_volatility(self, target: float) -> int:
+        """Index of the highest-return frontier portfolio with volatility <= target."""
+        return max(int(np.searchsorted(self.volatilities, target, side='right')) - 1, 0)
+
+    def portfolio_for_tolerance(self, fraction: float) -> int:
+        """Index for a risk tolerance in [0, 1]: 0 is minimum variance, 1 maximum return."""
+        low, high = self.volatilities[0], self.volatilities[-1]
+        return self.portfolio_for_volatility(low + min(max(fraction, 0.0), 1.0) * (high - low))
+
+
+def covariance_from_volatilities(volatilities: Sequence[float], correlations: Sequence[Sequence[float]]) -> np.ndarray:
+    vols = np.asarray(volatilities, dtype=np.float64)
+    return np.asarray(correlations, dtype=np.float64) * np.outer(vols, vols)
+
 
 class PortfolioAnalyzer:
+    def __init__(self, symbols: Optional[Sequence[str]] = None,
+                 expected_returns: Optional[Sequence[float]] = None,
+                 covariance: Optional[np.ndarray] = None,
+                 risk_free_rate: float = DEFAULT_RISK_FREE_RATE,
+                 max_cached_frontiers: int = 32):
+        self.symbols = list(symbols or DEFAULT_SYMBOLS)
+        if covariance is None:
+            covariance = covariance_from_volatilities(DEFAULT_VOLATILITIES, DEFAULT_CORRELATIONS)
+        self.update_estimates(DEFAULT_EXPECTED_RETURNS if expected_returns is None else expected_returns, covariance)
+        self.risk_free_rate = risk_free_rate
+        self._frontiers: 'OrderedDict[str, EfficientFrontier]' = OrderedDict()
+        self._max_cached_frontiers = max_cached_frontiers
+        self._lock = threading.Lock()
+
+    def update_estimates(self, expected_returns: Sequence[float], covariance: np.ndarray) -> None:
+        """Swap in new estimates; frontiers for the old ones age out of the cache."""
+        # One tuple so concurrent readers never pair a new mean with an old covariance.
+        self._estimates = (np.asarray(expected_returns, dtype=np.float64),
+                           np.asarray(covariance, dtype=np.float64))
+
+    def frontier(self, lower: np.ndarray, upper: np.ndarray) -> EfficientFrontier:
+        """The frontier for the current estimates and bounds, solved at most once."""
+        mean, covariance = self._estimates
+        key = _frontier_key(self.symbols, mean, covariance, lower, upper)
+        with self._lock:
+            frontier = self._frontiers.get(key)
+            if frontier is not None:
+                self._frontiers.move_to_end(key)
+                return frontier
+        frontier = EfficientFrontier(self.symbols, mean, covariance, lower, upper)
+        with self._lock:
+            self._frontiers[key] = frontier
+            while len(self._frontiers) > self._max_cached_frontiers:
+                self._frontiers.popitem(last=False)
+        return frontier
+
     def optimize(self, risk_tolerance: int, horizon: str, goal: str) -> Dict[str, Any]:
-        # This is a mock implementation
+        """Frontier portfolio for a risk tolerance of 1 (lowest) to 10 (highest)."""
+        lower, upper = self._bounds(goal)
+        try:
+            frontier = self.frontier(lower, upper)
+        except ValueError as e:
+            return {"status": "infeasible", "message": str(e)}
+
+        fraction = (min(max(risk_tolerance, 1), 10) - 1) / 9 * HORIZON_RISK_SCALE.get(horizon, 1.0)
+        i = frontier.portfolio_for_tolerance(fraction)
+        expected_return = float(frontier.expected_returns[i])
+        expected_risk = float(frontier.volatilities[i])
+        allocation = {symbol: round(float(w), 4) for symbol, w in zip(self.symbols, frontier.weights[i])}
+
         return {
-            "recommended_allocation": {
-                "PETR4": 0.20,
-                "ITUB3": 0.25,
-                "BIDI4": 0.15,
-                "KNRI11": 0.15,
-                "CASH": 0.25,
-            },
-            "expected_return": 0.12,
-            "expected_risk": 0.16,
-            "sharpe_ratio": 0.75,
+            "recommended_allocation": {symbol: w for symbol, w in allocation.items() if w > 0},
+            "expected_return": round(expected_return, 4),
+            "expected_risk": round(expected_risk, 4),
+            "sharpe_ratio": round((expected_return - self.risk_free_rate) / expected_risk, 2) if expected_risk > 0 else None,
+            "frontier_points": len(frontier),
             "status": "optimized",
             "message": "Portfolio optimized based on your preferences.",
         }
+
+    def _bounds(self, goal: str) -> Tuple[np.ndarray, np.ndarray]:
+        lower = np.zeros(len(self.symbols))
+        upper = np.full(len(self.symbols), MAX_WEIGHT)
+        for symbol, minimum in GOAL_MINIMUM_WEIGHTS.get(goal, {}).items():
+            if symbol in self.symbols:
+                i = self.symbols.index(symbol)
+                lower[i] = minimum
+                upper[i] = max(upper[i], minimum)
+        if upper.sum() < 1:
+            upper[:] = 1.0
+        return lower, upper
+
+
+def _frontier_key(symbols: Sequence[str], *arrays: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\0'.join(symbols).encode())
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return digest.hexdigest()
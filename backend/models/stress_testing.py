@@ -0,0 +1,127 @@
+# backend/models/stress_testing.py
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Risk factors a scenario can shock:
+#   equity    - Ibovespa return (-0.30 is a 30% crash)
+#   selic_bps - change in the SELIC rate, in basis points
+#   brl       - BRL depreciation against USD (0.20 is USDBRL +20%)
+FACTORS = ['equity', 'selic_bps', 'brl']
+
+# Return of each holding per unit move of each factor.
+DEFAULT_EXPOSURES: Dict[str, Dict[str, float]] = {
+    'PETR4': {'equity': 1.25, 'selic_bps': -0.0001, 'brl': 0.45},
+    'ITUB3': {'equity': 1.05, 'selic_bps': -0.00005, 'brl': -0.05},
+    'BIDI4': {'equity': 1.60, 'selic_bps': -0.0004, 'brl': -0.15},
+    'KNRI11': {'equity': 0.35, 'selic_bps': -0.0006, 'brl': -0.05},
+    'CASH': {'equity': 0.0, 'selic_bps': 0.0, 'brl': 0.0},
+}
+# Used for symbols without a calibrated row: a plain domestic equity.
+FALLBACK_EXPOSURE = {'equity': 1.0, 'selic_bps': -0.0002, 'brl': 0.0}
+
+DEFAULT_SCENARIOS: Dict[str, Dict[str, float]] = {
+    'Crash de 30%': {'equity': -0.30},
+    'SELIC +200bps': {'selic_bps': 200},
+    'Desvalorização BRL 20%': {'brl': 0.20},
+}
+
+
+class ScenarioEngine:
+    """Linear factor stress testing for many scenarios at once.
+
+    Scenario shocks (m x f) times holding exposures (f x h) gives every
+    holding's return in every scenario as one matrix product; weighting by
+    position values gives P&L per scenario. A holding can lose at most 100%.
+    """
+
+    def __init__(self, exposures: Optional[Mapping[str, Mapping[str, float]]] = None,
+                 factors: Sequence[str] = FACTORS):
+        self.factors = list(factors)
+        self.exposures = dict(DEFAULT_EXPOSURES if exposures is None else exposures)
+
+    def exposure_matrix(self, symbols: Sequence[str]) -> np.ndarray:
+        """(factors x holdings) sensitivities, falling back for unknown symbols."""
+        return np.array([
+            [self.exposures.get(symbol, FALLBACK_EXPOSURE).get(factor, 0.0) for symbol in symbols]
+            for factor in self.factors
+        ], dtype=np.float64).reshape(len(self.factors), len(symbols))
+
+    def shock_matrix(self, scenarios: Mapping[str, Mapping[str, float]]) -> np.ndarray:
+        """(scenarios x factors) matrix from {name: {factor: shock}}."""
+        if not isinstance(scenarios, Mapping) or not all(isinstance(s, Mapping) for s in scenarios.values()):
+            raise ValueError("Scenarios must be given as {name: {factor: shock}}")
+        unknown = {factor for shocks in scenarios.values() for factor in shocks} - set(self.factors)
+        if unknown:
+            raise ValueError(f"Unknown factors: {sorted(unknown)}")
+        matrix = np.array([[shocks.get(factor, 0.0) for factor in self.factors] for shocks in scenarios.values()],
+                          dtype=np.float64).reshape(len(scenarios), len(self.factors))
+        if not np.isfinite(matrix).all():
+            raise ValueError("Scenario shocks must be finite numbers")
+        return matrix
+
+    def run(self, holdings: Mapping[str, float], shocks: np.ndarray,
+            names: Optional[Sequence[str]] = None, per_holding: bool = False) -> Dict[str, Any]:
+        """P&L of ``holdings`` ({symbol: value}) under every row of ``shocks``."""
+        symbols = list(holdings)
+        values = np.array([holdings[symbol] for symbol in symbols], dtype=np.float64)
+        shocks = np.atleast_2d(np.asarray(shocks, dtype=np.float64))
+        if shocks.ndim != 2 or shocks.shape[1] != len(self.factors):
+            raise ValueError(f"Expected {len(self.factors)} factor columns, got {shocks.shape[-1]}")
+        if not (np.isfinite(values).all() and np.isfinite(shocks).all()):
+            raise ValueError("Holding values and shocks must be finite numbers")
+        names = list(names) if names is not None else [f"scenario_{i + 1}" for i in range(len(shocks))]
+        if len(names) != len(shocks):
+            raise ValueError(f"Expected {len(shocks)} scenario names, got {len(names)}")
+
+        holding_returns = np.maximum(shocks @ self.exposure_matrix(symbols), -1.0)
+        with np.errstate(over='ignore', invalid='ignore'):
+            holding_pnl = holding_returns * values
+            pnl = holding_pnl.sum(axis=1)
+            total = values.sum()
+            returns = pnl / total if total else np.zeros_like(pnl)
+        if not (np.isfinite(pnl).all() and np.isfinite(holding_pnl).all() and np.isfinite(total)):
+            raise ValueError("Holding values are too large")
+
+        result: Dict[str, Any] = {
+            'factors': list(self.factors),
+            'portfolio_value': float(total),
+            'scenarios': [
+                {'name': name, 'pnl': float(p), 'return': float(r)}
+                for name, p, r in zip(names, pnl, returns)
+            ],
+        }
+        if len(pnl):
+            worst = int(np.argmin(pnl))
+            result['worst'] = result['scenarios'][worst]
+        if per_holding:
+            for scenario, row in zip(result['scenarios'], holding_pnl):
+                scenario['holdings'] = dict(zip(symbols, row.tolist()))
+        return result
+
+    def run_scenarios(self, holdings: Mapping[str, float],
+                      scenarios: Optional[Mapping[str, Mapping[str, float]]] = None,
+                      per_holding: bool = False) -> Dict[str, Any]:
+        """Like run(), with scenarios given as {name: {factor: shock}}."""
+        scenarios = DEFAULT_SCENARIOS if scenarios is None else scenarios
+        return self.run(holdings, self.shock_matrix(scenarios), list(scenarios), per_holding)
+
+
+def holdings_from_portfolio(portfolio: Mapping[str, Any]) -> Dict[str, float]:
+    """{symbol: value} from a portfolio context.
+
+    Accepts the /api/portfolio/metrics shape (a 'holdings' list of
+    {'symbol', 'value'}), a 'holdings' dict, or an 'allocation' of weights.
+    """
+    holdings = portfolio.get('holdings') or portfolio.get('recommended_allocation') or portfolio.get('allocation')
+    if isinstance(holdings, Mapping):
+        return {symbol: float(value) for symbol, value in holdings.items()}
+    if isinstance(holdings, list):
+        return {item['symbol']: float(item['value']) for item in holdings if 'symbol' in item and 'value' in item}
+    return {}
+
+
+def summarize(results: Dict[str, Any]) -> List[str]:
+    """One line per scenario with a decimal comma, e.g. 'Crash de 30%: -34,5%'."""
+    return [f"{s['name']}: " + f"{s['return'] * 100:+.1f}%".replace('.', ',') for s in results['scenarios']]
@@ -0,0 +1,106 @@
+# backend/services/account_holdings.py
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# SQLite builds before 3.32 cap bound parameters at 999 per statement.
+MAX_BATCH_SIZE = 900
+
+
+@dataclass(frozen=True)
+class HoldingsBatch:
+    """Holdings of several accounts as a dense (accounts x symbols) block."""
+    accounts: List[str]
+    symbols: List[str]
+    values: np.ndarray
+    missing: List[str]
+
+
+class AccountHoldingsRepository:
+    """Reads the transaction service's ``portfolio_holdings`` table.
+
+    Positions are valued at ``quantity * price`` when a price is given for
+    the symbol and at cost (``total_invested``) otherwise.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def account_numbers(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT DISTINCT account_number FROM portfolio_holdings ORDER BY account_number').fetchall()
+        return [row[0] for row in rows]
+
+    def iter_batches(self, accounts: Optional[Sequence[str]] = None, batch_size: int = 500,
+                     prices: Optional[Mapping[str, float]] = None) -> Iterator[HoldingsBatch]:
+        """Yields the requested accounts (all of them if None) in blocks of ``batch_size``.
+
+        The database is opened, and the account list resolved, before this
+        returns, so a missing or unreadable database raises sqlite3.Error
+        here rather than partway through iteration.
+        """
+        batch_size = min(max(int(batch_size), 1), MAX_BATCH_SIZE)
+        conn = self._connect()
+        try:
+            if accounts is None:
+                accounts = [row[0] for row in conn.execute(
+                    'SELECT DISTINCT account_number FROM portfolio_holdings ORDER BY account_number')]
+            else:
+                conn.execute('SELECT 1 FROM portfolio_holdings LIMIT 1').fetchall()
+        except Exception:
+            conn.close()
+            raise
+        accounts = list(dict.fromkeys(str(account) for account in accounts))
+        return self._batches(conn, accounts, batch_size, prices)
+
+    @staticmethod
+    def _batches(conn: sqlite3.Connection, accounts: List[str], batch_size: int,
+                 prices: Optional[Mapping[str, float]]) -> Iterator[HoldingsBatch]:
+        try:
+            for start in range(0, len(accounts), batch_size):
+                chunk = accounts[start:start + batch_size]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    'SELECT account_number, symbol, quantity, total_invested FROM portfolio_holdings '
+                    f'WHERE account_number IN ({placeholders})', chunk).fetchall()
+                yield pivot_holdings(chunk, rows, prices)
+        finally:
+            conn.close()
+
+
+def pivot_holdings(accounts: Sequence[str], rows: Sequence[tuple],
+                   prices: Optional[Mapping[str, float]] = None) -> HoldingsBatch:
+    """Stacks (account, symbol, quantity, total_invested) rows into a dense block.
+
+    Accounts keep the requested order; accounts without rows are reported
+    in ``missing`` and left out of the block.
+    """
+    if not rows:
+        return HoldingsBatch([], [], np.zeros((0, 0)), list(accounts))
+    account_col, symbol_col, quantity, invested = zip(*rows)
+    symbols, symbol_idx = np.unique(np.array(symbol_col, dtype=object), return_inverse=True)
+    position = {account: i for i, account in enumerate(accounts)}
+    account_idx = np.fromiter((position[a] for a in account_col), dtype=np.intp, count=len(rows))
+
+    values = np.asarray(invested, dtype=np.float64)
+    if prices:
+        price = np.array([prices.get(symbol, np.nan) for symbol in symbols], dtype=np.float64)[symbol_idx]
+        values = np.where(np.isfinite(price), np.asarray(quantity, dtype=np.float64) * price, values)
+
+    block = np.zeros((len(accounts), len(symbols)))
+    np.add.at(block, (account_idx, symbol_idx), values)
+    present = np.zeros(len(accounts), dtype=bool)
+    present[account_idx] = True
+    return HoldingsBatch(
+        accounts=[a for a, p in zip(accounts, present) if p],
+        symbols=symbols.tolist(),
+        values=block[present],
+        missing=[a for a, p in zip(accounts, present) if not p],
+    )
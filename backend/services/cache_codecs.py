@@ -0,0 +1,231 @@
+# backend/services/cache_codecs.py
+
+import json
+import logging
+import math
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional codec
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover - optional codec
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Encoded values start with MAGIC and a one-byte codec tag. JSON text never
+# starts with 0xC1 (it is not valid UTF-8 either), so values written before
+# the header existed are still read as plain JSON.
+MAGIC = b'\xc1'
+
+
+class Codec:
+    """Encodes one family of values; ``tag`` identifies it in the header."""
+    tag = b''
+    name = ''
+
+    def available(self) -> bool:
+        return True
+
+    def accepts(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: memoryview) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    tag = b'j'
+    name = 'json'
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':')).encode()
+
+    def decode(self, data: memoryview) -> Any:
+        return json.loads(bytes(data))
+
+
+def _has_non_finite(value: Any) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+class OrjsonCodec(Codec):
+    """Plain dict/list payloads (the common case for API responses).
+
+    orjson writes NaN/inf as null and datetimes as ISO strings, which would
+    not read back as the values written; payloads containing them are left
+    to the next codec (msgpack keeps both).
+    """
+    tag = b'o'
+    name = 'orjson'
+
+    def available(self) -> bool:
+        return orjson is not None
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, (dict, list))
+
+    def encode(self, value: Any) -> bytes:
+        # Non-str keys, datetimes and other types orjson rejects raise
+        # TypeError, and the registry moves on to the next codec.
+        encoded = orjson.dumps(value, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        if b'null' in encoded and _has_non_finite(value):
+            raise ValueError("non-finite floats would be written as null")
+        return encoded
+
+    def decode(self, data: memoryview) -> Any:
+        return orjson.loads(data)
+
+
+# msgpack extension types for the date/time values the old JSON path could not store
+_EXT_DATETIME, _EXT_DATE, _EXT_TIME = 1, 2, 3
+_EXT_TYPES = {_EXT_DATETIME: datetime, _EXT_DATE: date, _EXT_TIME: time}
+
+
+def _msgpack_default(value: Any) -> Any:
+    # datetime before date: datetime is a date subclass
+    for code, kind in ((_EXT_DATETIME, datetime), (_EXT_DATE, date), (_EXT_TIME, time)):
+        if isinstance(value, kind):
+            return msgpack.ExtType(code, value.isoformat().encode())
+    raise TypeError(f"msgpack cannot encode {type(value).__name__}")
+
+
+def _msgpack_ext(code: int, data: bytes) -> Any:
+    kind = _EXT_TYPES.get(code)
+    if kind is None:
+        return msgpack.ExtType(code, data)
+    return kind.fromisoformat(data.decode())
+
+
+class MsgpackCodec(Codec):
+    """Mixed payloads: bytes, int keys, NaN, datetimes, tuples (decoded as lists)."""
+    tag = b'm'
+    name = 'msgpack'
+
+    def available(self) -> bool:
+        return msgpack is not None
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True, default=_msgpack_default)
+
+    def decode(self, data: memoryview) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_msgpack_ext)
+
+
+def _read_ipc(data: memoryview):
+    return pa_ipc.open_stream(pa.py_buffer(data)).read_all()
+
+
+def _write_ipc(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ArrowFrameCodec(Codec):
+    """DataFrames as Arrow IPC streams, index and dtypes included."""
+    tag = b'f'
+    name = 'arrow-frame'
+
+    def available(self) -> bool:
+        return pa is not None
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, pd.DataFrame)
+
+    def encode(self, value: pd.DataFrame) -> bytes:
+        return _write_ipc(pa.Table.from_pandas(value, preserve_index=True))
+
+    def decode(self, data: memoryview) -> pd.DataFrame:
+        return _read_ipc(data).to_pandas()
+
+
+class ArrowArrayCodec(Codec):
+    """Numeric ndarrays as a single Arrow column plus their shape.
+
+    Decoding wraps the received buffer without copying, so the returned
+    array is read-only. Booleans are bit-packed in Arrow and are unpacked
+    into a (still read-only) copy.
+    """
+    tag = b'a'
+    name = 'arrow-array'
+
+    def available(self) -> bool:
+        return pa is not None
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, np.ndarray) and value.dtype.kind in 'biuf'
+
+    def encode(self, value: np.ndarray) -> bytes:
+        column = pa.array(np.ascontiguousarray(value).reshape(-1))
+        shape = ','.join(str(n) for n in value.shape)
+        return _write_ipc(pa.table({'values': column}).replace_schema_metadata({'shape': shape}))
+
+    def decode(self, data: memoryview) -> np.ndarray:
+        table = _read_ipc(data)
+        shape = table.schema.metadata[b'shape'].decode()
+        column = table.column('values').combine_chunks()
+        array = column.to_numpy(zero_copy_only=not pa.types.is_boolean(column.type))
+        array.setflags(write=False)
+        return array.reshape(tuple(int(n) for n in shape.split(',')) if shape else ())
+
+
+DEFAULT_CODECS: List[Codec] = [ArrowFrameCodec(), ArrowArrayCodec(), OrjsonCodec(), MsgpackCodec(), JsonCodec()]
+
+
+class CodecRegistry:
+    """Picks the first installed codec that accepts (and can encode) a value."""
+
+    def __init__(self, codecs: Optional[Sequence[Codec]] = None):
+        self.codecs = [codec for codec in (DEFAULT_CODECS if codecs is None else codecs) if codec.available()]
+        self._by_tag: Dict[bytes, Codec] = {codec.tag: codec for codec in DEFAULT_CODECS if codec.available()}
+        self._by_tag.update({codec.tag: codec for codec in self.codecs})
+
+    def encode(self, value: Any) -> bytes:
+        for codec in self.codecs:
+            if codec.accepts(value):
+                try:
+                    return MAGIC + codec.tag + codec.encode(value)
+                except (TypeError, ValueError, OverflowError) as e:
+                    logger.debug(f"{codec.name} cannot encode {type(value).__name__}: {e}")
+        raise TypeError(f"No cache codec can encode {type(value).__name__}")
+
+    def decode(self, data: Any) -> Any:
+        if isinstance(data, str):
+            return json.loads(data)
+        if data[:1] != MAGIC:
+            return json.loads(data)
+        codec = self._by_tag.get(bytes(data[1:2]))
+        if codec is None:
+            raise ValueError(f"Unknown cache codec tag {bytes(data[1:2])!r}")
+        return codec.decode(memoryview(data)[2:])
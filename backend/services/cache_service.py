@@ -1,30 +1,365 @@
 # backend/services/cache_service.py
 
-import json
 import logging
-from typing import Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from services.cache_codecs import CodecRegistry
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+class TierStats:
+    """Hit/miss counters and cumulative lookup latency for one cache tier."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            if error:
+                self.errors += 1
+            elif hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.seconds += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.errors
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_ratio': self.hits / lookups if lookups else None,
+            'avg_latency_ms': self.seconds / lookups * 1000 if lookups else None,
+        }
+
+
+class LocalCache:
+    """Bounded in-process LRU with a per-entry expiry.
+
+    Values are stored as-is and shared between callers, so they must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class InMemoryRedis:
+    """Stand-in for the redis client covering what CacheService uses.
+
+    Same semantics as Redis for get/setex/delete/mget and non-transactional
+    pipelines (values are bytes, expired keys read as missing, setex rejects
+    a non-positive TTL). ``round_trips`` counts what would be network round
+    trips, so tests can check batching.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+        self.round_trips = 0
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._data[key]
+            return None
+        return entry[1]
+
+    def _setex(self, key: str, ttl: int, value: Any) -> bool:
+        if int(ttl) <= 0:
+            raise ValueError("invalid expire time in 'setex' command")
+        if isinstance(value, str):
+            value = value.encode()
+        self._data[key] = (self._clock() + int(ttl), bytes(value))
+        return True
+
+    def _delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            self.round_trips += 1
+            return self._get(key)
+
+    def mget(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            self.round_trips += 1
+            return [self._get(key) for key in keys]
+
+    def setex(self, key: str, ttl: int, value: Any) -> bool:
+        with self._lock:
+            self.round_trips += 1
+            return self._setex(key, ttl, value)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            self.round_trips += 1
+            return self._delete(*keys)
+
+    def pipeline(self, transaction: bool = False) -> '_InMemoryPipeline':
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def __enter__(self) -> '_InMemoryPipeline':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._commands = []
+
+    def get(self, key: str) -> '_InMemoryPipeline':
+        self._commands.append(('_get', (key,)))
+        return self
+
+    def setex(self, key: str, ttl: int, value: Any) -> '_InMemoryPipeline':
+        self._commands.append(('_setex', (key, ttl, value)))
+        return self
+
+    def delete(self, *keys: str) -> '_InMemoryPipeline':
+        self._commands.append(('_delete', keys))
+        return self
+
+    def execute(self) -> List[Any]:
+        client = self._client
+        with client._lock:
+            client.round_trips += 1
+            results = []
+            for name, args in self._commands:
+                try:
+                    results.append(getattr(client, name)(*args))
+                except ValueError as e:
+                    results.append(e)
+        self._commands = []
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+        return results
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
 class CacheService:
-    def __init__(self, redis_client: Optional[Any]):
+    """Two-tier cache: an in-process LRU (L1) in front of Redis (L2).
+
+    L1 entries live for the key's TTL capped at ``local_ttl`` seconds, which
+    bounds how long a process can serve a value another process has since
+    replaced in Redis. Without a Redis client the L1 tier is used alone.
+    Redis values are written with the first codec in ``codecs`` that takes
+    them (Arrow for DataFrames and arrays, orjson for dicts, ...).
+    """
+
+    def __init__(self, redis_client: Optional[Any], local_max_entries: int = 1024,
+                 local_ttl: float = 5.0, codecs: Optional[CodecRegistry] = None):
         self.redis_client = redis_client
+        self.codecs = codecs or CodecRegistry()
+        self.local_ttl = local_ttl
+        self.local = LocalCache(local_max_entries)
+        self.stats = {'local': TierStats(), 'redis': TierStats(), 'load': TierStats()}
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
 
-    def get(self, key: str) -> Optional[Any]:
-        if not self.redis_client:
-            return None
+    def _local_ttl(self, ttl: float) -> float:
+        return min(ttl, self.local_ttl) if self.redis_client else ttl
+
+    def _lookup(self, key: str) -> Any:
+        started = time.perf_counter()
+        value = self.local.get(key)
+        self.stats['local'].record(value is not _MISSING, time.perf_counter() - started)
+        if value is not _MISSING or not self.redis_client:
+            return value
+
+        started = time.perf_counter()
         try:
             cached_data = self.redis_client.get(key)
-            if cached_data:
-                return json.loads(cached_data)
+            if cached_data is not None:
+                value = self.codecs.decode(cached_data)
         except Exception as e:
+            self.stats['redis'].record(False, time.perf_counter() - started, error=True)
             logger.error(f"Error getting from cache: {e}")
-        return None
+            return _MISSING
+        self.stats['redis'].record(value is not _MISSING, time.perf_counter() - started)
+        if value is not _MISSING:
+            self.local.set(key, value, self.local_ttl)
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._lookup(key)
+        return None if value is _MISSING else value
 
     def set(self, key: str, value: Any, ttl: int) -> None:
+        self.local.set(key, value, self._local_ttl(ttl))
         if not self.redis_client:
             return
         try:
-            self.redis_client.setex(key, ttl, json.dumps(value))
+            self.redis_client.setex(key, ttl, self.codecs.encode(value))
         except Exception as e:
             logger.error(f"Error setting cache: {e}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values for the keys that are cached; L1 misses share one MGET."""
+        found: Dict[str, Any] = {}
+        remote: List[str] = []
+        for key in dict.fromkeys(keys):
+            started = time.perf_counter()
+            value = self.local.get(key)
+            self.stats['local'].record(value is not _MISSING, time.perf_counter() - started)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if not remote or not self.redis_client:
+            return found
+
+        started = time.perf_counter()
+        try:
+            payloads = self.redis_client.mget(remote)
+        except Exception as e:
+            self.stats['redis'].record(False, time.perf_counter() - started, error=True)
+            logger.error(f"Error getting many from cache: {e}")
+            return found
+        # Latency of the one round trip is spread over the keys it served.
+        share = (time.perf_counter() - started) / len(remote)
+        for key, payload in zip(remote, payloads):
+            if payload is None:
+                self.stats['redis'].record(False, share)
+                continue
+            try:
+                value = self.codecs.decode(payload)
+            except Exception as e:
+                self.stats['redis'].record(False, share, error=True)
+                logger.error(f"Error decoding cached '{key}': {e}")
+                continue
+            self.stats['redis'].record(True, share)
+            self.local.set(key, value, self.local_ttl)
+            found[key] = value
+        return found
+
+    def set_many(self, values: Mapping[str, Any], ttl: Union[int, Mapping[str, int]]) -> None:
+        """Store several keys in one pipelined round trip.
+
+        ``ttl`` is one TTL for every key or a {key: ttl} mapping.
+        """
+        ttls = {key: ttl[key] if isinstance(ttl, Mapping) else ttl for key in values}
+        for key, value in values.items():
+            self.local.set(key, value, self._local_ttl(ttls[key]))
+        if not self.redis_client or not values:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in values.items():
+                try:
+                    pipe.setex(key, ttls[key], self.codecs.encode(value))
+                except TypeError as e:
+                    logger.error(f"Error encoding '{key}' for cache: {e}")
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error setting many in cache: {e}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.delete(key)
+        except Exception as e:
+            logger.error(f"Error deleting from cache: {e}")
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: int) -> Any:
+        """Cached value for ``key``, computing and storing it with ``factory`` on a miss.
+
+        Concurrent misses on the same key are coalesced: one caller runs the
+        factory and the others wait for its result (or its exception).
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # A previous leader may have stored the value since our lookup.
+            value = self.local.get(key)
+            if value is _MISSING:
+                started = time.perf_counter()
+                try:
+                    value = factory()
+                except BaseException:
+                    self.stats['load'].record(False, time.perf_counter() - started, error=True)
+                    raise
+                self.stats['load'].record(False, time.perf_counter() - started)
+                self.set(key, value, ttl)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tier counters; 'load' counts factory calls made by get_or_set()."""
+        return {tier: stats.to_dict() for tier, stats in self.stats.items()}
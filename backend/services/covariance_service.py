@@ -0,0 +1,245 @@
+# backend/services/covariance_service.py
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 252
+DEFAULT_DECAY = 0.94  # RiskMetrics daily decay
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array = np.array(array, dtype=np.float64)
+    array.setflags(write=False)
+    return array
+
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(covariance))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / np.outer(std, std)
+    correlation[~np.isfinite(correlation)] = 0.0
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+@dataclass(frozen=True)
+class CovarianceSnapshot:
+    """Read-only view of a covariance estimate at one point in time."""
+    symbols: Tuple[str, ...]
+    kind: str
+    mean: np.ndarray
+    covariance: np.ndarray
+    correlation: np.ndarray
+    observations: int
+    version: int
+
+
+class RollingCovariance:
+    """Covariance over the last ``window`` observations.
+
+    Each update adds the new row and removes the one falling out of the
+    window with Welford-style rank-one updates, O(k^2). To keep rounding error
+    from accumulating, the moments are rebuilt from the ring buffer once per
+    ``window`` updates, which is still O(k^2) amortized.
+    """
+
+    def __init__(self, dims: int, window: int = DEFAULT_WINDOW):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self._buffer = np.zeros((window, dims))
+        self._start = 0
+        self.n = 0
+        self._since_rebuild = 0
+        self.mean = np.zeros(dims)
+        self._comoment = np.zeros((dims, dims))
+
+    def update(self, x: np.ndarray) -> None:
+        if self.n == self.window:
+            self._remove(self._buffer[self._start].copy())
+            self._buffer[self._start] = x
+            self._start = (self._start + 1) % self.window
+        else:
+            self._buffer[(self._start + self.n) % self.window] = x
+        self._add(x)
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def _add(self, x: np.ndarray) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._comoment += np.outer(delta, x - self.mean)
+
+    def _remove(self, x: np.ndarray) -> None:
+        if self.n == 1:
+            self.n = 0
+            self.mean[:] = 0
+            self._comoment[:] = 0
+            return
+        delta = x - self.mean
+        self.n -= 1
+        self.mean -= delta / self.n
+        self._comoment -= np.outer(delta, x - self.mean)
+
+    def _rebuild(self) -> None:
+        rows = np.roll(self._buffer, -self._start, axis=0)[:self.n]
+        self.mean = rows.mean(axis=0)
+        centered = rows - self.mean
+        self._comoment = centered.T @ centered
+        self._since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        if self.n < 2:
+            return np.full_like(self._comoment, np.nan)
+        return self._comoment / (self.n - 1)
+
+
+class EwmaCovariance:
+    """Exponentially weighted covariance, O(k^2) per update."""
+
+    def __init__(self, dims: int, decay: float = DEFAULT_DECAY):
+        if not 0 < decay < 1:
+            raise ValueError("decay must be in (0, 1)")
+        self.decay = decay
+        self.n = 0
+        self.mean = np.zeros(dims)
+        self._covariance = np.zeros((dims, dims))
+
+    def update(self, x: np.ndarray) -> None:
+        self.n += 1
+        if self.n == 1:
+            self.mean = np.array(x, dtype=np.float64)
+            return
+        alpha = 1 - self.decay
+        delta = x - self.mean
+        self.mean += alpha * delta
+        self._covariance = self.decay * (self._covariance + alpha * np.outer(delta, delta))
+
+    def covariance(self) -> np.ndarray:
+        if self.n < 2:
+            return np.full_like(self._covariance, np.nan)
+        return self._covariance.copy()
+
+
+class _Tracker:
+    """Rolling and EWMA estimators for one symbol set, plus sync bookkeeping."""
+
+    def __init__(self, symbols: Tuple[str, ...], window: int, decay: float):
+        self.symbols = symbols
+        self.window = window
+        self.decay = decay
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        dims = len(self.symbols)
+        self.estimators = {
+            'rolling': RollingCovariance(dims, self.window),
+            'ewma': EwmaCovariance(dims, self.decay),
+        }
+        self.version = 0
+        self.rows = 0
+        self.last_key = None
+        self.digest = hashlib.blake2b(digest_size=16)  # of every row consumed
+        self.snapshots: Dict[str, CovarianceSnapshot] = {}
+
+    def update(self, rows: np.ndarray) -> None:
+        self.digest.update(np.ascontiguousarray(rows).tobytes())
+        for x in rows:
+            if np.isfinite(x).all():
+                for estimator in self.estimators.values():
+                    estimator.update(x)
+        self.rows += len(rows)
+        self.version += 1
+        self.snapshots.clear()
+
+    def snapshot(self, kind: str) -> CovarianceSnapshot:
+        snapshot = self.snapshots.get(kind)
+        if snapshot is None:
+            estimator = self.estimators[kind]
+            covariance = estimator.covariance()
+            snapshot = CovarianceSnapshot(
+                symbols=self.symbols,
+                kind=kind,
+                mean=_read_only(estimator.mean),
+                covariance=_read_only(covariance),
+                correlation=_read_only(correlation_from_covariance(covariance)),
+                observations=estimator.n,
+                version=self.version,
+            )
+            self.snapshots[kind] = snapshot
+        return snapshot
+
+
+class CovarianceService:
+    """Shared rolling-window and EWMA covariance/correlation per symbol set.
+
+    Callers push return observations and read immutable snapshots; a
+    snapshot is built once per update and shared until the next one.
+    """
+
+    KINDS = ('rolling', 'ewma')
+
+    def __init__(self, window: int = DEFAULT_WINDOW, decay: float = DEFAULT_DECAY):
+        self.window = window
+        self.decay = decay
+        self._trackers: Dict[Tuple[str, ...], _Tracker] = {}
+        self._lock = threading.Lock()
+
+    def _tracker(self, symbols: Sequence[str]) -> _Tracker:
+        key = tuple(symbols)
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            with self._lock:
+                tracker = self._trackers.setdefault(key, _Tracker(key, self.window, self.decay))
+        return tracker
+
+    def update(self, symbols: Sequence[str], returns: np.ndarray) -> None:
+        """Add one observation (k,) or a block of observations (n x k). Rows with NaN are skipped."""
+        rows = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+        if rows.shape[1] != len(symbols):
+            raise ValueError(f"Expected {len(symbols)} columns, got {rows.shape[1]}")
+        tracker = self._tracker(symbols)
+        with tracker.lock:
+            tracker.update(rows)
+
+    def sync(self, symbols: Sequence[str], index: Sequence, returns: np.ndarray) -> None:
+        """Bring a symbol set up to date with a full, keyed history of returns.
+
+        Only rows after the last synced key are fed in; if the history no
+        longer extends what was consumed (a different last key, or any
+        consumed row changed), the estimators start over.
+        """
+        returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+        tracker = self._tracker(symbols)
+        with tracker.lock:
+            rows = tracker.rows
+            if not (0 < rows <= len(returns) and index[rows - 1] == tracker.last_key
+                    and hashlib.blake2b(np.ascontiguousarray(returns[:rows]).tobytes(),
+                                        digest_size=16).digest() == tracker.digest.digest()):
+                if rows:
+                    logger.info(f"Covariance history for {tracker.symbols} changed; rebuilding")
+                tracker.reset()
+                rows = 0
+            if len(returns) > rows:
+                tracker.update(returns[rows:])
+                tracker.last_key = index[len(returns) - 1]
+
+    def snapshot(self, symbols: Sequence[str], kind: str = 'rolling') -> Optional[CovarianceSnapshot]:
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown covariance kind '{kind}'")
+        tracker = self._trackers.get(tuple(symbols))
+        if tracker is None:
+            return None
+        with tracker.lock:
+            return tracker.snapshot(kind)
@@ -0,0 +1,87 @@
+# backend/services/downsampling.py
+
+import numpy as np
+
+DOWNSAMPLING_METHODS = ('lttb', 'minmax')
+
+
+def _bucket_edges(start: int, stop: int, buckets: int) -> np.ndarray:
+    return np.linspace(start, stop, buckets + 1).astype(np.intp)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of at most ``max_points`` points.
+
+    The first and last points are always kept. The interior is split into
+    max_points - 2 buckets and, from each, the point forming the largest
+    triangle with the previously kept point and the next bucket's mean is
+    chosen. Bucket means are computed for all buckets at once; the choice
+    itself depends on the previous bucket's pick, so that part walks the
+    buckets with one vectorized area computation per bucket.
+    """
+    n = len(y)
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])[:max(max_points, 1)]
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max_points - 2
+    edges = _bucket_edges(1, n - 1, buckets)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The bucket after the last one is the final point.
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    picks = np.empty(max_points, dtype=np.intp)
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for b in range(buckets):
+        lo, hi = edges[b], edges[b + 1]
+        # Twice the triangle area; the constant factor does not change the argmax.
+        area = np.abs((x[a] - next_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[b] - y[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        picks[b + 1] = a
+    return picks
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of each bucket's minimum and maximum, in time order.
+
+    Keeps every peak and trough at bucket resolution. Uses max_points // 2
+    buckets, all reduced at once; NaNs are ignored. A single bucket needs
+    two points, so with max_points below 2 only the last point is kept.
+    """
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 2:
+        return np.arange(n)[-1:]
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max_points // 2
+    edges = _bucket_edges(0, n, buckets)
+    counts = np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets), counts)
+
+    with np.errstate(invalid='ignore'):
+        lows = np.fmin.reduceat(y, edges[:-1])
+        highs = np.fmax.reduceat(y, edges[:-1])
+    # First position in each bucket that attains the bucket's min (max).
+    hit_low = np.flatnonzero(y == lows[bucket_of])
+    hit_high = np.flatnonzero(y == highs[bucket_of])
+    _, first_low = np.unique(bucket_of[hit_low], return_index=True)
+    _, first_high = np.unique(bucket_of[hit_high], return_index=True)
+    return np.unique(np.concatenate((hit_low[first_low], hit_high[first_high])))
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'lttb') -> np.ndarray:
+    if max_points < 1:
+        raise ValueError("max_points must be positive")
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method == 'minmax':
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unknown downsampling method '{method}'")
@@ -1,17 +1,56 @@
 import os
+import re
 import json
 import time
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import threading
+import unicodedata
+from typing import Dict, Any, Iterator, Optional
+
+from models.stress_testing import ScenarioEngine, holdings_from_portfolio, summarize
+from services.cache_service import CacheService
+from services.llm_client import LLMClient
 
 logger = logging.getLogger(__name__)
 
+
+def normalize_query(query: str) -> str:
+    """Consulta em forma canônica: Unicode NFKC, minúsculas, espaços colapsados, sem pontuação nas pontas"""
+    text = unicodedata.normalize('NFKC', query).casefold()
+    return re.sub(r'\s+', ' ', text).strip(' .?!;:,')
+
+
+def context_hash(context: Dict[str, Any]) -> str:
+    """Hash estável do contexto (independente da ordem das chaves)"""
+    canonical = json.dumps(context, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class GeminiService:
-    def __init__(self):
+    def __init__(self, cache: Optional[CacheService] = None, cache_ttl: Optional[int] = None,
+                 client: Optional[LLMClient] = None):
         self.api_key = os.getenv('GEMINI_API_KEY')
         self.model = "gemini-2.5-pro"
         self.fallback_model = "gemini-2.5-flash"
         self.available = self.api_key is not None
+        self.scenario_engine = ScenarioEngine()
+        # Cliente assíncrono (pool, rate limit por modelo, hedge para fallback_model);
+        # sem GEMINI_API_URL as respostas continuam simuladas
+        api_url = os.getenv('GEMINI_API_URL')
+        if client is None and self.available and api_url:
+            client = LLMClient(api_url, self.api_key, self.model, self.fallback_model,
+                               timeout=float(os.getenv('GEMINI_TIMEOUT', 30)),
+                               hedge_delay=float(os.getenv('GEMINI_HEDGE_DELAY', 8)))
+        self.client = client
+        # Respostas por (consulta normalizada, hash do contexto): TTL + LRU, e
+        # consultas idênticas simultâneas compartilham uma única chamada
+        self.response_cache = cache or CacheService(
+            None, local_max_entries=int(os.getenv('GEMINI_CACHE_SIZE', 512)))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else int(os.getenv('GEMINI_CACHE_TTL', 600))
+        self._stats = {'requests': 0, 'hits': 0, 'coalesced': 0, 'upstream_calls': 0, 'errors': 0,
+                       'upstream_seconds': 0.0, 'served_seconds': 0.0}
+        self._stats_lock = threading.Lock()
         
         if not self.available:
             logger.warning("Gemini API key não configurada - usando respostas simuladas")
@@ -25,19 +64,138 @@ class GeminiService:
         if not self.available:
             return self._get_simulated_response(query)
         
+        started = time.perf_counter()
+        key = self.cache_key(query, context)
+        loaded = False
+
+        def load() -> str:
+            nonlocal loaded
+            loaded = True
+            return self._analyze(query, context)
+
         try:
-            # Construir prompt contextualizado
-            prompt = self._build_prompt(query, context)
-            
-            # Simular chamada para Gemini (implementar integração real)
-            response = self._call_gemini_api(prompt)
-            
+            response = self.response_cache.get(key)
+            outcome = 'hits'
+            if response is None:
+                # Só quem carrega chama a API; os demais aguardam o mesmo resultado
+                response = self.response_cache.get_or_set(key, load, self.cache_ttl)
+                outcome = 'upstream_calls' if loaded else 'coalesced'
+            self._record(outcome, time.perf_counter() - started)
             return response
             
         except Exception as e:
+            self._record('errors', time.perf_counter() - started)
             logger.error(f"Erro na análise Gemini: {e}")
             return self._get_fallback_response(query)
     
+    def stream_analysis(self, query: str, context: Dict[str, Any]) -> Iterator[str]:
+        """Análise em pedaços de texto, entregues à medida que o modelo os gera.
+        
+        Respostas em cache saem de uma vez; uma geração completa do modelo é
+        guardada no mesmo cache de get_analysis(). Se a falha ocorrer antes do primeiro
+        pedaço, sai a resposta de fallback; depois dele, a exceção é propagada.
+        """
+        
+        if not self.available:
+            yield self._get_simulated_response(query)
+            return
+        
+        started = time.perf_counter()
+        key = self.cache_key(query, context)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self._record('hits', time.perf_counter() - started)
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            context = self._with_stress_tests(context)
+            prompt = self._build_prompt(query, context)
+            for chunk in self._stream_gemini_api(prompt, context):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._record('errors', time.perf_counter() - started)
+            logger.error(f"Erro no streaming Gemini: {e}")
+            if chunks:
+                raise
+            yield self._get_fallback_response(query)
+            return
+        
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats['upstream_seconds'] += elapsed
+        self._record('upstream_calls', elapsed)
+        if self.client is not None:
+            # Sem cliente o texto é simulado: não deve ser servido depois
+            # como resposta do modelo
+            self.response_cache.set(key, ''.join(chunks), self.cache_ttl)
+    
+    def cache_key(self, query: str, context: Dict[str, Any]) -> str:
+        """Chave semântica: modelo + consulta normalizada + hash do contexto"""
+        query_hash = hashlib.sha256(normalize_query(query).encode()).hexdigest()[:32]
+        return f"gemini:{self.model}:{query_hash}:{context_hash(context)[:32]}"
+    
+    def _analyze(self, query: str, context: Dict[str, Any]) -> str:
+        """Uma chamada real: stress tests, prompt e API"""
+        started = time.perf_counter()
+        
+        # Anexar resultados de stress test calculados sobre o portfólio
+        context = self._with_stress_tests(context)
+
+        # Construir prompt contextualizado
+        prompt = self._build_prompt(query, context)
+        
+        # Chamar o Gemini via LLMClient (resposta simulada se não configurado)
+        response = self._call_gemini_api(prompt, context)
+        
+        with self._stats_lock:
+            self._stats['upstream_seconds'] += time.perf_counter() - started
+        return response
+    
+    def _record(self, outcome: str, seconds: float) -> None:
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats[outcome] += 1
+            if outcome in ('hits', 'coalesced'):
+                self._stats['served_seconds'] += seconds
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Taxa de acerto e latência economizada pelo cache de respostas.
+        
+        saved_seconds estima o tempo que acertos e pedidos coalescidos teriam
+        gasto com a latência média de uma chamada, menos o que de fato gastaram.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        served = stats['hits'] + stats['coalesced']
+        avg_upstream = stats['upstream_seconds'] / stats['upstream_calls'] if stats['upstream_calls'] else None
+        answered = served + stats['upstream_calls']
+        return {
+            'requests': stats['requests'],
+            'hits': stats['hits'],
+            'coalesced': stats['coalesced'],
+            'upstream_calls': stats['upstream_calls'],
+            'errors': stats['errors'],
+            'hit_ratio': served / answered if answered else None,
+            'avg_upstream_ms': avg_upstream * 1000 if avg_upstream is not None else None,
+            'saved_seconds': max(served * avg_upstream - stats['served_seconds'], 0.0) if avg_upstream else 0.0,
+        }
+    
+    def _with_stress_tests(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Adicionar ao contexto os cenários de estresse calculados para as posições"""
+        if 'stress_tests' in context:
+            return context
+        holdings = holdings_from_portfolio(context.get('portfolio', {}))
+        if not holdings:
+            return context
+        try:
+            return {**context, 'stress_tests': self.scenario_engine.run_scenarios(holdings)}
+        except Exception as e:
+            logger.error(f"Erro no stress test: {e}")
+            return context
+
     def _build_prompt(self, query: str, context: Dict[str, Any]) -> str:
         """Construir prompt contextualizado para Gemini"""
         
@@ -55,6 +213,9 @@ class GeminiService:
         Métricas de Risco:
         {json.dumps(context.get('risk_metrics', {}), indent=2)}
         
+        Testes de Estresse (P&L por cenário):
+        {json.dumps(context.get('stress_tests', {}), indent=2)}
+        
         Forneça:
         1. Resposta direta à consulta
         2. Análise fundamentada com dados específicos
@@ -67,15 +228,29 @@ class GeminiService:
         
         return prompt
     
-    def _call_gemini_api(self, prompt: str) -> str:
-        """Chamar API do Gemini (implementar integração real)"""
+    def _call_gemini_api(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Chamar API do Gemini"""
         
-        # TODO: Implementar integração real com Gemini API
-        # Por enquanto, retorna resposta simulada inteligente
+        if self.client is not None:
+            completion = self.client.generate_sync(prompt)
+            if completion.model != self.model:
+                logger.info(f"Resposta do modelo de fallback {completion.model} em {completion.seconds:.2f}s")
+            return completion.text
         
-        return self._get_intelligent_response(prompt)
+        # Sem cliente configurado, retorna resposta simulada inteligente
+        return self._get_intelligent_response(prompt, context or {})
     
-    def _get_intelligent_response(self, prompt: str) -> str:
+    def _stream_gemini_api(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Chamar API do Gemini em modo streaming (streamGenerateContent?alt=sse)"""
+        
+        if self.client is not None:
+            yield from self.client.stream_sync(prompt, timeout=self.client.timeout)
+            return
+        
+        # Sem cliente configurado, a resposta simulada sai de uma vez
+        yield self._get_intelligent_response(prompt, context or {})
+    
+    def _get_intelligent_response(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Gerar resposta inteligente baseada no prompt"""
         
         query_lower = prompt.lower()
@@ -83,7 +258,7 @@ class GeminiService:
         if 'portfólio' in query_lower and 'otimiz' in query_lower:
             return self._get_portfolio_optimization_response()
         elif 'risco' in query_lower:
-            return self._get_risk_analysis_response()
+            return self._get_risk_analysis_response((context or {}).get('stress_tests'))
         elif 'recessão' in query_lower or 'crise' in query_lower:
             return self._get_recession_advice_response()
         elif 'diversific' in query_lower:
@@ -115,7 +290,11 @@ class GeminiService:
         Gostaria que eu analise cenários específicos de rebalanceamento?
         """
     
-    def _get_risk_analysis_response(self) -> str:
+    def _get_risk_analysis_response(self, stress_tests: Optional[Dict[str, Any]] = None) -> str:
+        if stress_tests:
+            stress_lines = "\n".join(f"        • {line}" for line in summarize(stress_tests))
+        else:
+            stress_lines = "        • Indisponível: informe as posições do portfólio para calcular os cenários"
         return """
         **Avaliação de Risco do Portfólio**
         
@@ -136,10 +315,8 @@ class GeminiService:
         • Implementar regras sistemáticas de rebalanceamento
         
         **Resultados de Stress Test:**
-        • Crash de 30%: Impacto no portfólio -34,5%
-        • SELIC +200bps: Impacto no portfólio -12,1%
-        • Desvalorização BRL 20%: Impacto +8,3% (benefício PETR4)
-        """
+{stress_lines}
+        """.format(stress_lines=stress_lines)
     
     def _get_recession_advice_response(self) -> str:
         return """
@@ -0,0 +1,365 @@
+# backend/services/llm_client.py
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed when the LLM API is configured
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Client-side limits for one model."""
+    requests_per_second: float = 2.0
+    burst: int = 5  # bucket capacity
+    max_concurrency: int = 4
+
+
+@dataclass(frozen=True)
+class Completion:
+    text: str
+    model: str
+    seconds: float
+    hedged: bool  # the fallback model was also asked
+
+
+class LLMError(Exception):
+    def __init__(self, errors: List[str]):
+        super().__init__(f"All models failed: {'; '.join(errors)}")
+        self.errors = errors
+
+
+class RateLimited(Exception):
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"{model} rate limited (retry after {retry_after:g}s)")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding up to ``capacity``.
+
+    Used from one event loop, so it needs no lock. ``pause()`` empties it
+    until a given time (e.g. a 429's Retry-After).
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = self._clock()
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate + max(self._updated - now, 0.0)
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """No tokens for the next ``seconds``."""
+        now = self._clock()
+        self._refill(now)
+        self._tokens = 0.0
+        self._updated = max(self._updated, now + seconds)
+
+
+class LLMClient:
+    """Asyncio client for the Gemini ``generateContent`` API.
+
+    - One pooled session (``max_connections``) is reused across calls, so
+      connections stay alive between requests.
+    - Each model has a token bucket (requests per second, with a burst) and
+      a concurrency cap; a request waits for both before it is sent.
+    - Requests are hedged: when ``model`` has not answered after
+      ``hedge_delay`` seconds, or fails (429, 5xx, timeout), the prompt is
+      also sent to ``fallback_model`` and the first answer wins; the other
+      request is cancelled.
+    - A 429 empties that model's bucket for its Retry-After.
+
+    ``stream()`` does the same over ``streamGenerateContent?alt=sse``: the
+    race is decided by the first chunk, and the winner's remaining chunks
+    are passed on as the model produces them.
+    """
+
+    def __init__(self, base_url: str, api_key: str, model: str, fallback_model: Optional[str] = None,
+                 limits: Optional[Dict[str, ModelLimits]] = None, default_limits: ModelLimits = ModelLimits(),
+                 timeout: float = 30.0, hedge_delay: float = 8.0, max_connections: int = 20,
+                 clock: Callable[[], float] = time.monotonic):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for the LLM client")
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.fallback_model = fallback_model
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.max_connections = max_connections
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    # --- async API ---
+
+    def bucket(self, model: str) -> TokenBucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            limits = self.limits.get(model, self.default_limits)
+            bucket = self._buckets[model] = TokenBucket(limits.requests_per_second, limits.burst, self._clock)
+        return bucket
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = self._semaphores[model] = asyncio.Semaphore(
+                self.limits.get(model, self.default_limits).max_concurrency)
+        return semaphore
+
+    def _count(self, model: str, event: str) -> None:
+        counts = self._stats.setdefault(model, {})
+        counts[event] = counts.get(event, 0) + 1
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers={'x-goog-api-key': self.api_key})
+        return self._session
+
+    @staticmethod
+    def _payload(prompt: str) -> Dict[str, Any]:
+        return {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+
+    @staticmethod
+    def _text(body: Dict[str, Any]) -> str:
+        candidates = body.get('candidates') or [{}]
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
+
+    def _check(self, model: str, response: 'aiohttp.ClientResponse') -> None:
+        if response.status == 429:
+            retry_after = float(response.headers.get('Retry-After', 1))
+            self.bucket(model).pause(retry_after)
+            self._count(model, 'rate_limited')
+            raise RateLimited(model, retry_after)
+        response.raise_for_status()
+
+    async def _request(self, model: str, prompt: str) -> str:
+        session = await self._get_session()
+        async with self._semaphore(model):
+            await self.bucket(model).acquire()
+            self._count(model, 'requests')
+            url = f"{self.base_url}/v1beta/models/{model}:generateContent"
+            async with session.post(url, json=self._payload(prompt),
+                                    timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                self._check(model, response)
+                body = await response.json(content_type=None)
+        return self._text(body)
+
+    async def _stream_request(self, model: str, prompt: str) -> AsyncIterator[str]:
+        session = await self._get_session()
+        async with self._semaphore(model):
+            await self.bucket(model).acquire()
+            self._count(model, 'requests')
+            url = f"{self.base_url}/v1beta/models/{model}:streamGenerateContent"
+            # A long answer may take longer than ``timeout`` in total, so the
+            # timeout applies to connecting and to each read instead.
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            async with session.post(url, params={'alt': 'sse'}, json=self._payload(prompt),
+                                    timeout=timeout) as response:
+                self._check(model, response)
+                async for line in response.content:
+                    if line.startswith(b'data:'):
+                        text = self._text(json.loads(line[5:]))
+                        if text:
+                            yield text
+
+    @staticmethod
+    async def _first_chunk(chunks: AsyncIterator[str]) -> str:
+        async for chunk in chunks:
+            return chunk
+        raise ValueError("empty response")
+
+    async def generate(self, prompt: str) -> Completion:
+        """Answer from ``model``, hedged to ``fallback_model``."""
+        started = self._clock()
+        models = [self.model] + ([self.fallback_model] if self.fallback_model else [])
+        pending: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+
+        def launch() -> None:
+            model = models.pop(0)
+            pending[asyncio.ensure_future(self._request(model, prompt))] = model
+
+        launch()
+        hedged = False
+        try:
+            while pending:
+                done, _ = await asyncio.wait(list(pending), timeout=self.hedge_delay if models else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()  # the primary is slow: ask the fallback as well
+                    hedged = True
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._count(model, 'wins')
+                        return Completion(task.result(), model, self._clock() - started, hedged)
+                    self._count(model, 'errors')
+                    errors.append(f"{model}: {type(error).__name__} {error}".strip())
+                if not pending and models:
+                    launch()  # fail over immediately
+                    hedged = True
+            raise LLMError(errors)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Chunks of the answer from ``model``, hedged to ``fallback_model`` until the first chunk."""
+        models = [self.model] + ([self.fallback_model] if self.fallback_model else [])
+        pending: Dict[asyncio.Task, Tuple[str, AsyncIterator[str]]] = {}  # first-chunk task -> (model, chunks)
+        errors: List[str] = []
+        winner = None
+
+        def launch() -> None:
+            model = models.pop(0)
+            chunks = self._stream_request(model, prompt)
+            pending[asyncio.ensure_future(self._first_chunk(chunks))] = (model, chunks)
+
+        launch()
+        try:
+            while pending and winner is None:
+                done, _ = await asyncio.wait(list(pending), timeout=self.hedge_delay if models else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()  # no first chunk yet: ask the fallback as well
+                    continue
+                for task in done:
+                    model, chunks = pending.pop(task)
+                    error = task.exception()
+                    if error is None and winner is None:
+                        winner = (model, chunks, task.result())
+                        continue
+                    if error is not None:
+                        self._count(model, 'errors')
+                        errors.append(f"{model}: {type(error).__name__} {error}".strip())
+                    await chunks.aclose()
+                if winner is None and not pending and models:
+                    launch()  # fail over immediately
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, chunks in pending.values():
+                await chunks.aclose()
+        if winner is None:
+            raise LLMError(errors)
+
+        model, chunks, first = winner
+        self._count(model, 'wins')
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per model: requests sent, wins, errors and rate_limited responses."""
+        return {model: dict(counts) for model, counts in self._stats.items()}
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- sync API (for Flask request threads) ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # The session, buckets and semaphores belong to one long-lived loop
+        # thread shared by all request threads.
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def generate_sync(self, prompt: str, timeout: Optional[float] = None) -> Completion:
+        future = asyncio.run_coroutine_threadsafe(self.generate(prompt), self._ensure_loop())
+        return future.result(timeout)
+
+    def stream_sync(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """stream() for a calling thread; ``timeout`` bounds the wait for each chunk.
+
+        Closing the iterator early (e.g. the HTTP client went away) cancels
+        the request.
+        """
+        chunks: 'queue.Queue' = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for chunk in self.stream(prompt):
+                    chunks.put((True, chunk))
+                chunks.put((True, None))
+            except Exception as e:
+                chunks.put((False, e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                try:
+                    ok, value = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No chunk within {timeout}s") from None
+                if not ok:
+                    raise value
+                if value is None:
+                    return
+                yield value
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join()
+            loop.close()
@@ -3,29 +3,130 @@ Market Data Service - Enhanced AI Economic Advisor
 Handles real-time market data integration and caching
 """
 
-import random
 import time
+import zlib
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 import json
 import asyncio
 
+import numpy as np
+import pandas as pd
+
+from services.downsampling import downsample_indices
+from services.market_providers import ProviderError, ProviderFanout
+from services.market_simulator import MarketSimulator
+from services.refresh_cache import CachedValue, RefreshingCache
+from services.serialization import dumps
+from services.timeseries_store import (
+    OhlcvSeries, TimeSeriesStore, check_symbol, iter_series_rows, make_series, series_json,
+)
+from services.versioned_snapshots import SnapshotHistory
+
 logger = logging.getLogger(__name__)
 
+# Slow-moving macro figures; the market-driven ones are filled in from the simulator
+MACRO_INDICATORS = {
+    'brazil': {
+        'selic_rate': 11.75,
+        'ipca_12m': 4.2,
+        'ipca_monthly': 0.28,
+        'gdp_growth': 2.8,
+        'unemployment': 7.8,
+        'fiscal_deficit': -5.2,
+        'current_account': -2.1,
+        'foreign_reserves': 356.8,  # USD billions
+    },
+    'usa': {
+        'fed_rate': 5.25,
+        'cpi_12m': 3.1,
+        'cpi_monthly': 0.2,
+        'gdp_growth': 2.1,
+        'unemployment': 3.7,
+        'fiscal_deficit': -6.8,
+        'consumer_confidence': 102.3,
+        'pmi_manufacturing': 48.7,
+        'pmi_services': 52.1
+    },
+    'europe': {
+        'ecb_rate': 4.50,
+        'cpi_12m': 2.4,
+        'gdp_growth': 1.2,
+        'unemployment': 6.4,
+        'pmi_composite': 47.9
+    },
+    'china': {
+        'pboc_rate': 3.45,
+        'cpi_12m': 0.2,
+        'gdp_growth': 4.5,
+        'pmi_manufacturing': 49.2,
+        'yuan_usd': 7.25
+    },
+    'global': {
+        'world_gdp_growth': 3.0,
+        'global_inflation': 2.9,
+        'trade_growth': 2.8,
+    },
+}
+
+SECTOR_MEMBERS = {
+    'financials': {'top_stocks': ['ITUB3', 'BBDC4', 'BPAC11', 'SANB11']},
+    'energy': {'top_stocks': ['PETR4', 'PETR3', 'PRIO3', 'RRRP3']},
+    'materials': {'top_stocks': ['VALE3', 'CSNA3', 'GGBR4', 'USIM5']},
+    'real_estate': {'top_fiis': ['KNRI11', 'HGLG11', 'XPLG11', 'MXRF11']},
+}
+
 class MarketDataService:
     """Service for fetching and managing market data"""
     
-    def __init__(self):
-        self.last_update = None
-        self.cache_duration = 30  # seconds
-        self._cached_data = None
+    # Each kind is cached and refreshed on its own, so a slow currency
+    # refresh does not hold up index reads.
+    REAL_TIME_KINDS = ('indices', 'currencies', 'commodities')
+    # Lookback in days for the named history periods (anything else: 7 days)
+    HISTORY_PERIODS = {'1W': 7, '1M': 30, '3M': 91, '6M': 182, '1Y': 365, '5Y': 1826}
+    SIMULATED_HISTORY_DAYS = 1826
+    MAX_EXPORT_SYMBOLS = 50
+
+    def __init__(self, cache: Optional[Any] = None, providers: Optional[ProviderFanout] = None,
+                 history_store: Optional[TimeSeriesStore] = None, history_ttl: int = 300,
+                 simulator: Optional[MarketSimulator] = None,
+                 cache_duration: float = 30, cache_durations: Optional[Dict[str, float]] = None,
+                 refresh_ahead: float = 0.8, jitter: float = 0.1,
+                 max_stale: Optional[float] = None, **refresh_options):
+        # refresh_options: clock/spawn overrides passed to RefreshingValue
+        self.cache = cache  # optional CacheService for historical series
+        # Optional HTTP providers; kinds they do not route stay simulated
+        self.providers = providers
+        self.history_ttl = history_ttl
+        # Columnar OHLCV per symbol (memory-mapped files when given a directory)
+        self.history_store = history_store or TimeSeriesStore()
+        self.cache_duration = cache_duration  # seconds, per kind unless overridden
+        # Seeded correlated price paths behind every simulated section; one
+        # tick per cache period, so the sections refreshed together agree
+        self.simulator = simulator or MarketSimulator(tick_seconds=cache_duration)
+        # Stale data is served while a background refresh runs (see RefreshingValue)
+        self._kinds = RefreshingCache(
+            {
+                'indices': self._source('indices', self._fetch_indices),
+                'currencies': self._source('currencies', self._fetch_currency_data),
+                'commodities': self._source('commodities', self._fetch_commodities),
+                'indicators': self._source('indicators', self._fetch_economic_indicators),
+                'sectors': self._source('sectors', self._fetch_sector_performance),
+            },
+            cache_duration, ttls=cache_durations, refresh_ahead=refresh_ahead,
+            jitter=jitter, max_stale=max_stale, **refresh_options)
+        # Version history per kind, for ?since= patches
+        self._versions = {kind: SnapshotHistory() for kind in self._kinds.keys()}
         self._data_sources = {
             'alpha_vantage': False,  # TODO: Implement real APIs
             'yahoo_finance': False,
             'trading_economics': False,
             'fred': False
         }
+        for endpoints in (providers.routes.values() if providers else []):
+            for endpoint in endpoints:
+                self._data_sources[endpoint.provider.name] = True
         
         logger.info("✅ Market Data Service inicializado")
     
@@ -36,226 +137,282 @@ class MarketDataService:
     def get_real_time_data(self) -> Dict[str, Any]:
         """Get real-time market data with caching"""
         
-        # Check cache validity
-        if self._is_cache_valid():
-            logger.debug("📊 Retornando dados do cache")
-            return self._cached_data
-        
         try:
-            # Fetch fresh data
-            market_data = self._fetch_market_data()
-            
-            # Update cache
-            self._cached_data = market_data
-            self.last_update = datetime.now()
-            
-            logger.info("📊 Dados de mercado atualizados")
-            return market_data
+            self._prefetch(self.REAL_TIME_KINDS)
+            parts = {kind: self._kinds.get(kind) for kind in self.REAL_TIME_KINDS}
+            oldest = max(parts.values(), key=lambda cached: cached.age)
+            now = datetime.now()
+            return {
+                'timestamp': now.isoformat(),
+                'last_update': (now - timedelta(seconds=oldest.age)).isoformat(),
+                'data_quality': 'simulated',
+                **{kind: cached.value for kind, cached in parts.items()},
+                'cache': self._cache_info(*parts.values())
+            }
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter dados de mercado: {e}")
             return self._get_fallback_data()
     
-    def get_historical_data(self, symbol: str, period: str = '1Y') -> Dict[str, Any]:
+    def get_quotes(self) -> Dict[str, Dict[str, Any]]:
+        """Latest quote per symbol ({'price', 'change'}) across the real-time kinds"""
+        data = self.get_real_time_data()
+        quotes = {}
+        for kind in ('indices', 'commodities'):
+            for symbol, quote in data.get(kind, {}).items():
+                quotes[symbol] = {'price': quote['price'], 'change': quote['change']}
+        currencies = data.get('currencies', {})
+        groups = [currencies[g] for g in ('major_pairs', 'emerging_markets', 'crypto') if g in currencies]
+        for group in groups or [currencies]:
+            for symbol, quote in group.items():
+                if isinstance(quote, dict):
+                    quotes[symbol] = {'price': quote['rate'], 'change': quote.get('change_1d', quote.get('change'))}
+                elif isinstance(quote, (int, float)):
+                    quotes[symbol] = {'price': quote, 'change': None}
+        return quotes
+
+    def get_historical_data(self, symbol: str, period: str = '1Y',
+                            start: Optional[Any] = None, end: Optional[Any] = None,
+                            max_points: Optional[int] = None, method: str = 'lttb') -> Dict[str, Any]:
         """Get historical data for a symbol"""
         
         try:
-            # TODO: Implement real historical data fetching
-            return self._generate_historical_data(symbol, period)
+            series = self.get_history_range(symbol, period, start, end, max_points, method)
+            dates = np.datetime_as_string(series.time.astype('datetime64[s]'))
+            return {
+                'symbol': symbol,
+                'period': period,
+                'history': [
+                    {'date': d, 'price': p} for d, p in zip(dates.tolist(), series.column('close').tolist())
+                ]
+            }
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter dados históricos para {symbol}: {e}")
             return {'error': str(e)}
     
-    def get_economic_indicators(self) -> Dict[str, Any]:
-        """Get economic indicators from various sources"""
+    def get_historical_json(self, symbol: str, period: str = '1Y',
+                            start: Optional[Any] = None, end: Optional[Any] = None,
+                            max_points: Optional[int] = None, method: str = 'lttb') -> bytes:
+        """Columnar OHLCV JSON for [start, end), encoded straight from the stored arrays"""
+        return series_json(symbol, self.get_history_range(symbol, period, start, end, max_points, method))
+    
+    def stream_historical_data(self, symbols: List[str], period: str = '1Y',
+                               start: Optional[Any] = None, end: Optional[Any] = None,
+                               fmt: str = 'ndjson', chunk_rows: int = 4096) -> Iterator[bytes]:
+        """History of several symbols as NDJSON rows or one JSON array, chunk by chunk.
+
+        Symbols, bounds and the format are checked before anything is
+        yielded; each symbol's range is then loaded only when the stream
+        reaches it, so at most one series is held at a time.
+        """
+        if fmt not in ('ndjson', 'json'):
+            raise ValueError(f"Unknown stream format '{fmt}'")
+        if len(symbols) > self.MAX_EXPORT_SYMBOLS:
+            raise ValueError(f"At most {self.MAX_EXPORT_SYMBOLS} symbols per request")
+        symbols = [check_symbol(symbol) for symbol in symbols]
+        # Um único "agora" para todos os símbolos, mesmo que o stream demore
+        end = _epoch_seconds(end) if end is not None else int(time.time()) + 1
+        start = _epoch_seconds(start) if start is not None else None
+        
+        def generate() -> Iterator[bytes]:
+            first = True
+            if fmt == 'json':
+                yield b'['
+            for symbol in symbols:
+                series = self.get_history_range(symbol, period, start, end)
+                for rows in iter_series_rows(symbol, series, chunk_rows):
+                    if fmt == 'ndjson':
+                        yield b'\n'.join(dumps(row) for row in rows) + b'\n'
+                    else:
+                        yield (b'' if first else b',') + b','.join(dumps(row) for row in rows)
+                        first = False
+            if fmt == 'json':
+                yield b']'
+        
+        return generate()
+    
+    def get_history_range(self, symbol: str, period: str = '1Y',
+                          start: Optional[Any] = None, end: Optional[Any] = None,
+                          max_points: Optional[int] = None, method: str = 'lttb') -> OhlcvSeries:
+        """Rows with start <= time < end; start defaults to end minus the period.
+
+        start/end are epoch seconds or ISO date strings; end defaults to now.
+        With max_points, longer ranges are downsampled on the close price
+        ('lttb' or 'minmax', see services.downsampling).
+        """
+        series = self.history_store.get(symbol)
+        if series is None:
+            # Séries simuladas são baratas e determinísticas: não são gravadas,
+            # para que símbolos arbitrários não criem arquivos no store
+            series = self._simulated_history(symbol)
+        end_ts = _epoch_seconds(end) if end is not None else int(time.time()) + 1
+        if start is not None:
+            start_ts = _epoch_seconds(start)
+        else:
+            start_ts = end_ts - self.HISTORY_PERIODS.get(period, 7) * 86400
+        series = series.range(start_ts, end_ts)
+        if max_points is not None and len(series) > max_points:
+            series = series.take(downsample_indices(series.time, series.column('close'), max_points, method))
+        return series
+    
+    def get_historical_frame(self, symbol: str, period: str = '1Y') -> pd.DataFrame:
+        """Historical prices as a date-indexed DataFrame (cached as Arrow when a cache is set)"""
+        if self.cache is None:
+            return self._historical_frame(symbol, period)
+        return self.cache.get_or_set(
+            f"market:history:{symbol}:{period}",
+            lambda: self._historical_frame(symbol, period),
+            self.history_ttl,
+        )
+    
+    def _historical_frame(self, symbol: str, period: str) -> pd.DataFrame:
+        series = self.get_history_range(symbol, period)
+        index = pd.DatetimeIndex(series.time.astype('datetime64[s]').astype('datetime64[ns]'), name='date')
+        columns = {name: series.column(name) for name in ('open', 'high', 'low', 'close', 'volume')}
+        return pd.DataFrame({'price': columns['close'], **columns}, index=index)
+    
+    def get_economic_indicators(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Get economic indicators from various sources (a patch when ``since`` is a known version)"""
         
         try:
-            indicators = {
-                'timestamp': datetime.now().isoformat(),
-                'brazil': {
-                    'selic_rate': 11.75,
-                    'ipca_12m': 4.2,
-                    'ipca_monthly': 0.28,
-                    'gdp_growth': 2.8,
-                    'unemployment': 7.8,
-                    'fiscal_deficit': -5.2,
-                    'current_account': -2.1,
-                    'foreign_reserves': 356.8,  # USD billions
-                    'exchange_rate': self._simulate_price(5.20, 0.05)
-                },
-                'usa': {
-                    'fed_rate': 5.25,
-                    'cpi_12m': 3.1,
-                    'cpi_monthly': 0.2,
-                    'gdp_growth': 2.1,
-                    'unemployment': 3.7,
-                    'fiscal_deficit': -6.8,
-                    'consumer_confidence': 102.3,
-                    'pmi_manufacturing': 48.7,
-                    'pmi_services': 52.1
-                },
-                'europe': {
-                    'ecb_rate': 4.50,
-                    'cpi_12m': 2.4,
-                    'gdp_growth': 1.2,
-                    'unemployment': 6.4,
-                    'pmi_composite': 47.9
-                },
-                'china': {
-                    'pboc_rate': 3.45,
-                    'cpi_12m': 0.2,
-                    'gdp_growth': 4.5,
-                    'pmi_manufacturing': 49.2,
-                    'yuan_usd': 7.25
-                },
-                'global': {
-                    'world_gdp_growth': 3.0,
-                    'global_inflation': 2.9,
-                    'trade_growth': 2.8,
-                    'oil_price': self._simulate_price(85.2, 2.0),
-                    'gold_price': self._simulate_price(2000.5, 20.0),
-                    'copper_price': self._simulate_price(8500, 100),
-                    'vix': self._simulate_price(18.5, 2.0)
-                },
-                'market_sentiment': {
-                    'fear_greed_index': random.randint(20, 80),
-                    'risk_appetite': random.choice(['Risk-On', 'Risk-Off', 'Neutral']),
-                    'volatility_regime': random.choice(['Low', 'Normal', 'High']),
-                    'credit_spreads': 'Normal',
-                    'liquidity_conditions': 'Adequate'
-                }
-            }
-            
-            return indicators
+            return self._cached('indicators', since)
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter indicadores econômicos: {e}")
             return self._get_fallback_economic_data()
     
-    def get_sector_performance(self) -> Dict[str, Any]:
-        """Get sector performance data"""
+    def get_sector_performance(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Get sector performance data (a patch when ``since`` is a known version)"""
+        return self._cached('sectors', since)
+    
+    def get_currency_data(self) -> Dict[str, Any]:
+        """Get currency exchange rates and trends"""
+        return self._cached('currencies')
+    
+    def refresh_all(self) -> Dict[str, Any]:
+        """Fetch every provider-backed kind concurrently, caching each as it arrives"""
+        if self.providers is None:
+            return {}
+        return self.providers.fetch_sync(
+            [kind for kind in self._kinds.keys() if kind in self.providers.routes],
+            on_result=lambda kind, payload: self._kinds.entry(kind).put(payload))
+    
+    def _prefetch(self, kinds) -> None:
+        """Fetch cold provider-backed kinds in one concurrent round instead of one by one"""
+        if self.providers is None:
+            return
+        cold = [kind for kind in kinds if kind in self.providers.routes and not self._kinds.entry(kind).has_value]
+        if len(cold) > 1:
+            self.providers.fetch_sync(cold, on_result=lambda kind, payload: self._kinds.entry(kind).put(payload))
+    
+    def _source(self, kind: str, simulate):
+        """Fetch function for a kind: its providers when routed, else simulated data"""
+        def fetch() -> Dict[str, Any]:
+            if self.providers is None or kind not in self.providers.routes:
+                return simulate()
+            result = self.providers.fetch_sync([kind])
+            if kind not in result:
+                raise ProviderError(kind, result.get('errors', {}).get(kind, []))
+            return result[kind]
+        return fetch
+    
+    def _cached(self, kind: str, since: Optional[int] = None) -> Dict[str, Any]:
+        cached = self._kinds.get(kind)
+        # The cached dict is shared between requests; responses are shallow copies
+        return self._versions[kind].respond(cached.value, since, cache=self._cache_info(cached))
+    
+    def _cache_info(self, *parts: CachedValue) -> Dict[str, Any]:
+        """Age of the oldest part and whether any part is stale"""
+        return {
+            'age_seconds': round(max(cached.age for cached in parts), 3),
+            'stale': any(cached.stale for cached in parts)
+        }
+    
+    def _fetch_economic_indicators(self) -> Dict[str, Any]:
+        """Fetch economic indicators from various sources"""
+        
+        market = self.simulator.snapshot()
+        vix = round(100 * 1.15 * float(market.volatility[market.index['SP500']]), 2)
+        # Sentiment follows the simulated market: last month's IBOV move and the VIX level
+        fear_greed = int(np.clip(50 + 300 * market.change('IBOV', '1m') - 2 * (vix - 18.5), 0, 100))
+        
+        indicators = {
+            'timestamp': market.timestamp.isoformat(),
+            'brazil': {**MACRO_INDICATORS['brazil'], 'exchange_rate': market.price('USDBRL')},
+            'usa': MACRO_INDICATORS['usa'],
+            'europe': MACRO_INDICATORS['europe'],
+            'china': MACRO_INDICATORS['china'],
+            'global': {
+                **MACRO_INDICATORS['global'],
+                'oil_price': market.price('oil_brent'),
+                'gold_price': market.price('gold'),
+                'copper_price': market.price('copper'),
+                'vix': vix
+            },
+            'market_sentiment': {
+                'fear_greed_index': fear_greed,
+                'risk_appetite': 'Risk-On' if fear_greed > 60 else 'Risk-Off' if fear_greed < 40 else 'Neutral',
+                'volatility_regime': 'Low' if vix < 15 else 'Normal' if vix < 25 else 'High',
+                'credit_spreads': 'Normal',
+                'liquidity_conditions': 'Adequate'
+            }
+        }
+        
+        return indicators
+    
+    def _fetch_sector_performance(self) -> Dict[str, Any]:
+        """Fetch sector performance data"""
         
+        market = self.simulator.snapshot()
         sectors = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': market.timestamp.isoformat(),
             'brazilian_sectors': {
-                'financials': {
-                    'return_1d': self._simulate_return(),
-                    'return_1w': self._simulate_return(),
-                    'return_1m': self._simulate_return(),
-                    'return_ytd': self._simulate_return(),
-                    'top_stocks': ['ITUB3', 'BBDC4', 'BPAC11', 'SANB11']
-                },
-                'energy': {
-                    'return_1d': self._simulate_return(),
-                    'return_1w': self._simulate_return(),
-                    'return_1m': self._simulate_return(),
-                    'return_ytd': self._simulate_return(),
-                    'top_stocks': ['PETR4', 'PETR3', 'PRIO3', 'RRRP3']
-                },
-                'materials': {
-                    'return_1d': self._simulate_return(),
-                    'return_1w': self._simulate_return(),
-                    'return_1m': self._simulate_return(),
-                    'return_ytd': self._simulate_return(),
-                    'top_stocks': ['VALE3', 'CSNA3', 'GGBR4', 'USIM5']
-                },
-                'real_estate': {
-                    'return_1d': self._simulate_return(),
-                    'return_1w': self._simulate_return(),
-                    'return_1m': self._simulate_return(),
-                    'return_ytd': self._simulate_return(),
-                    'top_fiis': ['KNRI11', 'HGLG11', 'XPLG11', 'MXRF11']
+                sector: {
+                    **{f'return_{h}': market.change(sector, h) for h in ('1d', '1w', '1m', 'ytd')},
+                    **members
                 }
+                for sector, members in SECTOR_MEMBERS.items()
             }
         }
         
         return sectors
     
-    def get_currency_data(self) -> Dict[str, Any]:
-        """Get currency exchange rates and trends"""
+    def _fetch_currency_data(self) -> Dict[str, Any]:
+        """Fetch currency exchange rates and trends"""
         
+        market = self.simulator.snapshot()
         currencies = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': market.timestamp.isoformat(),
             'major_pairs': {
-                'USDBRL': {
-                    'rate': self._simulate_price(5.20, 0.05),
-                    'change_1d': self._simulate_return(),
-                    'change_1w': self._simulate_return(),
-                    'change_1m': self._simulate_return(),
-                    'volatility': random.uniform(0.08, 0.15)
-                },
-                'EURBRL': {
-                    'rate': self._simulate_price(5.65, 0.06),
-                    'change_1d': self._simulate_return(),
-                    'change_1w': self._simulate_return(),
-                    'change_1m': self._simulate_return(),
-                    'volatility': random.uniform(0.09, 0.16)
-                },
-                'GBPBRL': {
-                    'rate': self._simulate_price(6.45, 0.08),
-                    'change_1d': self._simulate_return(),
-                    'change_1w': self._simulate_return(),
-                    'change_1m': self._simulate_return(),
-                    'volatility': random.uniform(0.10, 0.18)
+                pair: {
+                    'rate': market.price(pair),
+                    **{f'change_{h}': market.change(pair, h) for h in ('1d', '1w', '1m')},
+                    'volatility': market.vol(pair)
                 }
+                for pair in ('USDBRL', 'EURBRL', 'GBPBRL')
             },
-            'emerging_markets': {
-                'USDMXN': self._simulate_price(17.2, 0.3),
-                'USDARS': self._simulate_price(850, 20),
-                'USDCOP': self._simulate_price(4200, 50),
-                'USDCLP': self._simulate_price(920, 15)
-            },
-            'crypto': {
-                'BTCUSD': self._simulate_price(45000, 1000),
-                'ETHUSD': self._simulate_price(2800, 100),
-                'BNBUSD': self._simulate_price(320, 15)
-            }
+            'emerging_markets': {pair: market.price(pair) for pair in ('USDMXN', 'USDARS', 'USDCOP', 'USDCLP')},
+            'crypto': {pair: market.price(pair) for pair in ('BTCUSD', 'ETHUSD', 'BNBUSD')}
         }
         
         return currencies
     
-    def _fetch_market_data(self) -> Dict[str, Any]:
-        """Fetch fresh market data from various sources"""
+    def _fetch_indices(self) -> Dict[str, Any]:
+        """Fetch fresh index quotes"""
         
         # TODO: Implement real API integrations
-        # For now, generate realistic simulated data
-        
-        market_data = {
-            'timestamp': datetime.now().isoformat(),
-            'last_update': datetime.now().isoformat(),
-            'data_quality': 'simulated',
-            
-            'indices': {
-                'IBOV': {'price': self._simulate_price(120000, 1000), 'change': self._simulate_return()},
-                'SP500': {'price': self._simulate_price(4500, 50), 'change': self._simulate_return()},
-                'NASDAQ': {'price': self._simulate_price(14000, 200), 'change': self._simulate_return()}
-            },
-            'currencies': self.get_currency_data(),
-            'commodities': {
-                'oil_brent': {'price': self._simulate_price(85, 2), 'change': self._simulate_return()},
-                'gold': {'price': self._simulate_price(2000, 20), 'change': self._simulate_return()},
-                'iron_ore': {'price': self._simulate_price(110, 5), 'change': self._simulate_return()}
-            }
-        }
-        
-        return market_data
+        # For now, read the simulated market (see MarketSimulator)
+        return self._quotes(('IBOV', 'SP500', 'NASDAQ'))
     
-    def _is_cache_valid(self) -> bool:
-        """Check if the cache is still valid"""
-        if not self._cached_data or not self.last_update:
-            return False
-        
-        age = (datetime.now() - self.last_update).total_seconds()
-        return age < self.cache_duration
-
-    def _simulate_price(self, base_price: float, volatility: float) -> float:
-        """Simulate a realistic price movement"""
-        return round(base_price + random.uniform(-volatility, volatility), 4)
-
-    def _simulate_return(self) -> float:
-        """Simulate a realistic daily return"""
-        return round(random.uniform(-0.03, 0.03), 4)
+    def _fetch_commodities(self) -> Dict[str, Any]:
+        """Fetch fresh commodity quotes"""
+        return self._quotes(('oil_brent', 'gold', 'iron_ore'))
+    
+    def _quotes(self, symbols) -> Dict[str, Any]:
+        """Price and daily change of simulated instruments, all from the same tick"""
+        market = self.simulator.snapshot()
+        return {symbol: {'price': market.price(symbol), 'change': market.change(symbol)} for symbol in symbols}
 
     def _get_fallback_data(self) -> Dict[str, Any]:
         """Return fallback data when real fetching fails"""
@@ -294,24 +451,30 @@ class MarketDataService:
             'status': 'fallback'
         }
 
-    def _generate_historical_data(self, symbol: str, period: str) -> Dict[str, Any]:
-        """Generate simulated historical data"""
-        # This is a placeholder implementation
-        end_date = datetime.now()
-        if period == '1Y':
-            start_date = end_date - timedelta(days=365)
-        elif period == '1M':
-            start_date = end_date - timedelta(days=30)
-        else:
-            start_date = end_date - timedelta(days=7)
-        
-        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
-        prices = [self._simulate_price(100, 5) + i * 0.1 for i, _ in enumerate(dates)]
+    def _simulated_history(self, symbol: str) -> OhlcvSeries:
+        """Simulated daily OHLCV bars up to today, the same for every call with the same symbol"""
+        # TODO: Implement real historical data fetching
+        days = self.SIMULATED_HISTORY_DAYS
+        today = int(time.time()) // 86400 * 86400
+        timestamps = today - np.arange(days - 1, -1, -1, dtype=np.int64) * 86400
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+        open_ = np.concatenate(([100.0], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.006, (2, days)))
+        return make_series(
+            timestamps,
+            open=np.round(open_, 4),
+            high=np.round(np.maximum(open_, close) * (1 + spread[0]), 4),
+            low=np.round(np.minimum(open_, close) * (1 - spread[1]), 4),
+            close=np.round(close, 4),
+            volume=rng.integers(100_000, 5_000_000, days).astype(np.float64),
+        )
 
-        return {
-            'symbol': symbol,
-            'period': period,
-            'history': [
-                {'date': d.isoformat(), 'price': p} for d, p in zip(dates, prices)
-            ]
-        }
+
+def _epoch_seconds(value: Any) -> int:
+    """Epoch seconds from an int/float or an ISO date(-time) string"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    if str(value).lstrip('-').isdigit():
+        return int(value)
+    return int(np.datetime64(str(value), 's').astype(np.int64))
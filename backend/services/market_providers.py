@@ -0,0 +1,191 @@
+# backend/services/market_providers.py
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed when providers are configured
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Provider:
+    """An upstream market data API."""
+    name: str
+    base_url: str
+    timeout: float = 2.0  # seconds, per request
+    headers: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)  # e.g. API keys
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Where one section comes from; ``transform`` maps the JSON body to the section payload."""
+    provider: Provider
+    path: str
+    params: Dict[str, str] = field(default_factory=dict)
+    transform: Optional[Callable[[Any], Any]] = None
+
+
+class ProviderError(Exception):
+    def __init__(self, section: str, errors: List[str]):
+        super().__init__(f"All providers failed for '{section}': {'; '.join(errors)}")
+        self.section = section
+        self.errors = errors
+
+
+class ProviderFanout:
+    """Fetches market data sections from HTTP providers concurrently.
+
+    - All sections are requested at once; results are handed out as they
+      arrive rather than after the slowest one.
+    - One pooled session (``max_connections``) is reused across fetches and
+      ``max_concurrency`` bounds requests in flight.
+    - Requests are hedged: when a request has not answered after
+      ``hedge_delay`` seconds, or fails, the next endpoint for the section is
+      tried (the same endpoint once more if there is only one) and the first
+      success wins; the losers are cancelled.
+    """
+
+    def __init__(self, routes: Dict[str, List[Endpoint]], max_connections: int = 20,
+                 max_concurrency: int = 8, hedge_delay: float = 0.25):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for market data providers")
+        self.routes = {section: list(endpoints) for section, endpoints in routes.items() if endpoints}
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.hedge_delay = hedge_delay
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    # --- async API ---
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _request(self, endpoint: Endpoint) -> Any:
+        session = await self._get_session()
+        provider = endpoint.provider
+        url = provider.base_url.rstrip('/') + '/' + endpoint.path.lstrip('/')
+        async with self._semaphore:
+            async with session.get(url, params={**provider.params, **endpoint.params},
+                                   headers=provider.headers,
+                                   timeout=aiohttp.ClientTimeout(total=provider.timeout)) as response:
+                response.raise_for_status()
+                body = await response.json(content_type=None)
+        return endpoint.transform(body) if endpoint.transform else body
+
+    async def fetch_section(self, section: str) -> Any:
+        """One section, hedged across its endpoints."""
+        endpoints = self.routes[section]
+        attempts = endpoints if len(endpoints) > 1 else endpoints * 2
+        remaining = list(attempts)
+        pending: Dict[asyncio.Task, Endpoint] = {}
+        errors: List[str] = []
+
+        def launch() -> None:
+            endpoint = remaining.pop(0)
+            pending[asyncio.ensure_future(self._request(endpoint))] = endpoint
+
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(list(pending), timeout=self.hedge_delay if remaining else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()  # hedge the slow request
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(f"{endpoint.provider.name}: {type(error).__name__} {error}".strip())
+                if not pending and remaining:
+                    launch()  # fail over immediately
+            raise ProviderError(section, errors)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, sections: Optional[Iterable[str]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Yields (section, payload or ProviderError) in completion order."""
+        sections = list(self.routes if sections is None else sections)
+
+        async def labelled(section: str) -> Tuple[str, Any]:
+            try:
+                return section, await self.fetch_section(section)
+            except ProviderError as e:
+                return section, e
+
+        for next_done in asyncio.as_completed([labelled(section) for section in sections]):
+            yield await next_done
+
+    async def fetch(self, sections: Optional[Iterable[str]] = None,
+                    on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """All sections merged into one dict; failures are listed under 'errors'.
+
+        ``on_result(section, payload)`` is called for each success as soon as
+        it arrives.
+        """
+        merged: Dict[str, Any] = {}
+        errors: Dict[str, List[str]] = {}
+        started = time.perf_counter()
+        async for section, payload in self.stream(sections):
+            if isinstance(payload, ProviderError):
+                logger.warning(str(payload))
+                errors[section] = payload.errors
+                continue
+            merged[section] = payload
+            if on_result is not None:
+                on_result(section, payload)
+        if errors:
+            merged['errors'] = errors
+        logger.debug(f"Fetched {len(merged)} sections in {time.perf_counter() - started:.3f}s")
+        return merged
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- sync API (for Flask request threads) ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # The session, its pooled connections and the semaphore belong to one
+        # long-lived loop thread, so keep-alive connections survive across calls.
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def fetch_sync(self, sections: Optional[Iterable[str]] = None,
+                   on_result: Optional[Callable[[str, Any], None]] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        future = asyncio.run_coroutine_threadsafe(self.fetch(sections, on_result), self._ensure_loop())
+        return future.result(timeout)
+
+    def close(self) -> None:
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join()
+            loop.close()
@@ -0,0 +1,236 @@
+# backend/services/market_simulator.py
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+TRADING_DAYS = 252
+# Trading days covered by each return horizon ('ytd' is computed per date)
+RETURN_HORIZONS = {'1d': 1, '1w': 5, '1m': 21}
+VOLATILITY_WINDOW = 21
+HISTORY_TICKS = TRADING_DAYS + 1
+# Share of the gap to the reference level closed per tick (a half-life of
+# about two months), which keeps prices in a realistic band however long
+# the simulation runs
+MEAN_REVERSION = 1 / 63
+_MAX_STEPS_PER_DRAW = 2048
+
+# Common factors behind the correlations between instruments
+FACTORS = ('brazil', 'global_equity', 'commodities', 'dollar', 'crypto')
+
+
+@dataclass(frozen=True)
+class Instrument:
+    symbol: str
+    price: float  # level at the start of the simulation, and the level prices revert to
+    volatility: float  # annualized
+    drift: float = 0.0  # annualized
+    loadings: Tuple[float, ...] = (0.0,) * len(FACTORS)  # on FACTORS; squares sum to at most 1
+
+
+DEFAULT_INSTRUMENTS = (
+    # Indices
+    Instrument('IBOV', 120000, 0.22, 0.08, (0.6, 0.45, 0.3, -0.3, 0.0)),
+    Instrument('SP500', 4500, 0.16, 0.07, (0.1, 0.9, 0.1, 0.0, 0.1)),
+    Instrument('NASDAQ', 14000, 0.22, 0.09, (0.1, 0.88, 0.05, 0.0, 0.2)),
+    # Commodities
+    Instrument('oil_brent', 85, 0.35, 0.0, (0.1, 0.3, 0.75, -0.2, 0.0)),
+    Instrument('gold', 2000, 0.15, 0.03, (0.0, 0.05, 0.4, -0.5, 0.1)),
+    Instrument('iron_ore', 110, 0.30, 0.0, (0.2, 0.2, 0.7, -0.15, 0.0)),
+    Instrument('copper', 8500, 0.22, 0.0, (0.1, 0.35, 0.7, -0.2, 0.0)),
+    # Currencies
+    Instrument('USDBRL', 5.20, 0.15, 0.02, (-0.6, -0.2, -0.2, 0.6, 0.0)),
+    Instrument('EURBRL', 5.65, 0.13, 0.02, (-0.55, -0.1, -0.15, 0.3, 0.0)),
+    Instrument('GBPBRL', 6.45, 0.14, 0.02, (-0.55, -0.1, -0.15, 0.3, 0.0)),
+    Instrument('USDMXN', 17.2, 0.12, 0.0, (-0.1, -0.3, -0.1, 0.6, 0.0)),
+    Instrument('USDARS', 850, 0.25, 0.6, (-0.1, -0.1, 0.0, 0.3, 0.0)),
+    Instrument('USDCOP', 4200, 0.14, 0.0, (0.0, -0.2, -0.4, 0.55, 0.0)),
+    Instrument('USDCLP', 920, 0.14, 0.0, (0.0, -0.2, -0.45, 0.55, 0.0)),
+    Instrument('BTCUSD', 45000, 0.60, 0.2, (0.0, 0.3, 0.0, -0.1, 0.85)),
+    Instrument('ETHUSD', 2800, 0.75, 0.2, (0.0, 0.3, 0.0, -0.1, 0.9)),
+    Instrument('BNBUSD', 320, 0.70, 0.1, (0.0, 0.25, 0.0, -0.1, 0.85)),
+    # Brazilian sector indices
+    Instrument('financials', 100, 0.25, 0.08, (0.8, 0.2, 0.0, -0.2, 0.0)),
+    Instrument('energy', 100, 0.30, 0.08, (0.55, 0.2, 0.6, -0.2, 0.0)),
+    Instrument('materials', 100, 0.28, 0.06, (0.5, 0.25, 0.65, -0.2, 0.0)),
+    Instrument('real_estate', 100, 0.18, 0.05, (0.7, 0.1, 0.0, -0.1, 0.0)),
+)
+
+
+def correlation_matrix(instruments: Sequence[Instrument]) -> np.ndarray:
+    """Factor-model correlations: loadings products off the diagonal, ones on it.
+
+    Each instrument's leftover variance (1 - sum of squared loadings) is
+    idiosyncratic, so the matrix is a valid correlation matrix whenever the
+    loadings' squares sum to at most 1.
+    """
+    loadings = np.array([instrument.loadings for instrument in instruments], dtype=np.float64)
+    if loadings.shape[1] != len(FACTORS):
+        raise ValueError(f"Loadings must have one entry per factor {FACTORS}")
+    too_large = [instrument.symbol for instrument, norm in zip(instruments, (loadings ** 2).sum(axis=1))
+                 if norm > 1 + 1e-12]
+    if too_large:
+        raise ValueError(f"Squared loadings sum to more than 1 for: {', '.join(too_large)}")
+    correlation = loadings @ loadings.T
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Prices, returns and volatilities of every instrument at one tick.
+
+    Arrays are read-only and indexed like ``symbols``.
+    """
+    tick: int
+    timestamp: datetime
+    symbols: Tuple[str, ...]
+    prices: np.ndarray
+    returns: Dict[str, np.ndarray]  # per RETURN_HORIZONS key and 'ytd'
+    volatility: np.ndarray  # annualized, over the last VOLATILITY_WINDOW ticks
+    index: Dict[str, int]
+
+    def price(self, symbol: str, ndigits: int = 4) -> float:
+        return round(float(self.prices[self.index[symbol]]), ndigits)
+
+    def change(self, symbol: str, horizon: str = '1d', ndigits: int = 4) -> float:
+        return round(float(self.returns[horizon][self.index[symbol]]), ndigits)
+
+    def vol(self, symbol: str, ndigits: int = 4) -> float:
+        return round(float(self.volatility[self.index[symbol]]), ndigits)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+class MarketSimulator:
+    """Correlated geometric Brownian motion for all simulated instruments.
+
+    Time is cut into ticks of ``tick_seconds`` counted from ``start``; each
+    tick is one simulated trading day. Every instrument moves at once: a
+    tick draws one vector of normals, correlates it through the Cholesky
+    factor of correlation_matrix() and adds the log returns to the latest
+    prices, after pulling them MEAN_REVERSION of the way back towards the
+    instruments' reference prices (an Ornstein-Uhlenbeck process in log
+    price), so a long-running server does not drift off to absurd levels.
+    The last HISTORY_TICKS log prices are kept in a ring buffer so
+    horizon returns and realized volatility are plain array lookups, and a
+    warm-up year is generated up front so they are defined from the start.
+
+    Ticks are only generated when a snapshot asks for them, so a given
+    ``seed`` yields the same prices for a given tick whenever it is read.
+    The snapshot for the current tick is built once and shared, so every
+    section served during a tick agrees.
+    """
+
+    def __init__(self, instruments: Sequence[Instrument] = DEFAULT_INSTRUMENTS, seed: int = 0,
+                 tick_seconds: float = 30.0, clock: Callable[[], float] = time.time,
+                 start: Optional[float] = None):
+        self.instruments = tuple(instruments)
+        self.symbols = tuple(instrument.symbol for instrument in self.instruments)
+        self.seed = seed
+        self.tick_seconds = tick_seconds
+        self._clock = clock
+        self.start = clock() // tick_seconds * tick_seconds if start is None else start
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        dt = 1.0 / TRADING_DAYS
+        volatility = np.array([instrument.volatility for instrument in self.instruments])
+        drift = np.array([instrument.drift for instrument in self.instruments])
+        cholesky = np.linalg.cholesky(correlation_matrix(self.instruments))
+        # One tick's log returns: _drift + z @ _scale.T for z ~ N(0, I)
+        self._scale = (volatility * np.sqrt(dt))[:, None] * cholesky
+        self._drift = (drift - 0.5 * volatility ** 2) * dt
+        self._anchor = np.log([instrument.price for instrument in self.instruments])
+        self._rng = np.random.default_rng(seed)
+
+        # Warm-up history ending at the instruments' start prices.
+        path = self._walk(self._anchor, self._steps(HISTORY_TICKS - 1))
+        path = np.vstack((self._anchor, path))
+        self._history = self._anchor + path - path[-1]  # ring buffer of log prices
+        self._head = HISTORY_TICKS - 1  # row of the latest tick
+        self._tick = 0
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._lock = threading.Lock()
+
+    def _steps(self, count: int) -> np.ndarray:
+        z = self._rng.standard_normal((count, len(self.symbols)))
+        # Row-wise products and sums rather than a BLAS matmul, whose rounding
+        # can depend on how many rows are multiplied at once.
+        return self._drift + (z[:, None, :] * self._scale).sum(axis=2)
+
+    def _walk(self, start: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        """Log prices after each of ``steps``, starting from ``start``."""
+        path = np.empty_like(steps)
+        latest = start
+        # One tick at a time, so the result is identical however many ticks
+        # are generated per call.
+        for i, step in enumerate(steps):
+            latest = latest + MEAN_REVERSION * (self._anchor - latest) + step
+            path[i] = latest
+        return path
+
+    def current_tick(self) -> int:
+        return max(int((self._clock() - self.start) // self.tick_seconds), 0)
+
+    def _advance(self, ticks: int) -> None:
+        while ticks > 0:
+            count = min(ticks, _MAX_STEPS_PER_DRAW)
+            path = self._walk(self._history[self._head], self._steps(count))
+            rows = (self._head + 1 + np.arange(count)) % HISTORY_TICKS
+            keep = slice(max(count - HISTORY_TICKS, 0), count)
+            self._history[rows[keep]] = path[keep]
+            self._head = int(rows[-1])
+            self._tick += count
+            ticks -= count
+
+    def snapshot(self, tick: Optional[int] = None) -> MarketSnapshot:
+        """The market at ``tick`` (default: the current tick).
+
+        Past ticks are not kept: asking for one raises ValueError. Without
+        an explicit tick, a thread that read the clock just before another
+        one advanced the market gets the latest snapshot instead.
+        """
+        explicit = tick is not None
+        tick = tick if explicit else self.current_tick()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.tick == tick:
+            return snapshot
+        with self._lock:
+            if tick < self._tick:
+                if explicit:
+                    raise ValueError(f"Tick {tick} is in the past (now at {self._tick})")
+                tick = self._tick
+            if self._snapshot is None or self._snapshot.tick != tick:
+                self._advance(tick - self._tick)
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _lagged(self, ticks: int) -> np.ndarray:
+        return self._history[(self._head - ticks) % HISTORY_TICKS]
+
+    def _build_snapshot(self) -> MarketSnapshot:
+        timestamp = datetime.fromtimestamp(self.start + self._tick * self.tick_seconds)
+        latest = self._history[self._head]
+        year_start = np.datetime64(f"{timestamp.year}-01-01")
+        ytd_ticks = int(np.busday_count(year_start, np.datetime64(timestamp.date())))
+        horizons = {**RETURN_HORIZONS, 'ytd': min(max(ytd_ticks, 1), HISTORY_TICKS - 1)}
+        returns = {name: _read_only(np.expm1(latest - self._lagged(ticks))) for name, ticks in horizons.items()}
+
+        window = self._history[(self._head - np.arange(VOLATILITY_WINDOW, -1, -1)) % HISTORY_TICKS]
+        volatility = np.diff(window, axis=0).std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+        return MarketSnapshot(
+            tick=self._tick,
+            timestamp=timestamp,
+            symbols=self.symbols,
+            prices=_read_only(np.exp(latest)),
+            returns=returns,
+            volatility=_read_only(volatility),
+            index=self._index,
+        )
@@ -0,0 +1,75 @@
+# backend/services/performance_rollups.py
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.serialization import chart_series_json, date_labels
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FREQUENCY = 'monthly'
+
+# freq -> (resample rule, label unit). Daily keeps one point per calendar day
+# that has data instead of emitting a null for every weekend.
+ROLLUP_FREQUENCIES: Dict[str, Tuple[Optional[str], str]] = {
+    'daily': (None, 'D'),
+    'weekly': ('W', 'D'),
+    'monthly': ('ME', 'M'),
+    'quarterly': ('QE', 'Q'),
+    'yearly': ('YE', 'Y'),
+}
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """One encoded chart series and the ETag of its bytes."""
+    payload: bytes
+    etag: str
+
+
+class PerformanceRollups:
+    """Chart payloads for every (frequency, series) pair of a wealth frame.
+
+    Everything is resampled and encoded up front, so serving a request is a
+    dictionary lookup. ETags are content hashes: a workbook reload that does
+    not change a series keeps its ETag, and clients keep getting 304s.
+    """
+
+    def __init__(self, rollups: Dict[Tuple[str, str], Rollup]):
+        self._rollups = rollups
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, columns: Iterable[str]) -> 'PerformanceRollups':
+        columns = [col for col in columns if col in frame.columns]
+        numeric = frame[columns].apply(pd.to_numeric, errors='coerce')
+        rollups = {}
+        for freq, (rule, unit) in ROLLUP_FREQUENCIES.items():
+            if rule is None:
+                resampled = numeric.groupby(numeric.index.normalize()).last()
+            else:
+                resampled = numeric.resample(rule).last()
+            labels = _labels(resampled.index, unit)
+            for col in columns:
+                values = resampled[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                payload = chart_series_json(labels, values)
+                rollups[(freq, col)] = Rollup(payload=payload, etag=hashlib.blake2b(payload, digest_size=12).hexdigest())
+        logger.info(f"Built {len(rollups)} performance rollups for {len(frame)} rows")
+        return cls(rollups)
+
+    def get(self, freq: str, series: str) -> Optional[Rollup]:
+        return self._rollups.get((freq, series))
+
+    @property
+    def series(self) -> list:
+        return sorted({series for _, series in self._rollups})
+
+
+def _labels(index: pd.DatetimeIndex, unit: str) -> np.ndarray:
+    if unit == 'Q':
+        return np.array([f"{year}-Q{quarter}" for year, quarter in zip(index.year, index.quarter)], dtype=object)
+    return date_labels(index, unit)
@@ -0,0 +1,252 @@
+# backend/services/quote_broadcaster.py
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def sse_message(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """One Server-Sent Events message with a JSON ``data`` line."""
+    head = f"id: {event_id}\nevent: {event}\n" if event_id is not None else f"event: {event}\n"
+    return head.encode() + b'data: ' + dumps(data) + b'\n\n'
+
+
+class _Topic:
+    """Subscribers sharing one symbol set, and the deltas encoded for them."""
+
+    def __init__(self, symbols: FrozenSet[str], backlog: int):
+        self.symbols = symbols
+        self.cond = threading.Condition(threading.Lock())
+        self.log: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self.evicted = 0  # newest version dropped from the log
+        self.subscribers = 0
+
+    def append(self, version: int, message: bytes) -> None:
+        with self.cond:
+            if len(self.log) == self.log.maxlen:
+                self.evicted = self.log[0][0]
+            self.log.append((version, message))
+            self.cond.notify_all()
+
+
+class Subscription:
+    """One client's view of a QuoteBroadcaster topic.
+
+    ``events()`` is the SSE body: a snapshot of the subscribed symbols, then
+    deltas as they are published, with keep-alive comments in between.
+    ``poll()``/``wait()`` return the pending messages directly.
+    """
+
+    def __init__(self, broadcaster: 'QuoteBroadcaster', topic: _Topic):
+        self.broadcaster = broadcaster
+        self.topic = topic
+        self.symbols = topic.symbols
+        self.closed = False
+        self._seen = 0
+        self._snapshot: Optional[bytes] = self._resync()
+
+    def _resync(self) -> bytes:
+        version, quotes = self.broadcaster.state()
+        self._seen = version
+        return sse_message('snapshot', {
+            'version': version,
+            'quotes': {s: quotes[s] for s in sorted(self.symbols) if s in quotes},
+        }, version)
+
+    def _ready(self) -> bool:
+        log = self.topic.log
+        return (self.closed or self.broadcaster.stopped or self._snapshot is not None
+                or (bool(log) and log[-1][0] > self._seen))
+
+    def _take(self) -> List[bytes]:
+        # Called with topic.cond held.
+        if self._snapshot is not None:
+            messages, self._snapshot = [self._snapshot], None
+            return messages
+        if self._seen < self.topic.evicted:
+            return [self._resync()]  # fell behind the backlog
+        messages = []
+        for version, message in reversed(self.topic.log):
+            if version <= self._seen:
+                break
+            messages.append(message)
+        if messages:
+            self._seen = self.topic.log[-1][0]
+            messages.reverse()
+        return messages
+
+    def poll(self) -> List[bytes]:
+        """Pending messages, without waiting."""
+        with self.topic.cond:
+            return self._take()
+
+    def wait(self, timeout: Optional[float] = None) -> List[bytes]:
+        """Pending messages, waiting up to ``timeout`` seconds for one."""
+        with self.topic.cond:
+            self.topic.cond.wait_for(self._ready, timeout)
+            return [] if self.closed or self.broadcaster.stopped else self._take()
+
+    def events(self) -> Iterator[bytes]:
+        try:
+            while not self.closed and not self.broadcaster.stopped:
+                messages = self.wait(self.broadcaster.heartbeat)
+                if messages:
+                    yield b''.join(messages)
+                elif not self.closed and not self.broadcaster.stopped:
+                    yield KEEPALIVE
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        with self.topic.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.topic.cond.notify_all()
+        self.broadcaster._unsubscribe(self.topic)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class QuoteBroadcaster:
+    """Pushes quote changes to subscribed clients from a single refresh loop.
+
+    - ``fetch()`` returns {symbol: quote}. It runs on one background thread
+      every ``interval`` seconds while anyone is subscribed, however many
+      clients are connected.
+    - Only the symbols whose quote changed are published, and each client
+      gets the part of that delta covering its own symbols.
+    - Clients subscribed to the same symbol set share a topic: a delta is
+      encoded once per topic and its waiting clients are woken with one
+      notify_all, so the cost of a broadcast grows with the number of
+      distinct subscriptions rather than with connections.
+    - A client more than ``backlog`` deltas behind gets a new snapshot
+      instead of the deltas it missed.
+    """
+
+    def __init__(self, fetch: Callable[[], Dict[str, Any]], interval: float = 1.0,
+                 heartbeat: float = 15.0, backlog: int = 64):
+        self.fetch = fetch
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.backlog = backlog
+        # (version, {symbol: quote}); replaced as one tuple, never mutated
+        self._state: Tuple[int, Dict[str, Any]] = (0, {})
+        self._topics: Dict[FrozenSet[str], _Topic] = {}
+        self._subscribers = 0
+        self._lock = threading.Lock()
+        self._publish_lock = threading.RLock()  # keeps deltas in version order
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def state(self) -> Tuple[int, Dict[str, Any]]:
+        return self._state
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    @property
+    def topic_count(self) -> int:
+        return len(self._topics)
+
+    def publish(self, quotes: Dict[str, Any]) -> int:
+        """Record new quotes and push what changed; returns the topics notified."""
+        with self._publish_lock:
+            return self._publish(quotes)
+
+    def _publish(self, quotes: Dict[str, Any]) -> int:
+        with self._lock:
+            version, current = self._state
+            changed = {s: q for s, q in quotes.items() if current.get(s) != q}
+            if not changed:
+                return 0
+            version += 1
+            self._state = (version, {**current, **changed})
+            topics = list(self._topics.values())
+
+        notified = 0
+        for topic in topics:
+            if len(changed) <= len(topic.symbols):
+                symbols = [s for s in changed if s in topic.symbols]
+            else:
+                symbols = [s for s in topic.symbols if s in changed]
+            if symbols:
+                delta = {s: changed[s] for s in sorted(symbols)}
+                topic.append(version, sse_message('delta', {'version': version, 'quotes': delta}, version))
+                notified += 1
+        return notified
+
+    def refresh(self) -> int:
+        """Fetch once and publish the changes."""
+        with self._publish_lock:
+            return self.publish(self.fetch())
+
+    def subscribe(self, symbols: Iterable[str]) -> Subscription:
+        """A subscription to ``symbols``; raises ValueError for unknown ones."""
+        symbols = frozenset(symbols)
+        if not symbols:
+            raise ValueError("Provide at least one symbol")
+        if self._state[0] == 0:
+            with self._publish_lock:
+                if self._state[0] == 0:
+                    self.publish(self.fetch())
+        unknown = symbols - self._state[1].keys()
+        if unknown:
+            raise ValueError(f"Unknown symbols: {', '.join(sorted(unknown))}")
+
+        with self._lock:
+            topic = self._topics.get(symbols)
+            if topic is None:
+                topic = self._topics[symbols] = _Topic(symbols, self.backlog)
+            topic.subscribers += 1
+            self._subscribers += 1
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name='quote-broadcaster', daemon=True)
+                self._thread.start()
+        return Subscription(self, topic)
+
+    def _unsubscribe(self, topic: _Topic) -> None:
+        with self._lock:
+            topic.subscribers -= 1
+            self._subscribers -= 1
+            if topic.subscribers == 0 and self._topics.get(topic.symbols) is topic:
+                del self._topics[topic.symbols]
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if self._subscribers == 0:
+                    self._thread = None  # restarted by the next subscribe()
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Quote refresh failed: {e}")
+
+    def stop(self) -> None:
+        """Stop the refresh loop and end every open subscription."""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+            topics = list(self._topics.values())
+        if thread is not None:
+            thread.join()
+        for topic in topics:
+            with topic.cond:
+                topic.cond.notify_all()
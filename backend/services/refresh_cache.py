@@ -0,0 +1,138 @@
+# backend/services/refresh_cache.py
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def spawn_daemon(task: Callable[[], None]) -> None:
+    threading.Thread(target=task, daemon=True).start()
+
+
+@dataclass(frozen=True)
+class CachedValue:
+    value: Any
+    age: float
+    stale: bool
+
+
+class RefreshingValue:
+    """One cached value with stale-while-revalidate and refresh-ahead.
+
+    - Younger than ``refresh_ahead * ttl``: served as is.
+    - Past that point: still served, and one background refresh starts, so
+      a busy value is normally replaced before it ever expires.
+    - Past ``ttl`` (stale): served immediately while the refresh runs, up
+      to ``max_stale`` seconds old; beyond that callers wait for a fetch.
+
+    Each fetch gets its TTL scaled by a random factor in ``1 +- jitter`` so
+    workers that started together do not all expire at the same moment.
+    Only the first caller with nothing usable fetches synchronously; the
+    others wait for its result.
+    """
+
+    def __init__(self, fetch: Callable[[], Any], ttl: float, refresh_ahead: float = 0.8,
+                 jitter: float = 0.1, max_stale: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 spawn: Callable[[Callable[[], None]], None] = spawn_daemon):
+        if not 0 < refresh_ahead <= 1:
+            raise ValueError("refresh_ahead must be in (0, 1]")
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
+        self.max_stale = 10 * ttl if max_stale is None else max_stale
+        self._clock = clock
+        self._spawn = spawn
+        self._lock = threading.Lock()  # held by synchronous fetches
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        # (value, fetched_at, expires_in), swapped as one tuple so lock-free
+        # readers never pair a value with another fetch's timestamps.
+        self._entry: Optional[Tuple[Any, float, float]] = None
+
+    def _usable(self, entry: Optional[Tuple[Any, float, float]], now: float) -> bool:
+        return entry is not None and now - entry[1] < entry[2] + self.max_stale
+
+    def get(self) -> CachedValue:
+        entry, now = self._entry, self._clock()
+        if self._usable(entry, now):
+            value, fetched_at, expires_in = entry
+            age = now - fetched_at
+            if age >= self.refresh_ahead * expires_in:
+                self._start_refresh()
+            return CachedValue(value, age, age >= expires_in)
+
+        with self._lock:
+            # Someone else may have fetched while we waited for the lock.
+            if not self._usable(self._entry, self._clock()):
+                self._store(self.fetch())
+            value, fetched_at, expires_in = self._entry
+            return CachedValue(value, self._clock() - fetched_at, False)
+
+    @property
+    def has_value(self) -> bool:
+        return self._entry is not None
+
+    def put(self, value: Any) -> None:
+        """Store a value fetched elsewhere (e.g. in a batch with other keys)."""
+        self._store(value)
+
+    def _store(self, value: Any) -> None:
+        expires_in = self.ttl * (1 + random.uniform(-self.jitter, self.jitter))
+        self._entry = (value, self._clock(), expires_in)
+
+    def _start_refresh(self) -> None:
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._spawn(self._refresh)
+
+    def _refresh(self) -> None:
+        try:
+            self._store(self.fetch())
+        except Exception as e:
+            logger.error(f"Background refresh failed: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+
+
+class RefreshingCache:
+    """A RefreshingValue per key, each with its own locks.
+
+    A slow fetch for one key never blocks reads or fetches of another;
+    the shared lock is only taken to create an entry the first time.
+    """
+
+    def __init__(self, fetchers: Dict[str, Callable[[], Any]], ttl: float,
+                 ttls: Optional[Dict[str, float]] = None, **options):
+        self._fetchers = dict(fetchers)
+        self._ttls = {key: (ttls or {}).get(key, ttl) for key in self._fetchers}
+        self._options = options
+        self._entries: Dict[str, RefreshingValue] = {}
+        self._lock = threading.Lock()
+
+    def keys(self) -> List[str]:
+        return list(self._fetchers)
+
+    def entry(self, key: str) -> RefreshingValue:
+        entry = self._entries.get(key)
+        if entry is None:
+            if key not in self._fetchers:
+                raise KeyError(key)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = RefreshingValue(
+                        self._fetchers[key], self._ttls[key], **self._options)
+        return entry
+
+    def get(self, key: str) -> CachedValue:
+        return self.entry(key).get()
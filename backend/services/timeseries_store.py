@@ -0,0 +1,198 @@
+# backend/services/timeseries_store.py
+
+import json
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# File layout: 16-byte header (magic + row count), then the int64 epoch
+# seconds, then one contiguous float64 block per OHLCV column.
+_MAGIC = b'OHLCV01\0'
+_HEADER = struct.Struct('<8sq')
+_SYMBOL_PATTERN = re.compile(r'^[A-Za-z0-9^._=-]{1,32}$')
+
+
+@dataclass(frozen=True)
+class OhlcvSeries:
+    """Columnar OHLCV rows sorted by time (epoch seconds). Arrays are read-only."""
+    time: np.ndarray
+    values: np.ndarray  # (5, n): one contiguous row per OHLCV column
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[OHLCV_COLUMNS.index(name)]
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> 'OhlcvSeries':
+        """Rows with start <= time < end, as views (two binary searches)."""
+        lo = 0 if start is None else int(np.searchsorted(self.time, start, side='left'))
+        hi = len(self.time) if end is None else int(np.searchsorted(self.time, end, side='left'))
+        hi = max(lo, hi)
+        return OhlcvSeries(self.time[lo:hi], self.values[:, lo:hi])
+
+    def take(self, indices: np.ndarray) -> 'OhlcvSeries':
+        """The rows at ``indices`` (sorted), as a new series."""
+        return OhlcvSeries(_read_only(self.time[indices]), _read_only(np.ascontiguousarray(self.values[:, indices])))
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+def check_symbol(symbol: str) -> str:
+    if not _SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f"Invalid symbol '{symbol}'")
+    return symbol
+
+
+def make_series(time: np.ndarray, **columns: np.ndarray) -> OhlcvSeries:
+    """Validated series from a time array and the five OHLCV columns."""
+    time = np.ascontiguousarray(time, dtype=np.int64)
+    missing = set(OHLCV_COLUMNS) - set(columns)
+    if missing:
+        raise ValueError(f"Missing columns: {sorted(missing)}")
+    values = np.ascontiguousarray(np.vstack([np.asarray(columns[c], dtype=np.float64) for c in OHLCV_COLUMNS]))
+    if values.shape[1] != len(time):
+        raise ValueError("Columns and time must have the same length")
+    if len(time) > 1 and not (np.diff(time) > 0).all():
+        raise ValueError("time must be strictly increasing")
+    return OhlcvSeries(_read_only(time), _read_only(values))
+
+
+class TimeSeriesStore:
+    """Per-symbol OHLCV series, persisted as memory-mapped column files.
+
+    Without a ``root`` directory series live in memory only. Files are
+    replaced atomically, and a series is re-mapped when its file changes,
+    so several worker processes can share one directory.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        if root:
+            os.makedirs(root, exist_ok=True)
+        self._series: Dict[str, Tuple[Optional[Tuple[int, int]], OhlcvSeries]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{check_symbol(symbol)}.ohlcv")
+
+    def get(self, symbol: str) -> Optional[OhlcvSeries]:
+        check_symbol(symbol)
+        if not self.root:
+            entry = self._series.get(symbol)
+            return entry[1] if entry else None
+        path = self._path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self._series.get(symbol)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        series = _map_file(path)
+        with self._lock:
+            self._series[symbol] = (signature, series)
+        return series
+
+    def range(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[OhlcvSeries]:
+        series = self.get(symbol)
+        return series.range(start, end) if series is not None else None
+
+    def write(self, symbol: str, series: OhlcvSeries) -> None:
+        """Replace a symbol's series."""
+        check_symbol(symbol)
+        if not self.root:
+            with self._lock:
+                self._series[symbol] = (None, series)
+            return
+        path = self._path(symbol)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, len(series)))
+                f.write(series.time.astype('<i8', copy=False).tobytes())
+                f.write(series.values.astype('<f8', copy=False).tobytes())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            self._series.pop(symbol, None)
+
+    def append(self, symbol: str, series: OhlcvSeries) -> None:
+        """Add rows; existing rows at or after the first new timestamp are replaced."""
+        existing = self.get(symbol)
+        if existing is None or not len(existing):
+            self.write(symbol, series)
+            return
+        if len(series):
+            keep = existing.range(end=int(series.time[0]))
+            series = OhlcvSeries(_read_only(np.concatenate((keep.time, series.time))),
+                                 _read_only(np.concatenate((keep.values, series.values), axis=1)))
+        self.write(symbol, series)
+
+
+def _map_file(path: str) -> OhlcvSeries:
+    with open(path, 'rb') as f:
+        magic, rows = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not an OHLCV store file")
+    if rows == 0:
+        return OhlcvSeries(_read_only(np.zeros(0, dtype=np.int64)), _read_only(np.zeros((len(OHLCV_COLUMNS), 0))))
+    time = np.memmap(path, dtype='<i8', mode='r', offset=_HEADER.size, shape=(rows,))
+    values = np.memmap(path, dtype='<f8', mode='r', offset=_HEADER.size + 8 * rows,
+                       shape=(len(OHLCV_COLUMNS), rows))
+    return OhlcvSeries(time, values)
+
+
+def series_json(symbol: str, series: OhlcvSeries) -> bytes:
+    """Columnar JSON ({"symbol", "time": [...], "open": [...], ...}) straight from the arrays.
+
+    NaN prices (missing bars) become null.
+    """
+    if orjson is not None and np.isfinite(series.values).all():
+        # np.asarray drops the np.memmap subclass (a view, no copy), which orjson rejects.
+        columns = {name: np.asarray(series.values[i]) for i, name in enumerate(OHLCV_COLUMNS)}
+        return orjson.dumps({'symbol': symbol, 'time': np.asarray(series.time), **columns},
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    cells = series.values.astype(object)
+    cells[~np.isfinite(series.values)] = None
+    payload = {'symbol': symbol, 'time': series.time.tolist(),
+               **{name: cells[i].tolist() for i, name in enumerate(OHLCV_COLUMNS)}}
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+def _row_records(symbol: str, series: OhlcvSeries):
+    cells = series.values.astype(object)
+    cells[~np.isfinite(series.values)] = None
+    return [
+        {'symbol': symbol, 'time': t, **dict(zip(OHLCV_COLUMNS, row))}
+        for t, row in zip(series.time.tolist(), cells.T.tolist())
+    ]
+
+
+def iter_series_rows(symbol: str, series: OhlcvSeries, chunk_rows: int = 4096) -> Iterator[list]:
+    """Row dicts ({"symbol", "time", "open", ...}) in chunks of ``chunk_rows``.
+
+    Only one chunk is materialized at a time, so memory stays flat however
+    long the (memory-mapped) series is.
+    """
+    for lo in range(0, len(series), chunk_rows):
+        hi = min(lo + chunk_rows, len(series))
+        yield _row_records(symbol, OhlcvSeries(series.time[lo:hi], series.values[:, lo:hi]))
@@ -0,0 +1,118 @@
+# backend/services/versioned_snapshots.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# Top-level keys that change on every refresh without saying anything about the data
+VOLATILE_KEYS = ('timestamp', 'cache')
+
+
+def _pointer(path: str, key: str) -> str:
+    """RFC 6901 JSON pointer for ``key`` under ``path``."""
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def json_patch(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """RFC 6902 operations turning ``old`` into ``new``.
+
+    Objects are compared key by key, so only changed leaves are replaced;
+    anything else (numbers, strings, lists) is replaced whole when it differs.
+    """
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        ops = [{'op': 'remove', 'path': _pointer(path, key)} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': _pointer(path, key), 'value': value})
+            elif old[key] is not value:
+                ops.extend(json_patch(old[key], value, _pointer(path, key)))
+        return ops
+    if old != new or type(old) is not type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+    return []
+
+
+def _content(document: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in document.items() if key not in VOLATILE_KEYS}
+
+
+class SnapshotHistory:
+    """Versions of one document, and patches between them.
+
+    ``update()`` assigns a new version only when the content (everything but
+    VOLATILE_KEYS) changed. Versions increase monotonically and are derived
+    from the clock in milliseconds, so version numbers from different
+    processes practically never collide: a client sent to a process that
+    does not hold its version gets a full snapshot rather than a wrong patch.
+    The last ``max_versions`` documents are kept to patch from.
+    """
+
+    def __init__(self, max_versions: int = 32, clock: Callable[[], float] = time.time):
+        self.max_versions = max_versions
+        self._clock = clock
+        self._versions: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._latest: Optional[Tuple[int, Mapping[str, Any]]] = None  # (version, source document)
+        # since -> (latest version, patch to it); replaced whenever a version is added
+        self._patches: Dict[int, Tuple[int, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._latest[0] if self._latest else None
+
+    def update(self, document: Mapping[str, Any]) -> int:
+        """Version of ``document``, recording it if its content is new."""
+        latest = self._latest
+        if latest is not None and latest[1] is document:
+            return latest[0]  # the same cached object: nothing to compare
+        with self._lock:
+            if self._latest is not None:
+                version, source = self._latest
+                if not json_patch(self._versions[version], _content(document)):
+                    self._latest = (version, document)
+                    return version
+                version = max(version + 1, int(self._clock() * 1000))
+            else:
+                version = int(self._clock() * 1000) or 1
+            self._versions[version] = _content(document)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+            self._patches = {}
+            self._latest = (version, document)
+            return version
+
+    def patch_since(self, since: int) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """(latest version, patch from version ``since`` to it), or None when ``since`` is unknown."""
+        cached = self._patches.get(since)
+        if cached is not None:
+            return cached
+        with self._lock:
+            base = self._versions.get(since)
+            if base is None or self._latest is None:
+                return None
+            version = self._latest[0]
+            cached = self._patches[since] = (version, json_patch(base, self._versions[version]))
+            return cached
+
+    def respond(self, document: Mapping[str, Any], since: Optional[int] = None, **extra: Any) -> Dict[str, Any]:
+        """``document`` with its version, or a patch when ``since`` is a known version.
+
+        Patch responses are {'version', 'since', 'patch', ...volatile keys};
+        full responses are the document plus 'version'. ``extra`` keys are
+        added to either. Pass the same (cached) document object while it is
+        current, so unchanged documents are recognised without comparing.
+        """
+        version = self.update(document)
+        if since is not None:
+            found = self.patch_since(since)
+            if found is not None:
+                version, patch = found
+                return {
+                    'version': version,
+                    'since': since,
+                    'patch': patch,
+                    **{key: document[key] for key in VOLATILE_KEYS if key in document},
+                    **extra
+                }
+        return {**document, **extra, 'version': version}
@@ -0,0 +1,235 @@
+# backend/services/wealth_data.py
+
+import os
+import glob
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover - the sidecar cache is optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+WEALTH_SHEET_NAME = 'Construção de Patrimônio'
+HOLDING_COLUMNS = ['BB', 'NUBANK', 'CEF']
+
+
+def parse_wealth_workbook(file_path: str) -> pd.DataFrame:
+    """
+    Parses the wealth spreadsheet into a Date-indexed frame with zero-filled
+    numeric columns.
+    """
+    df = pd.read_excel(file_path, sheet_name=WEALTH_SHEET_NAME, header=2)
+    df.rename(columns={df.columns[0]: 'Date'}, inplace=True)
+    df.dropna(subset=['Date'], inplace=True)
+    df['Date'] = pd.to_datetime(df['Date'])
+    df.set_index('Date', inplace=True)
+    numeric_cols = df.select_dtypes(include='number').columns
+    df[numeric_cols] = df[numeric_cols].fillna(0)
+    return df
+
+
+def read_wealth_workbook(file_path: str) -> pd.DataFrame:
+    """
+    Reads and processes the wealth spreadsheet.
+    """
+    return parse_wealth_workbook(file_path).replace({np.nan: None})
+
+
+def load_wealth_workbook(file_path: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Reads the wealth spreadsheet through an Arrow IPC sidecar file.
+
+    The parsed frame is written next to the workbook (or into ``cache_dir``)
+    under a name keyed by a hash of the workbook bytes. Later loads, from any
+    worker process, memory-map the sidecar instead of parsing the .xlsx.
+    Falls back to parsing the workbook when pyarrow is not installed or the
+    sidecar cannot be read or written.
+    """
+    if pa is None:
+        return read_wealth_workbook(file_path)
+
+    sidecar_path = _sidecar_path(file_path, cache_dir, _file_digest(file_path))
+    if os.path.exists(sidecar_path):
+        try:
+            return _read_sidecar(sidecar_path).replace({np.nan: None})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable wealth sidecar {sidecar_path}: {e}")
+
+    df = parse_wealth_workbook(file_path)
+    try:
+        _write_sidecar(df, sidecar_path)
+        _remove_stale_sidecars(file_path, cache_dir, keep=sidecar_path)
+    except Exception as e:
+        logger.warning(f"Could not write wealth sidecar {sidecar_path}: {e}")
+    return df.replace({np.nan: None})
+
+
+def _file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _sidecar_dir(file_path: str, cache_dir: Optional[str]) -> str:
+    return cache_dir or os.path.dirname(os.path.abspath(file_path))
+
+
+def _sidecar_path(file_path: str, cache_dir: Optional[str], digest: str) -> str:
+    return os.path.join(_sidecar_dir(file_path, cache_dir), f".{os.path.basename(file_path)}.{digest}.arrow")
+
+
+def _read_sidecar(sidecar_path: str) -> pd.DataFrame:
+    with pa.memory_map(sidecar_path, 'r') as source:
+        table = pa_ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar_path: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    # Write to a private temp file and rename so concurrent workers only ever
+    # see a complete sidecar.
+    tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, sidecar_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _remove_stale_sidecars(file_path: str, cache_dir: Optional[str], keep: str) -> None:
+    pattern = os.path.join(glob.escape(_sidecar_dir(file_path, cache_dir)),
+                           glob.escape(f".{os.path.basename(file_path)}.") + '*.arrow')
+    for path in glob.glob(pattern):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@dataclass(frozen=True)
+class WealthSnapshot:
+    """An immutable, fully built view of the wealth spreadsheet.
+
+    The frame is shared by every request that holds this snapshot and must
+    be treated as read-only.
+    """
+    frame: pd.DataFrame
+    generation: int
+    loaded_at: float
+    load_duration: float
+    source_mtime_ns: int
+    source_size: int
+    _derived: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _derived_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @property
+    def signature(self) -> Tuple[int, int]:
+        return self.source_mtime_ns, self.source_size
+
+    def derive(self, key: str, factory: Callable[[pd.DataFrame], Any]) -> Any:
+        """Compute ``factory(frame)`` once for this snapshot and memoize it.
+
+        Derived values live and die with the snapshot, so a reload of the
+        workbook invalidates them without any extra bookkeeping.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self.frame)
+            return self._derived[key]
+
+
+class WealthDataStore:
+    """Process-wide holder of the parsed wealth spreadsheet.
+
+    The workbook is parsed once and only re-read when its mtime or size
+    changes. A reload builds a complete new snapshot before publishing it with
+    a single reference swap, so readers never observe a half-built frame.
+    """
+
+    def __init__(self, file_path: str,
+                 loader: Callable[[str], pd.DataFrame] = load_wealth_workbook):
+        self.file_path = file_path
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot: Optional[WealthSnapshot] = None
+        self._failed_signature: Optional[Tuple[int, int]] = None
+
+    @property
+    def generation(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.generation if snapshot is not None else 0
+
+    def get(self) -> Optional[WealthSnapshot]:
+        """Return the current snapshot, reloading first if the file changed.
+
+        Returns the last good snapshot (or None if none was ever loaded) when
+        the file is missing or cannot be parsed.
+        """
+        snapshot = self._snapshot
+        try:
+            stat = os.stat(self.file_path)
+        except OSError as e:
+            logger.error(f"Error reading wealth spreadsheet: {e}")
+            return snapshot
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._is_current(snapshot, signature):
+            return snapshot
+
+        with self._lock:
+            # Another thread may have finished the reload while we waited.
+            snapshot = self._snapshot
+            if self._is_current(snapshot, signature):
+                return snapshot
+            return self._reload(signature)
+
+    def _is_current(self, snapshot: Optional[WealthSnapshot], signature: Tuple[int, int]) -> bool:
+        if snapshot is not None and snapshot.signature == signature:
+            return True
+        # Don't re-parse a file that already failed until it changes again.
+        return signature == self._failed_signature
+
+    def _reload(self, signature: Tuple[int, int]) -> Optional[WealthSnapshot]:
+        started = time.perf_counter()
+        try:
+            frame = self._loader(self.file_path)
+        except Exception as e:
+            logger.error(f"ERRO ao processar a planilha: {e}")
+            self._failed_signature = signature
+            return self._snapshot
+
+        previous = self._snapshot
+        snapshot = WealthSnapshot(
+            frame=frame,
+            generation=(previous.generation if previous is not None else 0) + 1,
+            loaded_at=time.time(),
+            load_duration=time.perf_counter() - started,
+            source_mtime_ns=signature[0],
+            source_size=signature[1],
+        )
+        self._snapshot = snapshot
+        self._failed_signature = None
+        logger.info(f"Wealth spreadsheet loaded (generation {snapshot.generation}, "
+                    f"{len(frame)} rows, {snapshot.load_duration:.3f}s)")
+        return snapshot
@@ -0,0 +1,36 @@
+# backend/tests/conftest.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.wealth_data import WEALTH_SHEET_NAME
+
+
+def write_wealth_workbook(path, periods=90, start='2023-01-01', freq='D', seed=0):
+    """Writes a small workbook laid out like the real wealth spreadsheet."""
+    rng = np.random.default_rng(seed)
+    holdings = {
+        col: 1000 * np.cumprod(1 + rng.normal(0.0005, 0.01, periods))
+        for col in ('BB', 'NUBANK', 'CEF')
+    }
+    df = pd.DataFrame({'Data': pd.date_range(start, periods=periods, freq=freq), **holdings})
+    df['Riqueza'] = df[['BB', 'NUBANK', 'CEF']].sum(axis=1)
+    save_wealth_workbook(path, df)
+    return df
+
+
+def save_wealth_workbook(path, df):
+    df.to_excel(path, sheet_name=WEALTH_SHEET_NAME, startrow=2, index=False)
+
+
+@pytest.fixture
+def wealth_file(tmp_path):
+    path = tmp_path / 'wealth.xlsx'
+    write_wealth_workbook(path)
+    return str(path)
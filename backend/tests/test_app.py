@@ -2,6 +2,7 @@
 
 import pytest
 from app import create_app
+from conftest import save_wealth_workbook, write_wealth_workbook
 
 def test_app_creation():
     """
@@ -9,3 +10,51 @@ def test_app_creation():
     """
     app = create_app()
     assert app is not None
+
+
+def test_endpoints_share_one_snapshot(wealth_file):
+    app = create_app(wealth_file)
+    client = app.test_client()
+
+    assert client.get('/api/performance').status_code == 200
+    metrics = client.get('/api/portfolio/metrics').get_json()
+    assert metrics['var95'] > 0
+    assert metrics['volatility'] > 0
+    assert metrics['beta'] is None  # the workbook has no benchmark column
+
+    status = client.get('/api/data/status').get_json()
+    assert status['generation'] == 1
+    assert status['rows'] == 90
+
+
+def test_monte_carlo_endpoint_is_seeded(wealth_file):
+    client = create_app(wealth_file).test_client()
+
+    first = client.get('/api/portfolio/monte-carlo?paths=20000&seed=1').get_json()
+    second = client.get('/api/portfolio/monte-carlo?paths=20000&seed=1').get_json()
+
+    assert first == second
+    assert first['cvar95'] >= first['var95'] > 0
+    assert sum(first['weights'].values()) == pytest.approx(1, abs=1e-3)
+    for query in ('paths=0', 'paths=1', 'seed=-1', 'horizon=100000000&paths=10', 'horizon=0'):
+        assert client.get(f'/api/portfolio/monte-carlo?{query}').status_code == 400, query
+
+
+def test_monte_carlo_skips_closed_positions(tmp_path):
+    path = tmp_path / 'wealth.xlsx'
+    df = write_wealth_workbook(path)
+    df['CEF'] = 0.0
+    df['Riqueza'] = df[['BB', 'NUBANK']].sum(axis=1)
+    save_wealth_workbook(path, df)
+    client = create_app(str(path)).test_client()
+
+    response = client.get('/api/portfolio/monte-carlo?paths=20000&seed=1')
+    assert response.status_code == 200
+    assert set(response.get_json()['weights']) == {'BB', 'NUBANK'}
+
+
+def test_optimize_endpoint(wealth_file):
+    client = create_app(wealth_file).test_client()
+    result = client.get('/api/portfolio/optimize?risk_tolerance=7&horizon=medium&goal=income').get_json()
+    assert result['status'] == 'optimized'
+    assert result['recommended_allocation']['KNRI11'] >= 0.2 - 1e-4
@@ -0,0 +1,122 @@
+# backend/tests/test_batch_analytics.py
+
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app import create_app
+from models.batch_analytics import BatchPortfolioAnalytics, asset_assumptions
+from services.account_holdings import AccountHoldingsRepository, pivot_holdings
+
+SYMBOLS = ['PETR4', 'ITUB3', 'BIDI4', 'KNRI11', 'CASH', 'WEGE3']
+
+
+def create_holdings_db(path, accounts=50, seed=0):
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE portfolio_holdings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_number TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            average_price REAL NOT NULL,
+            total_invested REAL NOT NULL,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(account_number, symbol)
+        )
+    ''')
+    rows = []
+    for a in range(accounts):
+        for symbol in rng.choice(SYMBOLS, size=rng.integers(1, len(SYMBOLS) + 1), replace=False):
+            quantity = int(rng.integers(1, 500))
+            price = float(rng.uniform(5, 100))
+            rows.append((f"{a:06d}", str(symbol), quantity, price, quantity * price))
+    conn.executemany('INSERT INTO portfolio_holdings (account_number, symbol, quantity, average_price, '
+                     'total_invested) VALUES (?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def holdings_db(tmp_path):
+    path = tmp_path / 'transactions.db'
+    create_holdings_db(path)
+    return str(path)
+
+
+def test_pivot_stacks_rows_per_account():
+    rows = [('2', 'PETR4', 10, 100.0), ('1', 'CASH', 1, 50.0), ('2', 'CASH', 1, 25.0)]
+    batch = pivot_holdings(['1', '2', '3'], rows, prices={'PETR4': 12.0})
+
+    assert batch.accounts == ['1', '2'] and batch.missing == ['3']
+    assert batch.symbols == ['CASH', 'PETR4']
+    assert batch.values.tolist() == [[50.0, 0.0], [25.0, 120.0]]
+
+
+def test_batch_matches_per_account_computation():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0, 1000, (200, len(SYMBOLS)))
+    metrics = BatchPortfolioAnalytics().compute(SYMBOLS, values)
+    mean, covariance = asset_assumptions(SYMBOLS)
+
+    for i in (0, 57, 199):
+        w = values[i] / values[i].sum()
+        assert metrics['expected_return'][i] == pytest.approx(w @ mean)
+        assert metrics['volatility'][i] == pytest.approx(np.sqrt(w @ covariance @ w))
+    assert np.linalg.eigvalsh(covariance)[0] > -1e-12
+    assert {'var_95', 'var_99'} <= set(metrics)
+
+
+def test_batch_stress_matches_scenario_engine():
+    analytics = BatchPortfolioAnalytics()
+    values = np.array([[1000.0, 0, 0, 0, 500.0, 200.0]])
+    metrics = analytics.compute(SYMBOLS, values)
+    single = analytics.scenario_engine.run_scenarios(dict(zip(SYMBOLS, values[0])))
+
+    assert metrics['worst_scenario_pnl'][0] == pytest.approx(single['worst']['pnl'])
+
+
+def test_repository_batches_whole_book(holdings_db):
+    repository = AccountHoldingsRepository(holdings_db)
+    batches = list(repository.iter_batches(batch_size=16))
+
+    assert [len(b.accounts) for b in batches] == [16, 16, 16, 2]
+    assert sum(len(b.accounts) for b in batches) == len(repository.account_numbers())
+
+
+def test_batch_endpoint_streams_ndjson(holdings_db, wealth_file, monkeypatch):
+    monkeypatch.setenv('HOLDINGS_DB_FILE', holdings_db)
+    client = create_app(wealth_file).test_client()
+
+    response = client.post('/api/portfolio/batch-metrics', json={'all': True, 'batch_size': 7})
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == 50
+    assert {'account', 'totalValue', 'volatility', 'var95', 'worstScenario'} <= set(records[0])
+
+    some = client.post('/api/portfolio/batch-metrics', json={'accounts': ['000003', 'missing']})
+    lines = [json.loads(line) for line in some.get_data(as_text=True).splitlines()]
+    assert lines[0]['account'] == 'missing' and 'error' in lines[0]
+    assert lines[1] == records[3]
+
+    assert client.post('/api/portfolio/batch-metrics', json={}).status_code == 400
+    priced = client.post('/api/portfolio/batch-metrics', json={'accounts': ['000003'], 'prices': {'PETR4': 30}})
+    assert priced.status_code == 200 and 'error' not in json.loads(priced.get_data(as_text=True))
+    for prices in ([30], {'PETR4': 'abc'}, {'PETR4': None}, {'PETR4': True}, {'PETR4': -1}):
+        response = client.post('/api/portfolio/batch-metrics', json={'all': True, 'prices': prices})
+        assert response.status_code == 400, prices
+
+
+def test_batch_endpoint_reports_an_unavailable_database(wealth_file, tmp_path, monkeypatch):
+    not_a_db = tmp_path / 'broken.db'
+    not_a_db.write_bytes(b'not sqlite')
+    for path in (tmp_path / 'missing.db', not_a_db):
+        monkeypatch.setenv('HOLDINGS_DB_FILE', str(path))
+        client = create_app(wealth_file).test_client()
+        for body in ({'all': True}, {'accounts': ['000001']}):
+            response = client.post('/api/portfolio/batch-metrics', json=body)
+            assert response.status_code == 503 and 'error' in response.get_json()
@@ -0,0 +1,96 @@
+# backend/tests/test_cache_codecs.py
+
+import json
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.cache_codecs import MAGIC, CodecRegistry, JsonCodec, MsgpackCodec
+from services.cache_service import CacheService, InMemoryRedis
+from services.market_data import MarketDataService
+
+
+def test_codec_is_chosen_by_value_type():
+    registry = CodecRegistry()
+    assert registry.encode({'a': 1})[:2] == MAGIC + b'o'
+    assert registry.encode({1: b'raw'})[:2] == MAGIC + b'm'
+    assert registry.encode(pd.DataFrame({'x': [1.0]}))[:2] == MAGIC + b'f'
+    assert registry.encode(np.zeros(3))[:2] == MAGIC + b'a'
+
+
+@pytest.mark.parametrize('value', [
+    {'selic': 11.75, 'sectors': [{'name': 'Bancos', 'return': -0.4}]},
+    {1: b'\x00\x01', 'nested': [1, 'two', None]},
+    'plain string',
+])
+def test_round_trip(value):
+    registry = CodecRegistry()
+    assert registry.decode(registry.encode(value)) == value
+
+
+def test_values_orjson_would_change_fall_through_to_msgpack():
+    registry = CodecRegistry()
+    value = {'a': float('nan'), 'b': [1.0, float('inf')], 'ok': None}
+    encoded = registry.encode(value)
+    assert encoded[:2] == MAGIC + b'm'
+    decoded = registry.decode(encoded)
+    assert np.isnan(decoded['a']) and decoded['b'] == [1.0, float('inf')] and decoded['ok'] is None
+
+    stamped = {'at': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), 'day': date(2024, 1, 2),
+               'local': datetime(2024, 1, 2, 9, 30)}
+    assert registry.encode(stamped)[:2] == MAGIC + b'm'
+    assert registry.decode(registry.encode(stamped)) == stamped
+    assert registry.encode({'a': None})[:2] == MAGIC + b'o'
+
+
+def test_bool_arrays_round_trip():
+    registry = CodecRegistry()
+    array = np.array([[True, False], [False, True]])
+    encoded = registry.encode(array)
+    assert encoded[:2] == MAGIC + b'a'
+    decoded = registry.decode(encoded)
+    assert decoded.dtype == bool and not decoded.flags.writeable
+    np.testing.assert_array_equal(decoded, array)
+
+
+def test_arrays_round_trip_without_copy():
+    registry = CodecRegistry()
+    array = np.arange(12, dtype=np.float64).reshape(3, 4)
+    decoded = registry.decode(registry.encode(array))
+
+    assert decoded.dtype == array.dtype and decoded.shape == (3, 4)
+    np.testing.assert_array_equal(decoded, array)
+    assert not decoded.flags.writeable
+
+
+def test_frames_keep_index_and_dtypes():
+    frame = pd.DataFrame({'price': [1.5, 2.5], 'volume': [10, 20]},
+                         index=pd.DatetimeIndex(['2024-01-01', '2024-01-02'], name='date'))
+    registry = CodecRegistry()
+    pd.testing.assert_frame_equal(registry.decode(registry.encode(frame)), frame)
+
+
+def test_values_without_header_are_read_as_json():
+    registry = CodecRegistry()
+    assert registry.decode(json.dumps({'a': [1, 2]}).encode()) == {'a': [1, 2]}
+    assert registry.decode('{"a": 1}') == {'a': 1}
+
+
+def test_restricted_registry_still_reads_every_tag():
+    writer = CodecRegistry([MsgpackCodec(), JsonCodec()])
+    encoded = writer.encode({'a': 1})
+    assert encoded[:2] == MAGIC + b'm'
+    assert CodecRegistry().decode(encoded) == {'a': 1}
+
+
+def test_historical_frame_round_trips_through_redis():
+    redis = InMemoryRedis()
+    writer = MarketDataService(cache=CacheService(redis))
+    frame = writer.get_historical_frame('PETR4', '1Y')
+
+    reader = MarketDataService(cache=CacheService(redis))
+    pd.testing.assert_frame_equal(reader.get_historical_frame('PETR4', '1Y'), frame, check_freq=False)
+    assert redis.get('market:history:PETR4:1Y')[:2] == MAGIC + b'f'
+    assert reader.get_historical_data('PETR4', '1Y')['history'][0]['price'] == frame['price'].iloc[0]
@@ -0,0 +1,142 @@
+# backend/tests/test_cache_service.py
+
+import threading
+import time
+
+import pytest
+
+from services.cache_service import CacheService, InMemoryRedis, LocalCache
+
+
+def test_local_cache_is_bounded_lru_with_expiry():
+    now = [0.0]
+    cache = LocalCache(max_entries=2, clock=lambda: now[0])
+    cache.set('a', 1, ttl=10)
+    cache.set('b', 2, ttl=1)
+    cache.get('a')
+    cache.set('c', 3, ttl=10)
+
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    now[0] = 5
+    assert cache.get('a') == 1
+    now[0] = 11
+    assert cache.get('a') != 1
+
+
+def test_hot_keys_are_served_from_the_local_tier():
+    redis = InMemoryRedis()
+    cache = CacheService(redis)
+    cache.set('indicators', {'selic': 11.75}, ttl=60)
+
+    for _ in range(10):
+        assert cache.get('indicators') == {'selic': 11.75}
+    assert redis.round_trips == 1  # the setex
+    stats = cache.get_stats()
+    assert stats['local']['hits'] == 10
+
+
+def test_redis_hits_fill_the_local_tier():
+    redis = InMemoryRedis()
+    CacheService(redis).set('k', [1, 2], ttl=60)
+    cache = CacheService(redis)
+
+    assert cache.get('k') == [1, 2]
+    assert cache.get('k') == [1, 2]
+    assert redis.round_trips == 2  # setex + one get
+    assert cache.get('missing') is None
+    stats = cache.get_stats()
+    assert (stats['redis']['hits'], stats['redis']['misses']) == (1, 1)
+
+
+def test_delete_clears_both_tiers():
+    redis = InMemoryRedis()
+    cache = CacheService(redis)
+    cache.set('k', 1, ttl=60)
+    cache.delete('k')
+    assert cache.get('k') is None
+
+
+def test_concurrent_misses_compute_once():
+    cache = CacheService(InMemoryRedis())
+    calls = []
+    start = threading.Barrier(16)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'value': 42}
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_set('sectors', compute, ttl=60))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{'value': 42}] * 16
+    assert cache.get_stats()['load']['misses'] == 1
+
+
+def test_failed_load_propagates_to_waiters_and_is_not_cached():
+    cache = CacheService(None)
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_set('k', fail, ttl=60)
+    assert cache.get_or_set('k', lambda: 'ok', ttl=60) == 'ok'
+    assert cache.get('k') == 'ok'
+
+
+def test_in_memory_redis_expires_keys():
+    now = [0.0]
+    redis = InMemoryRedis(clock=lambda: now[0])
+    redis.setex('a', 10, 'x')
+    assert redis.get('a') == b'x'
+    now[0] = 10
+    assert redis.get('a') is None
+    with pytest.raises(ValueError):
+        redis.setex('b', 0, 'x')
+
+
+def test_get_many_uses_one_round_trip_for_local_misses():
+    redis = InMemoryRedis()
+    CacheService(redis).set_many({'indicators': {'selic': 11.75}, 'sectors': [1, 2], 'fx': {'usd': 5.0}}, ttl=60)
+    cache = CacheService(redis)
+    cache.set('fx', {'usd': 5.1}, ttl=60)
+    before = redis.round_trips
+
+    found = cache.get_many(['indicators', 'sectors', 'fx', 'missing'])
+    assert found == {'indicators': {'selic': 11.75}, 'sectors': [1, 2], 'fx': {'usd': 5.1}}
+    assert redis.round_trips == before + 1
+    stats = cache.get_stats()
+    assert (stats['redis']['hits'], stats['redis']['misses']) == (2, 1)
+
+    cache.get_many(['indicators', 'sectors'])
+    assert redis.round_trips == before + 1
+
+
+def test_set_many_applies_per_key_ttls_in_one_round_trip():
+    now = [0.0]
+    redis = InMemoryRedis(clock=lambda: now[0])
+    cache = CacheService(redis, local_ttl=0)
+    cache.set_many({'quote': 1, 'history': 2}, ttl={'quote': 5, 'history': 300})
+    assert redis.round_trips == 1
+
+    now[0] = 10
+    assert cache.get_many(['quote', 'history']) == {'history': 2}
+
+
+def test_bulk_operations_without_redis_use_the_local_tier():
+    cache = CacheService(None)
+    cache.set_many({'a': 1, 'b': 2}, ttl=60)
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2}
@@ -0,0 +1,114 @@
+# backend/tests/test_covariance_service.py
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import create_app
+from conftest import save_wealth_workbook, write_wealth_workbook
+from services.covariance_service import CovarianceService, EwmaCovariance, RollingCovariance
+
+SYMBOLS = ('BB', 'NUBANK', 'CEF')
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(3)
+    mix = np.array([[1.0, 0.0, 0.0], [0.6, 0.8, 0.0], [0.3, 0.2, 0.9]])
+    return rng.normal(0, 0.01, (1000, 3)) @ mix.T
+
+
+def test_rolling_matches_window_recompute(returns):
+    rolling = RollingCovariance(3, window=100)
+    for i, x in enumerate(returns):
+        rolling.update(x)
+        if i in (1, 57, 99, 100, 543, 999):
+            window = returns[max(0, i - 99):i + 1]
+            assert np.allclose(rolling.covariance(), np.cov(window, rowvar=False), atol=1e-14)
+            assert np.allclose(rolling.mean, window.mean(axis=0))
+
+
+def test_ewma_matches_weighted_recompute(returns):
+    ewma = EwmaCovariance(3, decay=0.9)
+    mean = returns[0].copy()
+    cov = np.zeros((3, 3))
+    for x in returns[:200]:
+        ewma.update(x)
+    for x in returns[1:200]:
+        delta = x - mean
+        mean = mean + 0.1 * delta
+        cov = 0.9 * (cov + 0.1 * np.outer(delta, delta))
+    assert np.allclose(ewma.covariance(), cov)
+
+
+def test_snapshots_are_read_only_and_versioned(returns):
+    service = CovarianceService(window=50)
+    service.update(SYMBOLS, returns[:60])
+    first = service.snapshot(SYMBOLS)
+
+    with pytest.raises(ValueError):
+        first.covariance[0, 0] = 1.0
+    assert service.snapshot(SYMBOLS) is first
+    assert first.observations == 50
+    assert np.allclose(np.diag(first.correlation), 1)
+
+    service.update(SYMBOLS, returns[60])
+    assert service.snapshot(SYMBOLS).version == first.version + 1
+    assert service.snapshot(('OTHER',)) is None
+
+
+def test_sync_only_feeds_new_rows(returns):
+    index = pd.bdate_range('2020-01-01', periods=len(returns))
+    incremental = CovarianceService(window=100)
+    for end in (10, 400, 1000):
+        incremental.sync(SYMBOLS, index[:end], returns[:end])
+    single = CovarianceService(window=100)
+    single.sync(SYMBOLS, index, returns)
+
+    for kind in CovarianceService.KINDS:
+        assert np.allclose(incremental.snapshot(SYMBOLS, kind).covariance, single.snapshot(SYMBOLS, kind).covariance)
+    assert incremental.snapshot(SYMBOLS).version == 3
+
+
+def test_sync_rebuilds_when_consumed_rows_are_corrected():
+    returns = np.random.default_rng(4).normal(0, 0.01, (300, len(SYMBOLS)))
+    index = pd.bdate_range('2020-01-01', periods=len(returns))
+    service = CovarianceService(window=100)
+    service.sync(SYMBOLS, index[:250], returns[:250])
+    corrected = returns.copy()
+    corrected[240] *= 5
+    service.sync(SYMBOLS, index, corrected)
+
+    reference = CovarianceService(window=100)
+    reference.sync(SYMBOLS, index, corrected)
+    for kind in CovarianceService.KINDS:
+        assert np.allclose(service.snapshot(SYMBOLS, kind).covariance, reference.snapshot(SYMBOLS, kind).covariance)
+
+
+def test_covariance_endpoint(wealth_file):
+    client = create_app(wealth_file).test_client()
+    data = client.get('/api/portfolio/covariance?kind=ewma').get_json()
+    assert data['symbols'] == list(SYMBOLS)
+    assert data['observations'] == 89
+    assert np.allclose(np.diag(data['correlation']), 1)
+    assert client.get('/api/portfolio/covariance?kind=garch').status_code == 400
+
+
+def test_covariance_endpoint_leaves_out_closed_positions(tmp_path):
+    path = tmp_path / 'wealth.xlsx'
+    df = write_wealth_workbook(path)
+    df['CEF'] = 0.0
+    save_wealth_workbook(path, df)
+    client = create_app(str(path)).test_client()
+
+    response = client.get('/api/portfolio/covariance')
+    assert response.status_code == 200
+    data = json.loads(response.data, parse_constant=lambda constant: pytest.fail(f"invalid JSON {constant}"))
+    assert data['symbols'] == ['BB', 'NUBANK'] and data['observations'] == 89
+    assert np.isfinite(data['covariance']).all()
+
+    df[['BB', 'NUBANK']] = 0.0
+    save_wealth_workbook(path, df)
+    assert create_app(str(path)).test_client().get('/api/portfolio/covariance').status_code == 422
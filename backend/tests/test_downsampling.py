@@ -0,0 +1,85 @@
+# backend/tests/test_downsampling.py
+
+import numpy as np
+import pytest
+
+from app import create_app
+from services.downsampling import downsample_indices, lttb_indices, minmax_indices
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward LTTB as published, one bucket at a time."""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    picks = [0]
+    a = 0
+    for i in range(threshold - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, n)
+        if i == threshold - 3:
+            nlo, nhi = n - 1, n
+        avg_x, avg_y = np.mean(x[nlo:nhi]), np.mean(y[nlo:nhi])
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picks.append(best)
+        a = best
+    picks.append(n - 1)
+    return np.array(picks)
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=1000))
+    np.testing.assert_array_equal(lttb_indices(x, y, 100), reference_lttb(x, y, 100))
+
+
+def test_lttb_keeps_spikes_and_endpoints():
+    y = np.zeros(10_000)
+    y[4321] = 50.0
+    picks = lttb_indices(np.arange(10_000), y, 200)
+
+    assert len(picks) == 200
+    assert picks[0] == 0 and picks[-1] == 9999
+    assert 4321 in picks
+    assert (np.diff(picks) > 0).all()
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=10_000)
+    y[[10, 20]] = np.nan
+    picks = minmax_indices(y, 100)
+
+    assert len(picks) <= 100 and (np.diff(picks) > 0).all()
+    assert np.nanargmax(y) in picks and np.nanargmin(y) in picks
+    assert not np.isnan(y[picks]).any()
+
+
+def test_minmax_never_exceeds_max_points():
+    y = np.random.default_rng(2).normal(size=1000)
+    for max_points in (1, 2, 3, 50, 999):
+        assert len(minmax_indices(y, max_points)) <= max_points
+    assert minmax_indices(y, 1).tolist() == [999]
+
+
+def test_short_series_are_returned_whole():
+    assert downsample_indices(np.arange(5), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        downsample_indices(np.arange(5), np.arange(5.0), 3, method='average')
+
+
+def test_history_endpoint_downsamples(wealth_file):
+    client = create_app(wealth_file).test_client()
+    full = client.get('/api/market/history/VALE3?period=5Y').get_json()
+    small = client.get('/api/market/history/VALE3?period=5Y&max_points=300').get_json()
+    minmax = client.get('/api/market/history/VALE3?period=5Y&max_points=300&method=minmax').get_json()
+
+    assert len(small['time']) == 300
+    assert small['time'][0] == full['time'][0] and small['time'][-1] == full['time'][-1]
+    assert max(minmax['close']) == max(full['close'])
+    assert client.get('/api/market/history/VALE3?max_points=10&method=bogus').status_code == 400
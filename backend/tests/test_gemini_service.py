@@ -0,0 +1,176 @@
+# backend/tests/test_gemini_service.py
+
+import json
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from services.cache_service import CacheService, LocalCache
+from services.gemini_service import GeminiService, context_hash, normalize_query
+from services.llm_client import LLMClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    # The API calls are replaced below, so the client never connects
+    service = GeminiService(client=LLMClient('http://127.0.0.1:9', 'test', 'gemini-2.5-pro'))
+    calls = []
+
+    def slow_api(prompt, context=None):
+        calls.append(prompt)
+        time.sleep(0.05)
+        return f"resposta {len(calls)}"
+    service._call_gemini_api = slow_api
+    service.calls = calls
+    return service
+
+
+def test_keys_ignore_formatting_and_context_key_order():
+    assert normalize_query('  Qual o  RISCO?\n') == normalize_query('qual o risco')
+    assert context_hash({'a': 1, 'b': {'c': [1, 2]}}) == context_hash({'b': {'c': [1, 2]}, 'a': 1})
+    assert context_hash({'a': 1}) != context_hash({'a': 2})
+
+
+def test_repeated_questions_are_served_from_cache(service):
+    context = {'portfolio': {'total_value': 100}}
+    first = service.get_analysis('Qual o risco?', context)
+    assert service.get_analysis('qual o   risco', {'portfolio': {'total_value': 100}}) == first
+    assert service.get_analysis('Qual o risco?', {'portfolio': {'total_value': 200}}) != first
+    assert len(service.calls) == 2
+
+    stats = service.get_cache_stats()
+    assert stats['requests'] == 3 and stats['hits'] == 1 and stats['upstream_calls'] == 2
+    assert stats['hit_ratio'] == pytest.approx(1 / 3)
+    assert stats['avg_upstream_ms'] >= 50
+    assert stats['saved_seconds'] > 0.04
+
+
+def test_simultaneous_identical_questions_share_one_call(service):
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(service.get_analysis('Diversificação?', {})))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(service.calls) == 1 and len(set(answers)) == 1
+    stats = service.get_cache_stats()
+    assert stats['upstream_calls'] == 1 and stats['hits'] + stats['coalesced'] == 7
+
+
+def test_entries_expire_and_are_evicted(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    clock = Clock()
+    cache = CacheService(None)
+    cache.local = LocalCache(max_entries=2, clock=clock)
+    service = GeminiService(cache=cache, cache_ttl=60)
+    calls = []
+    service._call_gemini_api = lambda prompt, context=None: calls.append(prompt) or 'ok'
+
+    service.get_analysis('a', {})
+    service.get_analysis('a', {})
+    assert len(calls) == 1
+    clock.now = 61
+    service.get_analysis('a', {})
+    assert len(calls) == 2
+
+    service.get_analysis('b', {})
+    service.get_analysis('c', {})  # evicts 'a', the least recently used
+    service.get_analysis('a', {})
+    assert len(calls) == 5
+
+
+def test_failures_are_not_cached(service):
+    def failing(prompt, context=None):
+        raise RuntimeError('upstream down')
+    original, service._call_gemini_api = service._call_gemini_api, failing
+    assert 'dificuldades' in service.get_analysis('Qual o risco?', {})
+    service._call_gemini_api = original
+    assert service.get_analysis('Qual o risco?', {}) == 'resposta 1'
+    assert service.get_cache_stats()['errors'] == 1
+
+
+def delayed_stream(chunks, first_delay=0.0, delay=0.0):
+    """Stand-in for the streaming API: yields ``chunks`` after the given delays."""
+    def stream(prompt, context=None):
+        time.sleep(first_delay)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(delay)
+            yield chunk
+    return stream
+
+
+def test_stream_yields_chunks_as_they_arrive(service):
+    service._stream_gemini_api = delayed_stream(['Olá', ', ', 'mundo'], first_delay=0.02, delay=0.1)
+    started = time.perf_counter()
+    stream = service.stream_analysis('Oi', {})
+    assert next(stream) == 'Olá'
+    assert time.perf_counter() - started < 0.09
+    assert list(stream) == [', ', 'mundo']
+
+    # The complete answer is cached for both APIs
+    assert list(service.stream_analysis('oi', {})) == ['Olá, mundo']
+    assert service.get_analysis('Oi', {}) == 'Olá, mundo'
+    assert service.get_cache_stats()['upstream_calls'] == 1
+
+
+def test_stream_failures(service):
+    def broken(prompt, context=None):
+        raise RuntimeError('down')
+        yield
+
+    service._stream_gemini_api = broken
+    assert 'dificuldades' in ''.join(service.stream_analysis('a', {}))
+
+    def breaks_midway(prompt, context=None):
+        yield 'parte'
+        raise RuntimeError('connection reset')
+
+    service._stream_gemini_api = breaks_midway
+    stream = service.stream_analysis('b', {})
+    assert next(stream) == 'parte'
+    with pytest.raises(RuntimeError):
+        next(stream)
+    assert service.response_cache.get(service.cache_key('b', {})) is None
+
+
+def test_simulated_streams_are_not_cached(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    monkeypatch.delenv('GEMINI_API_URL', raising=False)
+    service = GeminiService()
+    assert service.client is None
+    assert ''.join(service.stream_analysis('Como diversificar?', {})).strip()
+    assert service.response_cache.get(service.cache_key('Como diversificar?', {})) is None
+
+
+def test_chat_stream_endpoint(wealth_file, monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    app = create_app(wealth_file)
+    app.extensions['gemini']._stream_gemini_api = delayed_stream(['a', 'b', 'c'], first_delay=0.01, delay=0.2)
+    client = app.test_client()
+
+    started = time.perf_counter()
+    response = client.post('/api/chat/stream', json={'query': 'Qual o risco?', 'context': {}}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    first = next(response.response)
+    assert time.perf_counter() - started < 0.15  # well before the whole answer (0.41 s)
+    assert b'event: chunk' in first and json.loads(first.split(b'data: ')[1]) == {'text': 'a'}
+    rest = b''.join(response.response)
+    assert rest.count(b'event: chunk') == 2 and rest.endswith(b'event: done\ndata: {}\n\n')
+    response.close()
+
+    assert client.post('/api/chat/stream', json={'context': {}}).status_code == 400
+    assert client.post('/api/chat/stream', json={'query': 'x', 'context': []}).status_code == 400
@@ -0,0 +1,260 @@
+# backend/tests/test_llm_client.py
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from services.gemini_service import GeminiService
+from services.llm_client import LLMClient, LLMError, ModelLimits, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLLMServer:
+    """Local generateContent API. Per model: ``delay`` seconds, and ``rate_limited`` 429s before answering.
+
+    streamGenerateContent?alt=sse sends the answer as three SSE events,
+    ``chunk_delay`` seconds apart.
+    """
+
+    def __init__(self):
+        self.delay = {}
+        self.chunk_delay = 0.0
+        self.rate_limited = {}
+        self.hits = {}
+        self.peers = set()
+        self.open_requests = 0
+        self.max_open = 0
+
+    async def handle(self, request):
+        model, method = request.match_info['action'].split(':')
+        self.hits[model] = self.hits.get(model, 0) + 1
+        self.peers.add(request.transport.get_extra_info('peername')[1])
+        self.open_requests += 1
+        self.max_open = max(self.max_open, self.open_requests)
+        try:
+            if self.rate_limited.get(model, 0) > 0:
+                self.rate_limited[model] -= 1
+                return web.json_response({'error': 'quota'}, status=429, headers={'Retry-After': '2'})
+            await asyncio.sleep(self.delay.get(model, 0))
+            body = await request.json()
+            prompt = body['contents'][0]['parts'][0]['text']
+            if method == 'streamGenerateContent':
+                assert request.query['alt'] == 'sse'
+                return await self.stream(request, [f'{model}: ', prompt, '.'])
+            return web.json_response({'candidates': [{'content': {'parts': [{'text': f'{model}: '}, {'text': prompt}]}}]})
+        finally:
+            self.open_requests -= 1
+
+    async def stream(self, request, chunks):
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            event = {'candidates': [{'content': {'parts': [{'text': chunk}]}}]}
+            await response.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+        await response.write_eof()
+        return response
+
+    def __enter__(self):
+        started = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        async def start():
+            app = web.Application()
+            app.router.add_post('/v1beta/models/{action}', self.handle)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, '127.0.0.1', 0)
+            await site.start()
+            self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+            started.set()
+
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(start(), self.loop)
+        started.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer() as fake:
+        yield fake
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault('default_limits', ModelLimits(requests_per_second=100, burst=100, max_concurrency=10))
+    return LLMClient(server.url, 'key', 'pro', 'flash', **kwargs)
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0
+    clock.now = 100
+    assert [bucket.try_acquire() for _ in range(4)][-1] == pytest.approx(0.5)  # capped at capacity
+
+    bucket.pause(10)
+    clock.now = 105
+    assert bucket.try_acquire() == pytest.approx(5.5)
+    clock.now = 110.5
+    assert bucket.try_acquire() == 0
+
+
+def test_primary_answers_over_one_kept_alive_connection(server):
+    client = make_client(server)
+    try:
+        answers = [client.generate_sync(f'q{i}') for i in range(5)]
+        assert [a.text for a in answers] == [f'pro: q{i}' for i in range(5)]
+        assert not any(a.hedged for a in answers)
+        assert len(server.peers) == 1 and 'flash' not in server.hits
+        assert client.get_stats() == {'pro': {'requests': 5, 'wins': 5}}
+    finally:
+        client.close()
+
+
+def test_slow_primary_is_hedged_to_the_fallback(server):
+    server.delay['pro'] = 2.0
+    client = make_client(server, hedge_delay=0.1)
+    try:
+        started = time.perf_counter()
+        answer = client.generate_sync('q')
+        assert answer.model == 'flash' and answer.hedged and answer.text == 'flash: q'
+        assert time.perf_counter() - started < 1.0
+    finally:
+        client.close()
+
+
+def test_429_fails_over_and_pauses_the_model(server):
+    server.rate_limited['pro'] = 1
+    client = make_client(server, hedge_delay=5)
+    try:
+        started = time.perf_counter()
+        answer = client.generate_sync('q')
+        assert answer.model == 'flash' and time.perf_counter() - started < 1.0
+        assert client.get_stats()['pro'] == {'requests': 1, 'rate_limited': 1, 'errors': 1}
+        assert client.bucket('pro').try_acquire() > 1.5  # Retry-After: 2
+    finally:
+        client.close()
+
+
+def test_concurrency_cap_per_model(server):
+    server.delay['pro'] = 0.1
+    client = LLMClient(server.url, 'key', 'pro',
+                       limits={'pro': ModelLimits(requests_per_second=1000, burst=1000, max_concurrency=2)})
+
+    async def burst():
+        try:
+            return await asyncio.gather(*(client.generate(f'q{i}') for i in range(6)))
+        finally:
+            await client.aclose()
+
+    started = time.perf_counter()
+    answers = asyncio.run(burst())
+    assert len(answers) == 6 and server.max_open == 2
+    assert time.perf_counter() - started >= 0.3
+
+
+def test_rate_limit_spaces_requests(server):
+    client = LLMClient(server.url, 'key', 'pro',
+                       limits={'pro': ModelLimits(requests_per_second=20, burst=2, max_concurrency=10)})
+
+    async def burst():
+        try:
+            await asyncio.gather(*(client.generate('q') for _ in range(6)))
+        finally:
+            await client.aclose()
+
+    started = time.perf_counter()
+    asyncio.run(burst())
+    assert time.perf_counter() - started >= 0.19  # 2 from the burst, then 4 at 20/s
+
+
+def test_all_models_failing_raises(server):
+    server.rate_limited.update(pro=1, flash=1)
+    client = make_client(server)
+    try:
+        with pytest.raises(LLMError) as raised:
+            client.generate_sync('q')
+        assert len(raised.value.errors) == 2
+    finally:
+        client.close()
+
+
+def test_stream_passes_chunks_on_as_they_arrive(server):
+    server.chunk_delay = 0.2
+    client = make_client(server)
+    try:
+        started = time.perf_counter()
+        chunks = client.stream_sync('q')
+        assert next(chunks) == 'pro: '
+        first_chunk = time.perf_counter() - started
+        assert list(chunks) == ['q', '.']
+        assert first_chunk < 0.15 and time.perf_counter() - started >= 0.4
+        assert client.get_stats() == {'pro': {'requests': 1, 'wins': 1}}
+    finally:
+        client.close()
+
+
+def test_stream_is_hedged_and_fails_over_before_the_first_chunk(server):
+    server.delay['pro'] = 2.0
+    client = make_client(server, hedge_delay=0.1)
+    try:
+        started = time.perf_counter()
+        assert ''.join(client.stream_sync('q')) == 'flash: q.'
+        assert time.perf_counter() - started < 1.0
+
+    finally:
+        client.close()
+
+    server.delay['pro'] = 0
+    server.rate_limited['pro'] = 1
+    client = make_client(server, hedge_delay=5)
+    try:
+        assert ''.join(client.stream_sync('r')) == 'flash: r.'
+        assert client.get_stats()['pro']['rate_limited'] == 1
+    finally:
+        client.close()
+
+    server.rate_limited.update(pro=1, flash=1)
+    client = make_client(server)
+    try:
+        with pytest.raises(LLMError):
+            list(client.stream_sync('s'))
+    finally:
+        client.close()
+
+
+def test_gemini_service_uses_the_client(server, monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    monkeypatch.setenv('GEMINI_API_URL', server.url)
+    service = GeminiService()
+    try:
+        assert service.client is not None and service.client.model == 'gemini-2.5-pro'
+        assert service.get_analysis('Qual o risco?', {}).startswith('gemini-2.5-pro: ')
+        streamed = ''.join(service.stream_analysis('Diversificação?', {}))
+        assert streamed.startswith('gemini-2.5-pro: ')
+        assert service.get_analysis('diversificação', {}) == streamed
+        assert server.hits == {'gemini-2.5-pro': 2}
+    finally:
+        service.client.close()
@@ -0,0 +1,156 @@
+# backend/tests/test_market_providers.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from services.market_data import MarketDataService
+from services.market_providers import Endpoint, Provider, ProviderFanout
+
+
+class StubServer:
+    """Local HTTP provider. GET /<name>?delay=<s>&status=<code> answers {"source": name}."""
+
+    def __init__(self):
+        self.hits = {}
+        self.open_requests = 0
+        self.max_open = 0
+
+    async def handle(self, request):
+        name = request.match_info['name']
+        self.hits[name] = self.hits.get(name, 0) + 1
+        self.open_requests += 1
+        self.max_open = max(self.max_open, self.open_requests)
+        try:
+            await asyncio.sleep(float(request.query.get('delay', 0)))
+            status = int(request.query.get('status', 200))
+            if status != 200:
+                return web.json_response({'error': 'injected'}, status=status)
+            return web.json_response({'source': name})
+        finally:
+            self.open_requests -= 1
+
+    def __enter__(self):
+        started = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        async def start():
+            app = web.Application()
+            app.router.add_get('/{name}', self.handle)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, '127.0.0.1', 0)
+            await site.start()
+            self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+            started.set()
+
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(start(), self.loop)
+        started.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def endpoint(stub, name, timeout=2.0, **params):
+    return Endpoint(Provider(name, stub.url, timeout=timeout), name, {k: str(v) for k, v in params.items()})
+
+
+def test_sections_are_fetched_concurrently_and_merged_as_they_arrive(stub):
+    fanout = ProviderFanout({
+        'indices': [endpoint(stub, 'indices', delay=0.3)],
+        'currencies': [endpoint(stub, 'currencies', delay=0.1)],
+        'commodities': [endpoint(stub, 'commodities', delay=0.2)],
+    }, hedge_delay=5)
+    arrivals = []
+    try:
+        started = time.perf_counter()
+        merged = fanout.fetch_sync(on_result=lambda section, _: arrivals.append(section))
+        elapsed = time.perf_counter() - started
+    finally:
+        fanout.close()
+
+    assert merged == {s: {'source': s} for s in ('indices', 'currencies', 'commodities')}
+    assert arrivals == ['currencies', 'commodities', 'indices']
+    assert elapsed < 0.55
+
+
+def test_slow_request_is_hedged_to_the_backup(stub):
+    fanout = ProviderFanout({'indices': [endpoint(stub, 'slow', delay=1.0), endpoint(stub, 'fast')]},
+                            hedge_delay=0.05)
+    try:
+        started = time.perf_counter()
+        assert fanout.fetch_sync() == {'indices': {'source': 'fast'}}
+        assert time.perf_counter() - started < 0.5
+    finally:
+        fanout.close()
+
+
+def test_failures_fail_over_and_are_reported(stub):
+    fanout = ProviderFanout({
+        'indices': [endpoint(stub, 'broken', status=503), endpoint(stub, 'backup')],
+        'sectors': [endpoint(stub, 'down', status=500)],
+        'currencies': [endpoint(stub, 'hung', timeout=0.1, delay=1.0)],
+    }, hedge_delay=5)
+    try:
+        merged = fanout.fetch_sync()
+    finally:
+        fanout.close()
+
+    assert merged['indices'] == {'source': 'backup'}
+    assert set(merged['errors']) == {'sectors', 'currencies'}
+    assert stub.hits['down'] == 2  # a single endpoint is retried once
+    assert all('TimeoutError' in error for error in merged['errors']['currencies'])
+
+
+def test_concurrency_is_bounded(stub):
+    routes = {f"s{i}": [endpoint(stub, f"s{i}", delay=0.05)] for i in range(12)}
+    fanout = ProviderFanout(routes, max_concurrency=3, hedge_delay=5)
+    try:
+        assert len(fanout.fetch_sync()) == 12
+    finally:
+        fanout.close()
+    assert stub.max_open <= 3
+
+
+def test_async_api_in_callers_loop(stub):
+    async def main():
+        fanout = ProviderFanout({'indices': [endpoint(stub, 'indices')]})
+        try:
+            return [item async for item in fanout.stream()]
+        finally:
+            await fanout.aclose()
+
+    assert asyncio.run(main()) == [('indices', {'source': 'indices'})]
+
+
+def test_market_data_service_uses_providers(stub):
+    fanout = ProviderFanout({
+        'indices': [endpoint(stub, 'indices', delay=0.2)],
+        'currencies': [endpoint(stub, 'currencies', delay=0.2)],
+    }, hedge_delay=5)
+    service = MarketDataService(providers=fanout)
+    try:
+        started = time.perf_counter()
+        data = service.get_real_time_data()
+        assert time.perf_counter() - started < 0.35
+    finally:
+        fanout.close()
+
+    assert data['indices'] == {'source': 'indices'}
+    assert data['currencies'] == {'source': 'currencies'}
+    assert 'oil_brent' in data['commodities']  # not routed: simulated
+    assert stub.hits == {'indices': 1, 'currencies': 1}
@@ -0,0 +1,112 @@
+# backend/tests/test_market_simulator.py
+
+import numpy as np
+import pytest
+
+from services.market_data import MarketDataService
+from services.market_simulator import (DEFAULT_INSTRUMENTS, HISTORY_TICKS, Instrument, MarketSimulator,
+                                       correlation_matrix)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_same_seed_and_tick_give_the_same_market():
+    stepped = MarketSimulator(seed=7, start=0)
+    for tick in range(0, 600, 13):
+        stepped.snapshot(tick)
+    jumped = MarketSimulator(seed=7, start=0).snapshot(600)
+    final = stepped.snapshot(600)
+
+    assert np.array_equal(final.prices, jumped.prices)
+    assert all(np.array_equal(final.returns[h], jumped.returns[h]) for h in final.returns)
+    assert np.array_equal(final.volatility, jumped.volatility)
+    assert not np.array_equal(MarketSimulator(seed=8, start=0).snapshot(600).prices, final.prices)
+
+
+def test_starts_at_instrument_prices_with_a_warm_history():
+    snapshot = MarketSimulator(start=0).snapshot(0)
+    assert np.allclose(snapshot.prices, [instrument.price for instrument in DEFAULT_INSTRUMENTS])
+    assert all(np.isfinite(r).all() and (r != 0).all() for r in snapshot.returns.values())
+    assert ((snapshot.volatility > 0.02) & (snapshot.volatility < 2)).all()
+
+
+def test_snapshot_follows_the_clock_and_is_shared_within_a_tick():
+    clock = Clock()
+    simulator = MarketSimulator(tick_seconds=30, clock=clock)
+    first = simulator.snapshot()
+    clock.now = 29
+    assert simulator.snapshot() is first
+    clock.now = 65
+    later = simulator.snapshot()
+    assert later.tick == 2 and (later.timestamp - first.timestamp).total_seconds() == 60
+    with pytest.raises(ValueError):
+        simulator.snapshot(1)
+
+
+def test_current_snapshot_never_goes_back_in_time():
+    clock = Clock()
+    simulator = MarketSimulator(tick_seconds=30, clock=clock)
+    clock.now = 60
+    latest = simulator.snapshot()
+    clock.now = 45  # a thread that read the clock before the market advanced
+    assert simulator.snapshot() is latest
+    with pytest.raises(ValueError):
+        simulator.snapshot(1)
+
+
+def test_returns_match_target_volatility_and_correlation():
+    simulator = MarketSimulator(seed=3, start=0)
+    steps = simulator._steps(200_000)
+    target = correlation_matrix(DEFAULT_INSTRUMENTS)
+    assert np.abs(np.corrcoef(steps, rowvar=False) - target).max() < 0.02
+    realized = steps.std(axis=0) * np.sqrt(252)
+    expected = np.array([instrument.volatility for instrument in DEFAULT_INSTRUMENTS])
+    assert np.allclose(realized, expected, rtol=0.02)
+
+
+def test_ring_buffer_horizons_after_many_ticks():
+    simulator = MarketSimulator(seed=1, start=0)
+    snapshot = simulator.snapshot(5 * HISTORY_TICKS + 3)
+    history = simulator._history
+    latest = history[simulator._head]
+    week_ago = history[(simulator._head - 5) % HISTORY_TICKS]
+    assert np.allclose(snapshot.returns['1w'], np.expm1(latest - week_ago))
+
+
+def test_loadings_must_describe_a_valid_correlation():
+    with pytest.raises(ValueError):
+        correlation_matrix([Instrument('X', 1, 0.1, loadings=(0.9, 0.9, 0, 0, 0))])
+
+
+def test_sections_read_one_consistent_market():
+    clock = Clock()
+    service = MarketDataService(simulator=MarketSimulator(seed=5, clock=clock), jitter=0)
+    data = service.get_real_time_data()
+    indicators = service.get_economic_indicators()
+    market = service.simulator.snapshot()
+
+    assert data['indices']['IBOV'] == {'price': market.price('IBOV'), 'change': market.change('IBOV')}
+    assert indicators['brazil']['exchange_rate'] == data['currencies']['major_pairs']['USDBRL']['rate']
+    assert indicators['global']['gold_price'] == data['commodities']['gold']['price']
+    assert service.get_sector_performance()['brazilian_sectors']['energy']['return_ytd'] == \
+        market.change('energy', 'ytd')
+
+    # A second service with the same seed serves the same numbers
+    again = MarketDataService(simulator=MarketSimulator(seed=5, clock=clock), jitter=0)
+    assert again.get_real_time_data()['currencies'] == data['currencies']
+
+
+def test_prices_stay_near_reference_levels_over_long_uptimes():
+    clock = Clock()
+    simulator = MarketSimulator(seed=0, tick_seconds=30, clock=clock)
+    reference = np.array([instrument.price for instrument in DEFAULT_INSTRUMENTS])
+    for days in (1, 30, 90):
+        clock.now = days * 86400
+        ratio = simulator.snapshot().prices / reference
+        assert ((ratio > 1 / 3) & (ratio < 3)).all(), days
@@ -0,0 +1,64 @@
+# backend/tests/test_performance_rollups.py
+
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def client(wealth_file):
+    return create_app(wealth_file).test_client()
+
+
+@pytest.mark.parametrize('freq, points, first_label', [
+    ('daily', 90, '2023-01-01'),
+    ('weekly', 14, '2023-01-01'),
+    ('monthly', 3, '2023-01'),
+    ('quarterly', 1, '2023-Q1'),
+    ('yearly', 1, '2023'),
+])
+def test_frequencies(client, freq, points, first_label):
+    data = client.get(f'/api/performance?freq={freq}').get_json()
+    assert len(data) == points
+    assert data[0]['name'] == first_label
+
+
+def test_default_is_monthly_wealth(client):
+    assert client.get('/api/performance').data == client.get('/api/performance?freq=monthly&series=Riqueza').data
+
+
+def test_holding_series(client):
+    wealth = client.get('/api/performance?freq=yearly').get_json()[0]['value']
+    holdings = [client.get(f'/api/performance?freq=yearly&series={col}').get_json()[0]['value']
+                for col in ('BB', 'NUBANK', 'CEF')]
+    assert sum(holdings) == pytest.approx(wealth, abs=0.02)
+
+
+def test_if_none_match_returns_304(client):
+    first = client.get('/api/performance?freq=weekly')
+    etag = first.headers['ETag']
+
+    cached = client.get('/api/performance?freq=weekly', headers={'If-None-Match': etag})
+    other = client.get('/api/performance?freq=daily', headers={'If-None-Match': etag})
+
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+
+
+def test_rollups_are_built_once_per_snapshot(wealth_file):
+    app = create_app(wealth_file)
+    client = app.test_client()
+    client.get('/api/performance?freq=daily')
+    snapshot = app.extensions['wealth_store'].get()
+    rollups = snapshot.derive('performance_rollups', lambda df: None)
+
+    client.get('/api/performance?freq=yearly')
+
+    assert snapshot.derive('performance_rollups', lambda df: None) is rollups
+
+
+def test_rejects_unknown_freq_and_series(client):
+    assert client.get('/api/performance?freq=hourly').status_code == 400
+    assert client.get('/api/performance?series=PETR4').status_code == 400
@@ -0,0 +1,61 @@
+# backend/tests/test_portfolio.py
+
+import numpy as np
+import pytest
+
+from models.portfolio import EfficientFrontier, PortfolioAnalyzer, project_to_bounded_simplex
+
+
+def test_projection_respects_bounds():
+    lower, upper = np.array([0.0, 0.1, 0.0]), np.array([0.5, 0.5, 0.5])
+    w = project_to_bounded_simplex(np.array([3.0, -2.0, 0.4]), lower, upper)
+    assert w.sum() == pytest.approx(1)
+    assert np.allclose(w, [0.5, 0.1, 0.4])
+
+
+def test_frontier_is_efficient():
+    analyzer = PortfolioAnalyzer()
+    mean, covariance = analyzer._estimates
+    frontier = EfficientFrontier(analyzer.symbols, mean, covariance, np.zeros(5), np.full(5, 0.4))
+
+    assert (np.diff(frontier.volatilities) > 0).all()
+    assert (np.diff(frontier.expected_returns) > 0).all()
+    assert np.allclose(frontier.weights.sum(axis=1), 1)
+    assert frontier.weights.max() <= 0.4 + 1e-9
+
+    # No random feasible portfolio beats the next frontier point up in risk.
+    rng = np.random.default_rng(0)
+    for w in rng.dirichlet(np.ones(5), 2000):
+        if w.max() > 0.4:
+            continue
+        vol = np.sqrt(w @ covariance @ w)
+        assert vol >= frontier.volatilities[0] - 1e-6
+        i = min(frontier.portfolio_for_volatility(vol) + 1, len(frontier) - 1)
+        assert w @ mean <= frontier.expected_returns[i] + 1e-6
+
+
+def test_frontier_is_solved_once_per_estimate():
+    analyzer = PortfolioAnalyzer()
+    analyzer.optimize(3, 'long', 'growth')
+    lower, upper = analyzer._bounds('growth')
+    frontier = analyzer.frontier(lower, upper)
+
+    analyzer.optimize(8, 'medium', 'growth')
+    assert analyzer.frontier(lower, upper) is frontier
+
+    mean, covariance = analyzer._estimates
+    analyzer.update_estimates(mean * 1.1, covariance)
+    assert analyzer.frontier(lower, upper) is not frontier
+
+
+def test_optimize_follows_risk_tolerance_and_goal():
+    analyzer = PortfolioAnalyzer()
+    cautious = analyzer.optimize(1, 'long', 'growth')
+    bold = analyzer.optimize(10, 'long', 'growth')
+    short = analyzer.optimize(10, 'short', 'growth')
+    preservation = analyzer.optimize(10, 'long', 'preservation')
+
+    assert cautious['expected_risk'] < short['expected_risk'] < bold['expected_risk']
+    assert bold['expected_return'] > cautious['expected_return']
+    assert preservation['recommended_allocation']['CASH'] >= 0.3 - 1e-4
+    assert sum(bold['recommended_allocation'].values()) == pytest.approx(1, abs=1e-3)
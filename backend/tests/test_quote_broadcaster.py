@@ -0,0 +1,146 @@
+# backend/tests/test_quote_broadcaster.py
+
+import json
+import threading
+
+from app import create_app
+from services.market_data import MarketDataService
+from services.quote_broadcaster import KEEPALIVE, QuoteBroadcaster
+
+
+def parse_events(chunk):
+    """[(event, data)] from a chunk of SSE messages."""
+    events = []
+    for message in chunk.decode().strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.split('\n') if not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def quotes(**prices):
+    return {symbol: {'price': price} for symbol, price in prices.items()}
+
+
+def make_broadcaster(initial, **options):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return initial
+    return QuoteBroadcaster(fetch, interval=3600, **options), fetches
+
+
+def test_subscribers_get_a_snapshot_then_only_their_changed_symbols():
+    broadcaster, _ = make_broadcaster(quotes(IBOV=100, SP500=50, gold=10))
+    first = broadcaster.subscribe(['IBOV', 'gold'])
+    second = broadcaster.subscribe(['SP500'])
+
+    assert parse_events(first.poll()[0]) == [('snapshot', {'version': 1, 'quotes': quotes(IBOV=100, gold=10)})]
+    assert parse_events(second.poll()[0]) == [('snapshot', {'version': 1, 'quotes': quotes(SP500=50)})]
+    assert first.poll() == []
+
+    broadcaster.publish(quotes(IBOV=101, SP500=50, gold=10))
+    assert parse_events(first.poll()[0]) == [('delta', {'version': 2, 'quotes': quotes(IBOV=101)})]
+    assert second.poll() == []
+
+    # Unchanged quotes publish nothing at all
+    assert broadcaster.publish(quotes(IBOV=101)) == 0
+    assert broadcaster.state()[0] == 2
+    broadcaster.stop()
+
+
+def test_same_symbol_sets_share_one_encoded_delta():
+    broadcaster, fetches = make_broadcaster(quotes(IBOV=100, gold=10))
+    subscriptions = [broadcaster.subscribe(['gold', 'IBOV']) for _ in range(50)]
+    subscriptions.append(broadcaster.subscribe(['IBOV']))
+    for subscription in subscriptions:
+        subscription.poll()
+
+    assert len(fetches) == 1  # one upstream fetch however many subscribers
+    assert broadcaster.topic_count == 2
+    assert broadcaster.publish(quotes(IBOV=99)) == 2
+    messages = [subscription.poll() for subscription in subscriptions[:50]]
+    assert all(m[0] is messages[0][0] for m in messages)
+
+    for subscription in subscriptions:
+        subscription.close()
+    assert broadcaster.subscriber_count == 0 and broadcaster.topic_count == 0
+    broadcaster.stop()
+
+
+def test_slow_subscriber_is_resynced_past_the_backlog():
+    broadcaster, _ = make_broadcaster(quotes(IBOV=0), backlog=4)
+    subscription = broadcaster.subscribe(['IBOV'])
+    subscription.poll()
+
+    for price in range(1, 4):
+        broadcaster.publish(quotes(IBOV=price))
+    assert [data['quotes']['IBOV']['price'] for _, data in parse_events(b''.join(subscription.poll()))] == [1, 2, 3]
+
+    for price in range(4, 20):
+        broadcaster.publish(quotes(IBOV=price))
+    assert parse_events(b''.join(subscription.poll())) == [
+        ('snapshot', {'version': 20, 'quotes': quotes(IBOV=19)})]
+    broadcaster.stop()
+
+
+def test_unknown_symbols_are_rejected():
+    broadcaster, _ = make_broadcaster(quotes(IBOV=1))
+    for symbols in ([], ['IBOV', 'NOPE']):
+        try:
+            broadcaster.subscribe(symbols)
+            assert False, symbols
+        except ValueError:
+            pass
+    broadcaster.stop()
+
+
+def test_events_wait_for_deltas_and_send_keepalives():
+    broadcaster, _ = make_broadcaster(quotes(IBOV=1), heartbeat=0.01)
+    subscription = broadcaster.subscribe(['IBOV'])
+    events = subscription.events()
+    assert parse_events(next(events))[0][0] == 'snapshot'
+    assert next(events) == KEEPALIVE
+
+    timer = threading.Timer(0.05, broadcaster.publish, [quotes(IBOV=2)])
+    timer.start()
+    chunk = next(events)
+    while chunk == KEEPALIVE:
+        chunk = next(events)
+    assert parse_events(chunk) == [('delta', {'version': 2, 'quotes': quotes(IBOV=2)})]
+
+    events.close()  # client disconnected
+    assert subscription.closed and broadcaster.subscriber_count == 0
+    broadcaster.stop()
+
+
+def test_refresh_loop_pushes_upstream_changes():
+    prices = iter(range(1, 1000))
+    broadcaster = QuoteBroadcaster(lambda: quotes(IBOV=next(prices)), interval=0.01)
+    subscription = broadcaster.subscribe(['IBOV'])
+    subscription.poll()
+    assert parse_events(b''.join(subscription.wait(5)))[-1][0] == 'delta'
+    subscription.close()
+    broadcaster.stop()
+
+
+def test_market_quotes_are_flattened():
+    service_quotes = MarketDataService().get_quotes()
+    assert {'IBOV', 'gold', 'USDBRL', 'BTCUSD'} <= service_quotes.keys()
+    assert set(service_quotes['USDBRL']) == {'price', 'change'}
+
+
+def test_stream_endpoint(wealth_file):
+    app = create_app(wealth_file)
+    client = app.test_client()
+    assert client.get('/api/market/stream').status_code == 400
+    assert client.get('/api/market/stream?symbols=IBOV,NOPE').status_code == 400
+
+    response = client.get('/api/market/stream?symbols=IBOV,USDBRL', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    event, data = parse_events(next(response.response))[0]
+    assert event == 'snapshot' and set(data['quotes']) == {'IBOV', 'USDBRL'}
+    response.close()
+    app.extensions['quote_broadcaster'].stop()
@@ -0,0 +1,212 @@
+# backend/tests/test_refresh_cache.py
+
+import threading
+import time
+
+from services.market_data import MarketDataService
+from services.refresh_cache import RefreshingValue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ManualSpawn:
+    """Collects background refreshes so tests decide when they run."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def __call__(self, task):
+        self.tasks.append(task)
+
+    def run(self):
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task()
+
+
+def counter_fetch():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return len(calls)
+    return fetch, calls
+
+
+def test_fresh_value_is_served_without_refresh():
+    clock, spawn = Clock(), ManualSpawn()
+    fetch, calls = counter_fetch()
+    value = RefreshingValue(fetch, ttl=30, jitter=0, clock=clock, spawn=spawn)
+
+    assert value.get().value == 1
+    clock.now = 20
+    result = value.get()
+    assert (result.value, result.age, result.stale) == (1, 20, False)
+    assert spawn.tasks == [] and len(calls) == 1
+
+
+def test_refresh_ahead_starts_one_background_refresh():
+    clock, spawn = Clock(), ManualSpawn()
+    fetch, calls = counter_fetch()
+    value = RefreshingValue(fetch, ttl=30, refresh_ahead=0.8, jitter=0, clock=clock, spawn=spawn)
+    value.get()
+
+    clock.now = 25
+    assert [value.get().value for _ in range(5)] == [1] * 5
+    assert len(spawn.tasks) == 1
+    spawn.run()
+    assert value.get().value == 2 and value.get().age == 0
+
+
+def test_stale_value_is_served_while_revalidating():
+    clock, spawn = Clock(), ManualSpawn()
+    fetch, calls = counter_fetch()
+    value = RefreshingValue(fetch, ttl=30, jitter=0, max_stale=60, clock=clock, spawn=spawn)
+    value.get()
+
+    clock.now = 45
+    stale = value.get()
+    assert (stale.value, stale.age, stale.stale) == (1, 45, True)
+    assert len(calls) == 1
+
+    clock.now = 100  # past ttl + max_stale: the caller waits for a fetch
+    assert value.get().value == 2
+
+
+def test_failed_refresh_keeps_serving_the_old_value():
+    clock, spawn = Clock(), ManualSpawn()
+    outcomes = iter([1, RuntimeError('provider down'), 3])
+
+    def fetch():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    value = RefreshingValue(fetch, ttl=30, jitter=0, clock=clock, spawn=spawn)
+    value.get()
+    clock.now = 40
+    value.get()
+    spawn.run()
+    assert value.get().value == 1
+    spawn.run()
+    assert value.get().value == 3
+
+
+def test_jitter_spreads_expiry():
+    clock = Clock()
+    expiries = set()
+    for _ in range(20):
+        value = RefreshingValue(lambda: 0, ttl=30, jitter=0.1, clock=clock)
+        value.get()
+        expiries.add(value._entry[2])
+    assert len(expiries) > 1
+    assert all(27 <= e <= 33 for e in expiries)
+
+
+def test_concurrent_cold_reads_fetch_once():
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'data'
+
+    value = RefreshingValue(slow_fetch, ttl=30)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(value.get().value)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ['data'] * 8 and len(calls) == 1
+
+
+def test_real_time_data_reports_staleness():
+    clock, spawn = Clock(), ManualSpawn()
+    service = MarketDataService(cache_duration=30, jitter=0, clock=clock, spawn=spawn)
+    first = service.get_real_time_data()
+    assert first['cache'] == {'age_seconds': 0, 'stale': False}
+
+    clock.now = 31
+    stale = service.get_real_time_data()
+    assert stale['cache'] == {'age_seconds': 31, 'stale': True}
+    assert stale['indices'] == first['indices']
+    assert 'cache' not in service._kinds.get('currencies').value
+
+
+def test_kinds_are_cached_independently():
+    clock, spawn = Clock(), ManualSpawn()
+    service = MarketDataService(cache_duration=30, cache_durations={'indicators': 3600},
+                                jitter=0, clock=clock, spawn=spawn)
+    indicators = service.get_economic_indicators()
+    service.get_sector_performance()
+
+    clock.now = 100
+    assert service.get_economic_indicators()['cache'] == {'age_seconds': 100, 'stale': False}
+    assert service.get_sector_performance()['cache']['stale']
+    spawn.run()
+    assert service.get_sector_performance()['cache'] == {'age_seconds': 0, 'stale': False}
+    assert service.get_economic_indicators()['brazil'] == indicators['brazil']
+
+
+def test_slow_currency_fetch_does_not_block_index_reads():
+    release = threading.Event()
+    started = threading.Event()
+    service = MarketDataService()
+    fetch_currencies = service._fetch_currency_data
+
+    def slow_currencies():
+        started.set()
+        release.wait(5)
+        return fetch_currencies()
+
+    service._kinds._fetchers['currencies'] = slow_currencies
+    reader = threading.Thread(target=service.get_currency_data)
+    reader.start()
+    started.wait(5)
+    try:
+        began = time.perf_counter()
+        assert 'IBOV' in service._kinds.get('indices').value
+        assert time.perf_counter() - began < 1
+    finally:
+        release.set()
+        reader.join()
+
+
+def test_concurrent_requests_fetch_each_kind_once():
+    calls = {'indices': 0, 'currencies': 0, 'commodities': 0}
+    service = MarketDataService()
+    for kind in calls:
+        original = service._kinds._fetchers[kind]
+
+        def counting(kind=kind, original=original):
+            calls[kind] += 1
+            time.sleep(0.02)
+            return original()
+        service._kinds._fetchers[kind] = counting
+
+    barrier = threading.Barrier(12)
+
+    def worker():
+        barrier.wait()
+        service.get_real_time_data()
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == {'indices': 1, 'currencies': 1, 'commodities': 1}
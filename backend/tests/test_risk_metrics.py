@@ -0,0 +1,144 @@
+# backend/tests/test_risk_metrics.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.risk_metrics import RiskCalculator, RiskMetricsEngine
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2020-01-01', periods=750)
+    bench = 100 * np.cumprod(1 + rng.normal(0.0003, 0.012, len(index)))
+    bench_returns = np.diff(bench) / bench[:-1]
+    returns = 0.0002 + 1.3 * bench_returns + rng.normal(0, 0.004, len(bench_returns))
+    values = 1000 * np.concatenate(([1.0], np.cumprod(1 + returns)))
+    return index, values, bench
+
+
+def test_metrics_match_full_history_reference(series):
+    index, values, bench = series
+    engine = RiskMetricsEngine(risk_free_rate=0.1, periods_per_year=252)
+    engine.append(values, bench)
+    metrics = engine.metrics()
+
+    returns = np.diff(values) / values[:-1]
+    bench_returns = np.diff(bench) / bench[:-1]
+    vol = returns.std(ddof=1) * np.sqrt(252)
+    drawdown = (values / np.maximum.accumulate(values) - 1).min()
+
+    assert metrics['volatility'] == pytest.approx(vol)
+    assert metrics['sharpe_ratio'] == pytest.approx((returns.mean() * 252 - 0.1) / vol)
+    assert metrics['beta'] == pytest.approx(np.cov(returns, bench_returns)[0, 1] / bench_returns.var(ddof=1))
+    assert metrics['var_95'] == pytest.approx(np.quantile(returns, 0.05))
+    assert metrics['cvar_95'] <= metrics['var_95'] < 0
+    assert metrics['parametric_var_99'] < metrics['parametric_var_95'] < 0
+    assert metrics['max_drawdown'] == pytest.approx(drawdown)
+
+
+def test_incremental_sync_matches_single_pass(series):
+    index, values, bench = series
+    incremental = RiskMetricsEngine()
+    for end in (10, 11, 400, 750):
+        incremental.sync(index[:end], values[:end], bench[:end])
+    single = RiskMetricsEngine()
+    single.sync(index, values, bench)
+
+    assert incremental.rows == 750
+    for key, value in single.metrics().items():
+        assert incremental.metrics()[key] == pytest.approx(value)
+
+
+def test_sync_recomputes_when_history_changes(series):
+    index, values, bench = series
+    engine = RiskMetricsEngine()
+    engine.sync(index, values)
+    edited = values.copy()
+    edited[-1] *= 0.5
+
+    engine.sync(index, edited)
+
+    assert engine.rows == 750
+    assert engine.metrics()['max_drawdown'] < -0.4
+
+
+def test_sync_recomputes_when_a_middle_row_is_corrected(series):
+    index, values, bench = series
+    engine = RiskMetricsEngine()
+    engine.sync(index[:500], values[:500], bench[:500])
+    corrected = values.copy()
+    corrected[200] *= 0.6
+    engine.sync(index, corrected, bench)
+
+    reference = RiskMetricsEngine()
+    reference.sync(index, corrected, bench)
+    assert engine.metrics() == reference.metrics()
+    assert engine.metrics()['max_drawdown'] < -0.35
+
+    bench_corrected = bench.copy()
+    bench_corrected[100] *= 1.5
+    engine.sync(index, corrected, bench_corrected)
+    reference.reset()
+    reference.sync(index, corrected, bench_corrected)
+    assert engine.metrics()['beta'] == reference.metrics()['beta']
+
+
+def test_calculator_without_enough_data():
+    result = RiskCalculator().calculate_portfolio_risk({'values': [100.0]})
+    assert result['observations'] == 0
+    assert result['var_95'] is None
+    assert result['sharpe_ratio'] is None
+
+
+MC_INPUTS = dict(
+    weights=[0.5, 0.3, 0.2],
+    mean_returns=[0.0004, 0.0002, 0.0001],
+    covariance=np.array([[4e-4, 1e-4, 5e-5], [1e-4, 2.5e-4, 4e-5], [5e-5, 4e-5, 1e-4]]),
+)
+
+
+def test_monte_carlo_is_reproducible_across_budgets_and_workers():
+    calc = RiskCalculator()
+    base = calc.simulate_portfolio_risk(**MC_INPUTS, paths=150_000, seed=11)
+    small_chunks = calc.simulate_portfolio_risk(**MC_INPUTS, paths=150_000, seed=11, memory_budget_mb=0.1)
+    pooled = calc.simulate_portfolio_risk(**MC_INPUTS, paths=150_000, seed=11, workers=2)
+    processes = calc.simulate_portfolio_risk(**MC_INPUTS, paths=150_000, seed=11, workers=2, backend='process')
+
+    assert base == small_chunks == pooled == processes
+    assert calc.simulate_portfolio_risk(**MC_INPUTS, paths=150_000, seed=12) != base
+
+
+def test_unseeded_monte_carlo_reports_a_replayable_seed():
+    calc = RiskCalculator()
+    first = calc.simulate_portfolio_risk(**MC_INPUTS, paths=10_000)
+    assert 0 <= first['seed'] < 2 ** 53
+    assert calc.simulate_portfolio_risk(**MC_INPUTS, paths=10_000, seed=first['seed']) == first
+
+
+def test_monte_carlo_rejects_unusable_inputs():
+    calc = RiskCalculator()
+    for kwargs in ({'paths': 1}, {'seed': -1}, {'backend': 'gpu'}):
+        with pytest.raises(ValueError):
+            calc.simulate_portfolio_risk(**{'paths': 100, **MC_INPUTS, **kwargs})
+    with pytest.raises(ValueError):
+        calc.simulate_portfolio_risk(**MC_INPUTS, paths=100, horizon=10 ** 8)
+
+
+def test_monte_carlo_matches_normal_approximation():
+    weights = np.array(MC_INPUTS['weights'])
+    sigma = np.sqrt(weights @ MC_INPUTS['covariance'] @ weights)
+    result = RiskCalculator().calculate_portfolio_risk(
+        {'method': 'monte_carlo', **MC_INPUTS, 'paths': 200_000, 'seed': 3})
+
+    assert result['var_95'] == pytest.approx(-1.645 * sigma, rel=0.05)
+    assert result['var_99'] == pytest.approx(-2.326 * sigma, rel=0.05)
+    assert result['cvar_99'] < result['var_99'] < result['var_95']
+
+
+def test_monte_carlo_scales_with_horizon():
+    calc = RiskCalculator()
+    one_day = calc.simulate_portfolio_risk(**MC_INPUTS, paths=50_000, seed=5)
+    ten_day = calc.simulate_portfolio_risk(**MC_INPUTS, paths=50_000, seed=5, horizon=10)
+    assert ten_day['volatility'] == pytest.approx(one_day['volatility'] * np.sqrt(10), rel=0.05)
@@ -0,0 +1,52 @@
+# backend/tests/test_serialization.py
+
+import numpy as np
+from flask import Flask, jsonify
+
+from app import create_app
+from conftest import save_wealth_workbook, write_wealth_workbook
+from services.serialization import chart_series_json, round_values
+
+
+def legacy_performance_json(series):
+    """The iterrows implementation /api/performance used to ship."""
+    performance_df = series.resample('M').last().reset_index()
+    performance_df['name'] = performance_df['Date'].dt.strftime('%Y-%m')
+    performance_df.replace({np.nan: None}, inplace=True)
+    chart_data = [
+        {'name': row['name'], 'value': (round(row['Riqueza'], 2) if row['Riqueza'] is not None else None)}
+        for _, row in performance_df.iterrows()
+    ]
+    with Flask(__name__).app_context():
+        return jsonify(chart_data).get_data()
+
+
+def test_round_values_matches_builtin_round():
+    rng = np.random.default_rng(42)
+    values = np.concatenate([
+        rng.uniform(-1e6, 1e6, 50_000),
+        np.arange(0, 100, 0.005),
+        [2.675, 1.005, 0.145, -2.675, -0.001, 1e12 + 0.125, 5e15],
+    ])
+    expected = [round(float(v), 2) for v in values]
+    assert round_values(values, 2).tolist() == expected
+
+
+def test_chart_series_json_encodes_nan_as_null():
+    payload = chart_series_json(['2024-01', '2024-02'], np.array([1.005, np.nan]))
+    assert payload == b'[{"name":"2024-01","value":1.0},{"name":"2024-02","value":null}]'
+
+
+def test_performance_payload_is_byte_compatible(tmp_path):
+    path = tmp_path / 'wealth.xlsx'
+    df = write_wealth_workbook(path)
+    # Leave February empty so resample has to emit a null month.
+    save_wealth_workbook(path, df[df['Data'].dt.month != 2])
+    app = create_app(str(path))
+    series = app.extensions['wealth_store'].get().frame['Riqueza']
+
+    response = app.test_client().get('/api/performance')
+
+    assert b'null' in response.data
+    assert response.data == legacy_performance_json(series)
+    assert response.mimetype == 'application/json'
@@ -0,0 +1,77 @@
+# backend/tests/test_stress_testing.py
+
+import time
+
+import numpy as np
+import pytest
+
+from app import create_app
+from models.stress_testing import ScenarioEngine
+from services.gemini_service import GeminiService
+
+HOLDINGS = {'PETR4': 20_000.0, 'ITUB3': 25_000.0, 'KNRI11': 15_000.0, 'CASH': 40_000.0}
+
+
+def test_default_scenarios():
+    result = ScenarioEngine().run_scenarios(HOLDINGS, per_holding=True)
+    by_name = {s['name']: s for s in result['scenarios']}
+
+    crash = by_name['Crash de 30%']
+    assert crash['pnl'] == pytest.approx(-0.30 * (1.25 * 20_000 + 1.05 * 25_000 + 0.35 * 15_000))
+    assert crash['holdings']['CASH'] == 0
+    assert by_name['Desvalorização BRL 20%']['holdings']['PETR4'] > 0
+    assert result['worst']['name'] == 'Crash de 30%'
+
+
+def test_losses_are_capped_at_the_position():
+    result = ScenarioEngine().run_scenarios({'BIDI4': 1000.0}, {'wipeout': {'equity': -0.9}})
+    assert result['scenarios'][0]['pnl'] == -1000.0
+
+
+def test_thousands_of_scenarios_in_one_pass():
+    engine = ScenarioEngine()
+    shocks = np.random.default_rng(0).normal([0, 0, 0], [0.1, 100, 0.1], (10_000, 3))
+
+    started = time.perf_counter()
+    result = engine.run(HOLDINGS, shocks)
+    elapsed = time.perf_counter() - started
+
+    assert len(result['scenarios']) == 10_000
+    expected = np.maximum(shocks @ engine.exposure_matrix(list(HOLDINGS)), -1) @ np.array(list(HOLDINGS.values()))
+    assert np.allclose([s['pnl'] for s in result['scenarios']], expected)
+    assert elapsed < 0.5
+
+
+def test_unknown_factor_is_rejected():
+    with pytest.raises(ValueError):
+        ScenarioEngine().run_scenarios(HOLDINGS, {'bad': {'inflation': 0.1}})
+
+
+def test_stress_endpoint(wealth_file):
+    client = create_app(wealth_file).test_client()
+    default = client.post('/api/portfolio/stress-test').get_json()
+    custom = client.post('/api/portfolio/stress-test', json={
+        'holdings': [{'symbol': 'PETR4', 'value': 100.0}],
+        'shocks': [[-0.1, 0, 0], [0, 0, 0.1]], 'names': ['down', 'fx']}).get_json()
+
+    assert set(default['scenarios'][0]) == {'name', 'pnl', 'return'}
+    assert [s['name'] for s in custom['scenarios']] == ['down', 'fx']
+    assert custom['scenarios'][0]['pnl'] == pytest.approx(-12.5)
+    assert client.post('/api/portfolio/stress-test', json={'shocks': [[1, 2]]}).status_code == 400
+    for body in ({'holdings': [{'symbol': 'PETR4', 'value': 'abc'}]}, {'holdings': [1, 2]},
+                 {'holdings': {'PETR4': None}}, [{'symbol': 'PETR4', 'value': 1}],
+                 {'scenarios': 'x'}, {'scenarios': ['x']}, {'scenarios': {'a': 1}},
+                 {'scenarios': {'a': {'equity': 'nan'}}}, {'holdings': {'PETR4': 'nan'}},
+                 {'holdings': {'PETR4': 1e308, 'ITUB3': 1e308}},
+                 {'shocks': [[-0.1, 0, 0], [0, 0, 0.1]], 'names': ['only one']},
+                 {'shocks': [[float('inf'), 0, 0]]}, {'shocks': [1, 2, 3, 4]}):
+        assert client.post('/api/portfolio/stress-test', json=body).status_code == 400, body
+
+
+def test_risk_answer_quotes_computed_stress_results(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    service = GeminiService()
+    answer = service.get_analysis('Qual o risco?', {'portfolio': {'holdings': HOLDINGS}})
+
+    crash = ScenarioEngine().run_scenarios(HOLDINGS)['scenarios'][0]['return']
+    assert f"Crash de 30%: {crash * 100:+.1f}%".replace('.', ',') in answer
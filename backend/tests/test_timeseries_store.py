@@ -0,0 +1,155 @@
+# backend/tests/test_timeseries_store.py
+
+import json
+
+import numpy as np
+import pytest
+
+from app import create_app
+from services.market_data import MarketDataService
+from services.timeseries_store import OHLCV_COLUMNS, TimeSeriesStore, make_series, series_json
+
+DAY = 86400
+
+
+def daily_series(days=10, start=1_700_006_400):
+    close = np.arange(days, dtype=np.float64) + 100
+    return make_series(start + np.arange(days) * DAY, open=close - 1, high=close + 1,
+                       low=close - 2, close=close, volume=np.full(days, 1000.0))
+
+
+def test_range_is_half_open_binary_search():
+    series = daily_series()
+    t = series.time
+
+    window = series.range(t[2], t[5])
+    assert window.time.tolist() == t[2:5].tolist()
+    assert window.column('close').tolist() == [102.0, 103.0, 104.0]
+    assert len(series.range(t[2] + 1, t[3])) == 0
+    assert len(series.range(t[5], t[2])) == 0
+    assert np.shares_memory(window.values, series.values)
+
+
+def test_series_are_validated():
+    with pytest.raises(ValueError):
+        make_series([2, 1], **{c: [1.0, 2.0] for c in OHLCV_COLUMNS})
+    with pytest.raises(ValueError):
+        make_series([1, 2], open=[1.0, 2.0])
+    with pytest.raises(ValueError):
+        TimeSeriesStore().write('../etc', daily_series())
+
+
+def test_files_are_memory_mapped_and_shared(tmp_path):
+    writer = TimeSeriesStore(str(tmp_path))
+    writer.write('PETR4', daily_series())
+    reader = TimeSeriesStore(str(tmp_path))
+
+    series = reader.get('PETR4')
+    assert isinstance(series.time, np.memmap) and series.time.dtype == np.int64
+    assert series.values.flags.c_contiguous and not series.values.flags.writeable
+    np.testing.assert_array_equal(series.values, daily_series().values)
+
+    writer.append('PETR4', daily_series(days=3, start=int(series.time[-1]) + DAY))
+    assert len(reader.get('PETR4')) == 13
+    assert json.loads(series_json('PETR4', reader.range('PETR4', start=int(series.time[5]))))['close'][0] == 105.0
+
+
+def test_append_replaces_overlapping_rows():
+    store = TimeSeriesStore()
+    store.write('X', daily_series(days=5))
+    overlap = daily_series(days=3, start=int(daily_series().time[3]))
+    store.append('X', overlap)
+
+    series = store.get('X')
+    assert len(series) == 6
+    assert series.column('close').tolist() == [100, 101, 102, 100, 101, 102]
+
+
+def test_series_json_is_columnar():
+    series = daily_series(days=3)
+    payload = json.loads(series_json('PETR4', series))
+    assert payload['time'] == series.time.tolist()
+    assert payload['close'] == [100.0, 101.0, 102.0]
+
+    values = series.values.copy()
+    values[3, 1] = np.nan
+    gappy = make_series(series.time, **{c: values[i] for i, c in enumerate(OHLCV_COLUMNS)})
+    assert json.loads(series_json('PETR4', gappy))['close'] == [100.0, None, 102.0]
+
+
+def test_historical_data_supports_arbitrary_ranges():
+    service = MarketDataService()
+    full = service.get_history_range('ITUB3', period='5Y')
+    assert len(full) == MarketDataService.SIMULATED_HISTORY_DAYS
+
+    start, end = int(full.time[100]), int(full.time[130])
+    window = service.get_history_range('ITUB3', start=start, end=end)
+    assert len(window) == 30 and window.time[0] == start
+    assert len(service.get_historical_data('ITUB3', '1M')['history']) == 30
+    # Simulated history is stable per symbol.
+    np.testing.assert_array_equal(MarketDataService().get_history_range('ITUB3', period='5Y').values, full.values)
+
+
+def test_simulated_history_is_not_persisted(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    service = MarketDataService(history_store=store)
+    simulated = service.get_history_range('RANDOM1', period='1M')
+    assert len(simulated) == 30 and list(tmp_path.iterdir()) == []
+
+    stored = daily_series()
+    store.write('PETR4', stored)
+    np.testing.assert_array_equal(service.get_history_range('PETR4', start=0).values, stored.values)
+
+
+def test_history_endpoint(wealth_file):
+    client = create_app(wealth_file).test_client()
+    payload = client.get('/api/market/history/PETR4?start=2020-01-01&end=2100-01-01').get_json()
+    assert payload['symbol'] == 'PETR4'
+    assert len(payload['time']) == len(payload['close']) == MarketDataService.SIMULATED_HISTORY_DAYS
+    assert len(client.get('/api/market/history/PETR4?period=1W').get_json()['time']) == 7
+    assert client.get('/api/market/history/BAD%20SYMBOL').status_code == 400
+
+
+def test_history_export_streams_rows(wealth_file):
+    client = create_app(wealth_file).test_client()
+    response = client.get('/api/market/history/export?symbols=PETR4,VALE3&period=5Y')
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    days = MarketDataService.SIMULATED_HISTORY_DAYS
+    assert len(rows) == 2 * days
+    assert rows[0]['symbol'] == 'PETR4' and rows[-1]['symbol'] == 'VALE3'
+    assert set(rows[0]) == {'symbol', 'time', *OHLCV_COLUMNS}
+
+    as_array = client.get('/api/market/history/export?symbols=PETR4,VALE3&period=5Y&format=json').get_json()
+    assert as_array == rows
+    assert client.get('/api/market/history/export?symbols=PETR4&period=1W&format=json').get_json()[0]['symbol'] == 'PETR4'
+
+    assert client.get('/api/market/history/export').status_code == 400
+    assert client.get('/api/market/history/export?symbols=OK,BAD%20ONE').status_code == 400
+    assert client.get('/api/market/history/export?symbols=PETR4&format=xml').status_code == 400
+    assert client.get('/api/market/history/export?symbols=PETR4&start=not-a-date').status_code == 400
+    too_many = ','.join(f"S{i}" for i in range(MarketDataService.MAX_EXPORT_SYMBOLS + 1))
+    assert client.get(f"/api/market/history/export?symbols={too_many}").status_code == 400
+
+
+def test_stream_is_chunked():
+    service = MarketDataService()
+    chunks = list(service.stream_historical_data(['PETR4'], period='5Y', chunk_rows=500))
+    assert len(chunks) == -(-MarketDataService.SIMULATED_HISTORY_DAYS // 500)
+    assert sum(chunk.count(b'\n') for chunk in chunks) == MarketDataService.SIMULATED_HISTORY_DAYS
+
+
+def test_stream_loads_each_range_when_reached(monkeypatch):
+    service = MarketDataService()
+    loaded = []
+    load = service.get_history_range
+    monkeypatch.setattr(service, 'get_history_range', lambda symbol, *args: loaded.append(symbol) or load(symbol, *args))
+
+    chunks = service.stream_historical_data(['PETR4', 'VALE3'], period='5Y', chunk_rows=5000)
+    assert loaded == []
+    next(chunks)
+    assert loaded == ['PETR4']
+    list(chunks)
+    assert loaded == ['PETR4', 'VALE3']
@@ -0,0 +1,108 @@
+# backend/tests/test_versioned_snapshots.py
+
+import copy
+
+from app import create_app
+from services.market_data import MarketDataService
+from services.market_simulator import MarketSimulator
+from services.versioned_snapshots import SnapshotHistory, json_patch
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def apply_patch(document, patch):
+    """Minimal RFC 6902 add/replace/remove on nested dicts."""
+    document = copy.deepcopy(document)
+    for op in patch:
+        *parents, last = [p.replace('~1', '/').replace('~0', '~') for p in op['path'].split('/')[1:]]
+        target = document
+        for key in parents:
+            target = target[key]
+        if op['op'] == 'remove':
+            del target[last]
+        else:
+            target[last] = op['value']
+    return document
+
+
+def test_json_patch_only_touches_changed_leaves():
+    old = {'a': {'x': 1, 'y': [1, 2]}, 'b': 2, 'gone': True, 'a/b': 0}
+    new = {'a': {'x': 1, 'y': [1, 3]}, 'b': 2.5, 'c': {'z': 1}, 'a/b': 1}
+    patch = json_patch(old, new)
+    assert patch == [
+        {'op': 'remove', 'path': '/gone'},
+        {'op': 'replace', 'path': '/a/y', 'value': [1, 3]},
+        {'op': 'replace', 'path': '/b', 'value': 2.5},
+        {'op': 'add', 'path': '/c', 'value': {'z': 1}},
+        {'op': 'replace', 'path': '/a~1b', 'value': 1},
+    ]
+    assert apply_patch(old, patch) == new
+    assert json_patch(new, copy.deepcopy(new)) == []
+
+
+def test_versions_advance_only_when_content_changes():
+    clock = Clock()
+    history = SnapshotHistory(max_versions=3, clock=clock)
+    first = history.update({'timestamp': 't0', 'v': 1})
+    assert history.update({'timestamp': 't1', 'v': 1}) == first  # only the timestamp moved
+    clock.now = 5
+    second = history.update({'timestamp': 't2', 'v': 2})
+    assert second == 5000 > first
+
+    clock.now = 1  # a clock going backwards still yields increasing versions
+    third = history.update({'v': 3})
+    assert third == second + 1
+
+
+def test_respond_sends_patches_for_known_versions_and_full_documents_otherwise():
+    history = SnapshotHistory(max_versions=2, clock=lambda: 0)
+    v1 = history.respond({'timestamp': 't1', 'a': 1, 'b': 1})['version']
+    v2 = history.respond({'timestamp': 't2', 'a': 2, 'b': 1})['version']
+    latest = {'timestamp': 't3', 'a': 2, 'b': 3}
+
+    delta = history.respond(latest, since=v2, cache={'stale': False})
+    v3 = delta['version']
+    assert delta == {'version': v3, 'since': v2, 'timestamp': 't3', 'cache': {'stale': False},
+                     'patch': [{'op': 'replace', 'path': '/b', 'value': 3}]}
+    assert history.respond(latest, since=v3)['patch'] == []
+
+    # v1 has dropped out of the history, and versions never seen are unknown
+    for since in (v1, v3 + 100):
+        assert history.respond(latest, since=since) == {**latest, 'version': v3}
+
+
+def test_service_patches_follow_the_simulated_market():
+    market_clock, cache_clock = Clock(), Clock()
+    service = MarketDataService(simulator=MarketSimulator(seed=2, clock=market_clock),
+                                jitter=0, clock=cache_clock, spawn=lambda task: task())
+    full = service.get_economic_indicators()
+    version = full['version']
+    assert service.get_economic_indicators(since=version)['patch'] == []
+
+    market_clock.now = cache_clock.now = 31  # next tick, and the cached kind expired
+    service.get_economic_indicators()  # serves stale and refreshes
+    delta = service.get_economic_indicators(since=version)
+    assert delta['version'] > version
+    assert {'/brazil/exchange_rate', '/global/oil_price'} <= {op['path'] for op in delta['patch']}
+    assert all(not op['path'].startswith('/usa') for op in delta['patch'])
+
+    body = {k: v for k, v in full.items() if k not in ('timestamp', 'cache', 'version')}
+    current = service.get_economic_indicators()
+    assert apply_patch(body, delta['patch']) == {k: v for k, v in current.items()
+                                                 if k not in ('timestamp', 'cache', 'version')}
+
+
+def test_versioned_endpoints(wealth_file):
+    client = create_app(wealth_file).test_client()
+    for path in ('/api/market/indicators', '/api/market/sectors'):
+        full = client.get(path).get_json()
+        assert 'patch' not in full and isinstance(full['version'], int)
+        delta = client.get(f"{path}?since={full['version']}").get_json()
+        assert delta['version'] == full['version'] and delta['patch'] == []
+        assert 'patch' not in client.get(f'{path}?since=1').get_json()
@@ -0,0 +1,118 @@
+# backend/tests/test_wealth_data.py
+
+import os
+import threading
+
+import pandas as pd
+
+from conftest import write_wealth_workbook
+from services.wealth_data import WealthDataStore, read_wealth_workbook
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return read_wealth_workbook(path)
+
+
+def test_workbook_is_parsed_once(wealth_file):
+    loader = CountingLoader()
+    store = WealthDataStore(wealth_file, loader=loader)
+
+    first = store.get()
+    second = store.get()
+
+    assert loader.calls == 1
+    assert first is second
+    assert first.generation == 1
+    assert list(first.frame.columns) == ['BB', 'NUBANK', 'CEF', 'Riqueza']
+
+
+def test_reloads_when_file_changes(wealth_file):
+    loader = CountingLoader()
+    store = WealthDataStore(wealth_file, loader=loader)
+    first = store.get()
+
+    write_wealth_workbook(wealth_file, periods=120)
+    stat = os.stat(wealth_file)
+    os.utime(wealth_file, ns=(stat.st_atime_ns, first.source_mtime_ns + 1_000_000_000))
+
+    second = store.get()
+    assert loader.calls == 2
+    assert second.generation == 2
+    assert len(second.frame) == 120
+    # Readers that still hold the old snapshot keep a consistent frame.
+    assert len(first.frame) == 90
+
+
+def test_broken_file_keeps_last_good_snapshot(wealth_file):
+    loader = CountingLoader()
+    store = WealthDataStore(wealth_file, loader=loader)
+    first = store.get()
+
+    with open(wealth_file, 'wb') as f:
+        f.write(b'not a workbook')
+
+    assert store.get() is first
+    assert store.get() is first
+    assert loader.calls == 2
+
+
+def test_concurrent_readers_share_one_load(wealth_file):
+    loader = CountingLoader()
+    store = WealthDataStore(wealth_file, loader=loader)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(store.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.calls == 1
+    assert len({id(s) for s in results}) == 1
+
+
+def test_missing_file_returns_none(tmp_path):
+    store = WealthDataStore(str(tmp_path / 'missing.xlsx'))
+    assert store.get() is None
+
+
+def _sidecars(directory):
+    return sorted(p for p in os.listdir(directory) if p.endswith('.arrow'))
+
+
+def test_sidecar_skips_workbook_parse(wealth_file, tmp_path, monkeypatch):
+    from services import wealth_data
+
+    first = wealth_data.load_wealth_workbook(wealth_file)
+    assert len(_sidecars(tmp_path)) == 1
+
+    def fail(path):
+        raise AssertionError('workbook should not be parsed')
+
+    monkeypatch.setattr(wealth_data, 'parse_wealth_workbook', fail)
+    second = wealth_data.load_wealth_workbook(wealth_file)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert second.index.name == 'Date'
+
+
+def test_sidecar_is_replaced_when_workbook_changes(wealth_file, tmp_path):
+    from services import wealth_data
+
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    wealth_data.load_wealth_workbook(wealth_file, cache_dir=str(cache_dir))
+    before = _sidecars(cache_dir)
+
+    write_wealth_workbook(wealth_file, periods=30, seed=1)
+    frame = wealth_data.load_wealth_workbook(wealth_file, cache_dir=str(cache_dir))
+    after = _sidecars(cache_dir)
+
+    assert len(frame) == 30
+    assert len(after) == 1
+    assert after != before
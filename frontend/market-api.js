@@ -11,6 +11,9 @@ class MarketDataAPI {
         };
         this.subscribers = [];
         this.updateInterval = null;
+        this.streamUrl = '/api/market/stream';
+        this.eventSource = null;
+        this.quotes = {};
     }
 
     // Subscribe to real-time updates
@@ -42,6 +45,43 @@ class MarketDataAPI {
             clearInterval(this.updateInterval);
             this.updateInterval = null;
         }
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+
+    // Receive pushed quotes for the given symbols (falls back to polling)
+    startQuoteStream(symbols, fallbackIntervalMs = 30000) {
+        if (typeof EventSource === 'undefined') {
+            this.startRealTimeUpdates(fallbackIntervalMs);
+            return;
+        }
+        this.stopRealTimeUpdates();
+
+        const url = `${this.streamUrl}?symbols=${encodeURIComponent(symbols.join(','))}`;
+        this.eventSource = new EventSource(url);
+
+        // A snapshot replaces the quotes (also after a reconnect); a delta
+        // only carries the symbols that changed.
+        this.eventSource.addEventListener('snapshot', event => {
+            this.quotes = JSON.parse(event.data).quotes;
+            this.notifySubscribers({ ...this.quotes });
+        });
+        this.eventSource.addEventListener('delta', event => {
+            Object.assign(this.quotes, JSON.parse(event.data).quotes);
+            this.notifySubscribers({ ...this.quotes });
+        });
+        this.eventSource.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                console.warn('Quote stream unavailable, polling instead');
+                this.eventSource = null;
+                this.startRealTimeUpdates(fallbackIntervalMs);
+            }
+        };
+
+        console.log('📊 Market data stream started');
     }
 
     // Fetch market data (with fallback to simulation)
@@ -65,9 +65,9 @@ const DashboardPage: React.FC = () => {
                 <div className="card" style={{ gridColumn: 'span 12', display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(150px, 1fr))', gap: 'var(--space-16)' }}>
                     <MetricCard title="Portfolio Value" value={metrics.totalValue.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' })} />
                     <MetricCard title="Return" value={metrics.returnPercent.toFixed(2)} suffix="%" valueColor={metrics.returnPercent >= 0 ? '#4caf50' : '#f44336'} />
-                    <MetricCard title="Sharpe Ratio" value={metrics.sharpeRatio} />
-                    <MetricCard title="Beta" value={metrics.beta} />
-                    <MetricCard title="VaR (95%)" value={`${metrics.var95}%`} />
+                    <MetricCard title="Sharpe Ratio" value={metrics.sharpeRatio ?? '—'} />
+                    <MetricCard title="Beta" value={metrics.beta ?? '—'} />
+                    <MetricCard title="VaR (95%)" value={metrics.var95 ?? '—'} suffix={metrics.var95 !== null ? '%' : undefined} />
                 </div>
 
                 <div className="card" style={{ gridColumn: 'span 12', display: 'grid', gap: 'var(--space-24)', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))' }}>
@@ -7,6 +7,8 @@ export interface PerformanceData {
     value: number;
 }
 
+export type PerformanceFrequency = 'daily' | 'weekly' | 'monthly' | 'quarterly' | 'yearly';
+
 export interface Holding {
     symbol: string;
     name: string;
@@ -17,9 +19,14 @@ export interface PortfolioMetrics {
     totalValue: number;
     returnPercent: number;
     holdings: Holding[];
-    sharpeRatio: number;
-    beta: number;
-    var95: number;
+    sharpeRatio: number | null;
+    beta: number | null;
+    var95: number | null;
+    var99: number | null;
+    cvar95: number | null;
+    parametricVar95: number | null;
+    volatility: number | null;
+    maxDrawdown: number | null;
 }
 
 export interface EconomicIndicators {
@@ -34,8 +41,10 @@ export type AIInsight = string;
 
 // --- API Fetch Functions ---
 
-export const getPerformanceData = async (): Promise<PerformanceData[]> => {
-    const response = await fetch(`${API_BASE_URL}/performance`);
+// The backend sends an ETag per frequency; the browser cache revalidates with
+// If-None-Match and reuses the cached body on a 304.
+export const getPerformanceData = async (freq: PerformanceFrequency = 'monthly'): Promise<PerformanceData[]> => {
+    const response = await fetch(`${API_BASE_URL}/performance?freq=${freq}`, { cache: 'no-cache' });
     if (!response.ok) throw new Error('Failed to fetch performance data');
     return response.json();
 };